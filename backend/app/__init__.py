@@ -1,3 +1,7 @@
 """
 App package initialization
 """
+from .utils.env_loader import load_env_variables
+
+# Load .env before any module of the package reads its settings from the environment at import time
+load_env_variables()
@@ -1,21 +1,63 @@
 """
 Main FastAPI application module for ResumeForge
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import ai_router, resume_router, upload_router, pdf_router
-from .utils.env_loader import load_env_variables
+from fastapi.responses import PlainTextResponse
+from .routers import ai_router, resume_router, upload_router, pdf_router, job_router
+from .services.service_container import ServiceContainer
+from .utils.admission import AdmissionMiddleware
+from .utils.compression import CompressionMiddleware
+from .utils.fast_json import FastJSONResponse
+from .utils.metrics import metrics
+from .utils.profiling import ProfilingMiddleware
+from .utils.request_metrics import RequestMetricsMiddleware
+from .utils.upload_limit import UploadSizeLimitMiddleware
+from .utils.tracing import TracingMiddleware, configure_logging, shutdown_tracing
+
+# Environment variables are loaded from .env when the app package is imported
+
+# Log JSON lines carrying request and trace ids when LOG_FORMAT=json
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build and warm up the shared services at startup, and shut them down on exit
+    """
+    services = ServiceContainer()
+    app.state.services = services
+    await services.start()
+    try:
+        yield
+    finally:
+        await services.stop()
+        shutdown_tracing()
 
-# Load environment variables
-load_env_variables()
 
 # Create FastAPI application
 app = FastAPI(
     title="ResumeForge API",
     description="API for enhancing and managing resumes with AI",
     version="1.0.0",
+    lifespan=lifespan,
+    # Serialize every JSON response with orjson (when installed) instead of json.dumps
+    default_response_class=FastJSONResponse,
 )
 
+# Limit concurrent requests per endpoint class, shedding the excess with 429/503 and Retry-After
+# (added first so it runs innermost: shed responses still go through compression, CORS, metrics and tracing)
+app.add_middleware(AdmissionMiddleware)
+
+# Refuse uploads over MAX_UPLOAD_SIZE_MB from Content-Length, or as soon as the body passes it
+# (outside admission control, so an oversized upload never waits for or takes a slot)
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Compress JSON bodies of 1 KiB or more with brotli (when installed) or gzip
+app.add_middleware(CompressionMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +67,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count requests and their latency per route for /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# Profile requests carrying the admin profiling token, or a random sample of them
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost: assign the request id and open the root span before anything else runs
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(ai_router.router, prefix="/api")
 app.include_router(resume_router.router, prefix="/api")
 app.include_router(upload_router.router, prefix="/api")
 app.include_router(pdf_router.router, prefix="/api")
+app.include_router(job_router.router, prefix="/api")
+
+
+@app.get("/ready")
+async def ready(request: Request):
+    """
+    Readiness endpoint: 200 once every service has warmed up, 503 while starting or shutting down
+    """
+    status = request.app.state.services.status()
+    return FastJSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms, cache, Gemini and request
+    counters, and in-flight gauges of this worker process
+    """
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/")
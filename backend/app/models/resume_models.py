@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class Education(BaseModel):
     """Education entry model for resume."""
@@ -48,6 +48,33 @@ class Resume(BaseModel):
     publications: Optional[List[dict]] = None
     references: Optional[List[dict]] = None
 
+class EditedEducation(BaseModel):
+    """Education entry of an edited resume; only the enhanced field is required to be typed."""
+    model_config = ConfigDict(extra="allow")
+    description: Optional[str] = None
+
+class EditedExperience(BaseModel):
+    """Work experience entry of an edited resume; only the enhanced fields are required to be typed."""
+    model_config = ConfigDict(extra="allow")
+    description: Optional[str] = None
+    achievements: Optional[List[str]] = None
+
+class EditedPersonalInfo(BaseModel):
+    """Personal information of an edited resume; only the enhanced summary is required to be typed."""
+    model_config = ConfigDict(extra="allow")
+    summary: Optional[str] = None
+
+class EditedResume(BaseModel):
+    """
+    Edited resume sent for re-enhancement.
+    Stored resumes come straight from the parser and may lack fields the Resume model
+    requires, so only the sections AI enhancement reads are typed; other keys pass through.
+    """
+    model_config = ConfigDict(extra="allow")
+    personal_info: Optional[EditedPersonalInfo] = None
+    education: Optional[List[EditedEducation]] = None
+    experience: Optional[List[EditedExperience]] = None
+
 class AiEnhanceRequest(BaseModel):
     """Request model for AI enhancement."""
     section: str
@@ -56,3 +83,16 @@ class AiEnhanceRequest(BaseModel):
 class AiEnhanceResponse(BaseModel):
     """Response model for AI enhancement."""
     enhanced_content: str
+
+class AiEnhanceBatchRequest(BaseModel):
+    """Request model for enhancing several sections in one call."""
+    items: List[AiEnhanceRequest]
+
+class AiEnhanceBatchItem(BaseModel):
+    """One enhanced item of a batch response."""
+    section: str
+    enhanced_content: str
+
+class AiEnhanceBatchResponse(BaseModel):
+    """Response model for batch AI enhancement, in the order of the request items."""
+    results: List[AiEnhanceBatchItem]
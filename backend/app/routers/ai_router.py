@@ -2,18 +2,37 @@
 Router for AI-enhancement related endpoints
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional, AsyncIterator
+import asyncio
 import os
-from ..models.resume_models import AiEnhanceRequest, AiEnhanceResponse
-from ..services.ai_service import AiEnhancementService
+from ..models.resume_models import (
+    AiEnhanceRequest, AiEnhanceResponse, AiEnhanceBatchRequest, AiEnhanceBatchItem, AiEnhanceBatchResponse
+)
+from ..services.ai_service import (
+    AiEnhancementService, GEMINI_AVAILABLE, enhancement_flights, gemini_breaker, gemini_rate_limiter
+)
+from ..services.service_container import get_ai_service
+from ..services.enhancement_gate import EnhancementGate
+from ..utils.fast_json import dumps_str
 
 
 # Create router for AI enhancement endpoints
 router = APIRouter(tags=["AI Enhancement"])
 
-# Create instance of AI enhancement service
-ai_service = AiEnhancementService()
+# Sections that can be enhanced, with their descriptions
+AI_SECTIONS = {
+    "summary": "Professional summary or objective statement",
+    "experience": "Work experience descriptions",
+    "education": "Education history and descriptions",
+    "skills": "Professional skills and competencies",
+    "projects": "Project descriptions and accomplishments",
+    "certifications": "Professional certifications and licenses",
+}
+
+# Maximum number of items in one batch enhancement request
+AI_ENHANCE_BATCH_MAX_ITEMS = int(os.getenv("AI_ENHANCE_BATCH_MAX_ITEMS", "50"))
 
 # Define model for AI status response
 class AiStatusResponse(BaseModel):
@@ -21,19 +40,17 @@ class AiStatusResponse(BaseModel):
     gemini_available: bool
     gemini_configured: bool
     using_mock: bool
+    cache: Optional[Dict[str, Any]] = None
+    coalescing: Optional[Dict[str, Any]] = None
+    rate_limiter: Optional[Dict[str, Any]] = None
+    circuit_breaker: Optional[Dict[str, Any]] = None
+    skip_gate: Optional[Dict[str, Any]] = None
 
 
-@router.post("/ai-enhance", response_model=AiEnhanceResponse)
-async def enhance_content(request: AiEnhanceRequest) -> AiEnhanceResponse:
+def _validate_enhance_request(request: AiEnhanceRequest) -> None:
     """
-    Enhance resume content using AI.
+    Check that an enhancement request names a valid section and has content.
     
-    Args:
-        request (AiEnhanceRequest): The request containing section and content to enhance
-        
-    Returns:
-        AiEnhanceResponse: The enhanced content
-        
     Raises:
         HTTPException: If the section is invalid or content is empty
     """
@@ -44,40 +61,145 @@ async def enhance_content(request: AiEnhanceRequest) -> AiEnhanceResponse:
             detail="Both 'section' and 'content' fields are required and must not be empty"
         )
     
-    # Valid sections (can be extended as needed)
-    valid_sections = ["summary", "experience", "education", "skills", "projects", "certifications"]
-    
-    if request.section.lower() not in [s.lower() for s in valid_sections]:
+    if request.section.lower() not in AI_SECTIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid section. Must be one of: {', '.join(valid_sections)}"
+            detail=f"Invalid section. Must be one of: {', '.join(AI_SECTIONS)}"
         )
+
+
+@router.post("/ai-enhance", response_model=AiEnhanceResponse)
+async def enhance_content(
+    request: AiEnhanceRequest,
+    ai_service: AiEnhancementService = Depends(get_ai_service)
+) -> AiEnhanceResponse:
+    """
+    Enhance resume content using AI.
+    
+    Args:
+        request (AiEnhanceRequest): The request containing section and content to enhance
+        ai_service (AiEnhancementService): The shared AI enhancement service
+        
+    Returns:
+        AiEnhanceResponse: The enhanced content
+        
+    Raises:
+        HTTPException: If the section is invalid or content is empty
+    """
+    _validate_enhance_request(request)
     
     # Get enhanced content from AI service
-    enhanced_content = ai_service.enhance_content(request.section, request.content)
+    enhanced_content = await ai_service.enhance_content_async(request.section, request.content)
     
     # Return response
     return AiEnhanceResponse(enhanced_content=enhanced_content)
 
 
+@router.post("/ai-enhance-batch", response_model=AiEnhanceBatchResponse)
+async def enhance_content_batch(
+    request: AiEnhanceBatchRequest,
+    ai_service: AiEnhancementService = Depends(get_ai_service)
+) -> AiEnhanceBatchResponse:
+    """
+    Enhance several sections in one request.
+    
+    All items are validated before any model call. They are then enhanced together:
+    identical and cached items cost no extra call, and the rest go out in one batched
+    prompt (or concurrent per-item calls when batching is disabled).
+    
+    Args:
+        request (AiEnhanceBatchRequest): The items (section and content) to enhance
+        ai_service (AiEnhancementService): The shared AI enhancement service
+        
+    Returns:
+        AiEnhanceBatchResponse: The enhanced content, in the order of the request items
+        
+    Raises:
+        HTTPException: If there are no or too many items, or any item is invalid
+    """
+    if not request.items or len(request.items) > AI_ENHANCE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Between 1 and {AI_ENHANCE_BATCH_MAX_ITEMS} items are required"
+        )
+    for index, item in enumerate(request.items):
+        try:
+            _validate_enhance_request(item)
+        except HTTPException as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"Item {index}: {e.detail}"
+            )
+    
+    enhanced = await ai_service.enhance_many_async([(item.section, item.content) for item in request.items])
+    
+    return AiEnhanceBatchResponse(results=[
+        AiEnhanceBatchItem(section=item.section, enhanced_content=content)
+        for item, content in zip(request.items, enhanced)
+    ])
+
+
+@router.post("/ai-enhance/stream")
+async def enhance_content_stream(
+    request: AiEnhanceRequest,
+    ai_service: AiEnhancementService = Depends(get_ai_service)
+) -> StreamingResponse:
+    """
+    Enhance resume content using AI, streaming the output as Server-Sent Events.
+    
+    Sends a `delta` event per generated chunk and a final `done` event with the
+    cleaned-up enhanced content. If the client disconnects, the model call is
+    cancelled and its concurrency slot released.
+    
+    Args:
+        request (AiEnhanceRequest): The request containing section and content to enhance
+        ai_service (AiEnhancementService): The shared AI enhancement service
+        
+    Returns:
+        StreamingResponse: The text/event-stream response
+        
+    Raises:
+        HTTPException: If the section is invalid or content is empty
+    """
+    _validate_enhance_request(request)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        events = ai_service.stream_enhancement(request.section, request.content)
+        try:
+            async for event, payload in events:
+                yield f"event: {event}\ndata: {dumps_str(payload)}\n\n"
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/ai-status", response_model=AiStatusResponse)
-async def get_ai_status() -> AiStatusResponse:
+async def get_ai_status(ai_service: AiEnhancementService = Depends(get_ai_service)) -> AiStatusResponse:
     """
     Get the current status of AI enhancement capabilities.
     
     Returns:
         AiStatusResponse: The current AI status
     """
-    try:
-        import google.generativeai as genai
-        gemini_available = True
-    except ImportError:
-        gemini_available = False
+    circuit_breaker = gemini_breaker.stats()
     
     return AiStatusResponse(
-        gemini_available=gemini_available,
+        gemini_available=GEMINI_AVAILABLE,
         gemini_configured=ai_service.gemini_configured,
-        using_mock=not ai_service.gemini_configured
+        # While the circuit is open every call is answered with a mock response
+        using_mock=not ai_service.gemini_configured or circuit_breaker["state"] == gemini_breaker.OPEN,
+        # Counting the disk tier's rows is a SQLite query: keep it off the event loop
+        cache=await asyncio.to_thread(ai_service.cache.stats) if ai_service.cache else None,
+        coalescing=enhancement_flights.stats(),
+        rate_limiter=gemini_rate_limiter.stats(),
+        circuit_breaker=circuit_breaker,
+        skip_gate=EnhancementGate.stats() if ai_service.gate else None
     )
 
 
@@ -91,29 +213,7 @@ async def get_ai_sections() -> Dict[str, Any]:
     """
     return {
         "valid_sections": [
-            {
-                "name": "summary",
-                "description": "Professional summary or objective statement"
-            },
-            {
-                "name": "experience",
-                "description": "Work experience descriptions"
-            },
-            {
-                "name": "education",
-                "description": "Education history and descriptions"
-            },
-            {
-                "name": "skills",
-                "description": "Professional skills and competencies"
-            },
-            {
-                "name": "projects",
-                "description": "Project descriptions and accomplishments"
-            },
-            {
-                "name": "certifications",
-                "description": "Professional certifications and licenses"
-            }
+            {"name": name, "description": description}
+            for name, description in AI_SECTIONS.items()
         ]
     }
@@ -0,0 +1,96 @@
+"""
+Router for background upload job status and progress events
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator
+from ..services.service_container import get_job_queue
+from ..services.upload_job_service import UploadJobQueue
+from ..utils.fast_json import dumps_str
+
+# Create router for job endpoints
+router = APIRouter(tags=["Jobs"])
+
+
+async def _get_job_state(job_queue: UploadJobQueue, job_id: str) -> Dict[str, Any]:
+    """
+    Look up a job's state by ID, whichever worker process runs the job.
+
+    Raises:
+        HTTPException: If the job is unknown or has expired
+    """
+    state = await job_queue.get_state(job_id)
+    if state is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return state
+
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job(job_id: str, job_queue: UploadJobQueue = Depends(get_job_queue)) -> Dict[str, Any]:
+    """
+    Get the status of an upload job.
+
+    Args:
+        job_id (str): The ID returned by POST /api/upload-resume?mode=job
+        job_queue (UploadJobQueue): The upload job queue
+
+    Returns:
+        Dict[str, Any]: Job status, current stage, resume ID once saved, and progress events
+
+    Raises:
+        HTTPException: If the job is not found
+    """
+    return await _get_job_state(job_queue, job_id)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, job_queue: UploadJobQueue = Depends(get_job_queue)) -> StreamingResponse:
+    """
+    Stream the progress of an upload job as Server-Sent Events.
+
+    Sends one `progress` event per stage already reached, then one per stage as it
+    happens (parsed, enhanced, saved), and closes after the job succeeds or fails.
+
+    Args:
+        job_id (str): The ID returned by POST /api/upload-resume?mode=job
+        job_queue (UploadJobQueue): The upload job queue
+
+    Returns:
+        StreamingResponse: The text/event-stream response
+
+    Raises:
+        HTTPException: If the job is not found
+    """
+    await _get_job_state(job_queue, job_id)
+
+    async def event_stream() -> AsyncIterator[str]:
+        async for event in job_queue.follow(job_id):
+            yield f"event: progress\ndata: {dumps_str(event)}\n\n"
+        state = await job_queue.get_state(job_id)
+        if state is not None:
+            yield f"event: done\ndata: {dumps_str(state)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs", response_model=Dict[str, Any])
+async def get_job_queue_status(job_queue: UploadJobQueue = Depends(get_job_queue)) -> Dict[str, Any]:
+    """
+    Get the upload job queue status.
+
+    Args:
+        job_queue (UploadJobQueue): The upload job queue
+
+    Returns:
+        Dict[str, Any]: Worker count, queue capacity and depth, and job counts per status
+        (of the worker process answering the request)
+    """
+    return job_queue.stats()
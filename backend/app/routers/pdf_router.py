@@ -1,30 +1,31 @@
 """
 Router for PDF generation endpoints
 """
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Response, Depends
 from fastapi.responses import StreamingResponse
 from typing import Dict, Any
 import io
 import os
 from ..models.resume_models import Resume
 from ..services.pdf_service import PdfGenerationService
+from ..services.service_container import get_pdf_service, get_storage_service
 from ..services.storage_service import ResumeStorageService
 
 # Create router for PDF generation endpoints
 router = APIRouter(tags=["PDF Generation"])
 
-# Create instances of services
-pdf_service = PdfGenerationService()
-storage_service = ResumeStorageService()
-
 
 @router.post("/generate-pdf", response_class=StreamingResponse)
-async def generate_pdf_from_json(resume: Resume) -> StreamingResponse:
+async def generate_pdf_from_json(
+    resume: Resume,
+    pdf_service: PdfGenerationService = Depends(get_pdf_service)
+) -> StreamingResponse:
     """
     Generate a PDF from the provided resume data.
     
     Args:
         resume (Resume): The resume data to convert to PDF
+        pdf_service (PdfGenerationService): The shared PDF generation service
         
     Returns:
         StreamingResponse: The generated PDF file
@@ -60,12 +61,18 @@ async def generate_pdf_from_json(resume: Resume) -> StreamingResponse:
 
 
 @router.get("/resume/{resume_id}/pdf", response_class=StreamingResponse)
-async def get_resume_as_pdf(resume_id: str) -> StreamingResponse:
+async def get_resume_as_pdf(
+    resume_id: str,
+    pdf_service: PdfGenerationService = Depends(get_pdf_service),
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> StreamingResponse:
     """
     Get a saved resume as a PDF.
     
     Args:
         resume_id (str): ID of the resume to convert to PDF
+        pdf_service (PdfGenerationService): The shared PDF generation service
+        storage_service (ResumeStorageService): The shared storage service
         
     Returns:
         StreamingResponse: The generated PDF file
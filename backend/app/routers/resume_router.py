@@ -1,25 +1,29 @@
 """
 Router for resume storage operations
 """
-from typing import Dict, Any, List
-from fastapi import APIRouter, HTTPException
-from ..models.resume_models import Resume
-from ..services.storage_service import ResumeStorageService
+from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Body, Depends
+from ..models.resume_models import Resume, EditedResume
+from ..services.ai_service import AiEnhancementService
+from ..services.service_container import get_ai_service, get_storage_service
+from ..services.storage_service import ResumeStorageService, merge_edits
+from ..utils.fast_json import FastJSONResponse
 
 # Create router for resume storage endpoints
 router = APIRouter(tags=["Resume Storage"])
 
-# Create instance of resume storage service
-storage_service = ResumeStorageService()
-
 
 @router.post("/save-resume", response_model=Dict[str, Any])
-async def save_resume(resume: Resume) -> Dict[str, Any]:
+async def save_resume(
+    resume: Resume,
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> Dict[str, Any]:
     """
     Save a complete resume.
     
     Args:
         resume (Resume): The complete resume data
+        storage_service (ResumeStorageService): The shared storage service
         
     Returns:
         Dict[str, Any]: The saved resume with metadata (id, timestamp)
@@ -34,12 +38,16 @@ async def save_resume(resume: Resume) -> Dict[str, Any]:
 
 
 @router.get("/resume/{resume_id}", response_model=Dict[str, Any])
-async def get_resume(resume_id: str) -> Dict[str, Any]:
+async def get_resume(
+    resume_id: str,
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> Dict[str, Any]:
     """
     Retrieve a resume by ID.
     
     Args:
         resume_id (str): ID of the resume to retrieve
+        storage_service (ResumeStorageService): The shared storage service
         
     Returns:
         Dict[str, Any]: The resume data
@@ -55,15 +63,68 @@ async def get_resume(resume_id: str) -> Dict[str, Any]:
             detail=f"Resume with ID {resume_id} not found"
         )
     
-    return resume
+    # Stored resumes are plain JSON already: skip response model validation and encoding
+    return FastJSONResponse(content=resume)
+
+
+@router.post("/resume/{resume_id}/enhance", response_model=Dict[str, Any])
+async def reenhance_resume(
+    resume_id: str,
+    resume: Optional[EditedResume] = Body(None),
+    ai_service: AiEnhancementService = Depends(get_ai_service),
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> Dict[str, Any]:
+    """
+    Re-enhance a stored resume after edits, sending only new or modified fields to the model.
+    
+    The edited resume is compared field by field with the stored version, matching
+    fields by content so that inserting or removing a bullet leaves the others
+    unchanged. Fields that are unchanged keep their enhancement, and the provenance
+    recorded for them when they were produced is carried over into `enhancement_provenance`.
+    
+    Args:
+        resume_id (str): ID of the stored resume
+        resume (Optional[EditedResume]): The edited fields, merged onto the stored version
+        ai_service (AiEnhancementService): The shared AI enhancement service
+        storage_service (ResumeStorageService): The shared storage service
+        
+    Returns:
+        Dict[str, Any]: The re-enhanced and saved resume, with the changed fields under `field_changes`
+        
+    Raises:
+        HTTPException: If resume is not found
+    """
+    previous = storage_service.get_resume(resume_id)
+    
+    if previous is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Resume with ID {resume_id} not found"
+        )
+    
+    # A partial body only replaces the fields it sends; other sections and metadata are kept
+    edits = resume.model_dump(exclude_unset=True) if resume is not None else {}
+    current = merge_edits(previous, edits)
+    current["id"] = resume_id
+    field_changes = storage_service.diff_fields(previous, current)
+    
+    enhanced_resume = await ai_service.enhance_entire_resume_async(current, previous=previous)
+    saved_resume = storage_service.save_resume(enhanced_resume)
+    
+    return {**saved_resume, "field_changes": field_changes}
 
 
 @router.get("/resumes", response_model=List[Dict[str, Any]])
-async def list_resumes() -> List[Dict[str, Any]]:
+async def list_resumes(
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> List[Dict[str, Any]]:
     """
     List all saved resumes with basic metadata.
     
+    Args:
+        storage_service (ResumeStorageService): The shared storage service
+        
     Returns:
         List[Dict[str, Any]]: List of resume metadata objects
     """
-    return storage_service.list_resumes()
+    return FastJSONResponse(content=storage_service.list_resumes())
@@ -1,15 +1,21 @@
 """
 Router for file upload operations
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict, Any
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
+from typing import Dict, Any, List, Optional
+from fastapi.responses import StreamingResponse
 from ..services.resume_parser_service import ResumeParserService
-from ..services.ai_service import AiEnhancementService
-from ..services.storage_service import ResumeStorageService
+from ..services.storage_service import ResumeStorageService, DATA_DIR
+from ..services.batch_upload_service import BatchUploadPipeline, MAX_BATCH_FILES
+from ..services.service_container import ServiceContainer, get_services, get_storage_service, get_parser_service
+from ..services.upload_job_service import JobQueueFullError
+from ..utils.fast_json import FastJSONResponse, dumps
+from ..utils.field_selection import FIELDS_PATTERN, select_fields
+from ..utils.profiling import profiled
+from ..utils.upload_spool import spool_upload, expand_zip_upload, UploadRejectedError, MAX_UPLOAD_BYTES
+import asyncio
 import logging
 import os
-import os
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -19,25 +25,42 @@ router = APIRouter(tags=["File Upload"])
 
 
 @router.post("/upload-resume", response_model=Dict[str, Any])
-async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
+async def upload_resume(
+    file: UploadFile = File(...),
+    mode: str = Query("sync", pattern="^(sync|job)$"),
+    fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN),
+    services: ServiceContainer = Depends(get_services)
+) -> Dict[str, Any]:
     """
     Upload a resume file (.pdf or .docx), parse it, and enhance it with AI.
     
     This endpoint:
-    1. Validates the file format
-    2. Extracts text from PDF/DOCX
-    3. Parses the text into structured JSON
-    4. Uses Gemini AI to enhance the resume content
-    5. Returns the enhanced resume data
+    1. Validates the file format (extension and magic bytes) and size
+    2. Streams the upload to a temporary file in chunks, hashing it as it goes
+    3. Extracts text from the memory-mapped PDF/DOCX
+    4. Parses the text into structured JSON
+    5. Uses Gemini AI to enhance the resume content
+    6. Returns the enhanced resume data
+    
+    With mode=job, steps 3-5 and saving run in a background job instead: the
+    response (202) only carries the job id, and progress is available from
+    /api/jobs/{job_id} and /api/jobs/{job_id}/events.
+    
+    fields= trims the response to the listed paths, e.g.
+    fields=resume_id,parsed_resume.personal_info,parsed_resume.experience.position
     
     Args:
         file (UploadFile): The uploaded resume file
+        mode (str): "sync" to process within the request, "job" to queue a background job
+        fields (Optional[str]): Comma-separated, dot-separated paths of the fields to return (default: all)
+        services (ServiceContainer): The shared parser, AI, storage and job queue services
         
     Returns:
-        Dict[str, Any]: Enhanced resume data in JSON format
+        Dict[str, Any]: Enhanced resume data in JSON format, or the queued job
         
     Raises:
-        HTTPException: If file format is not supported or processing fails
+        HTTPException: If file format is not supported, the file is too large, the job
+            queue is full, or processing fails
     """
     # Check file extension (only allow PDF and DOCX)
     if not file.filename:
@@ -53,47 +76,80 @@ async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
             detail="Only PDF and DOCX files are supported"
         )
     
+    # UploadSizeLimitMiddleware has already refused bodies over the limit while they arrived;
+    # copy the parsed upload to disk, validating magic bytes and the file's own size per chunk
     try:
-        # Read file content
-        file_content = await file.read()
-        logger.info(f"Processing uploaded file: {file.filename} ({len(file_content)} bytes)")
+        spooled = await spool_upload(file)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    if mode == "job":
+        # The job owns the spooled file from here on and removes it when done
+        try:
+            job = await services.job_queue.submit(spooled)
+        except JobQueueFullError as e:
+            spooled.cleanup()
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": "5"}
+            )
         
-        # Initialize services
-        parser_service = ResumeParserService()
-        ai_service = AiEnhancementService()
-        storage_service = ResumeStorageService()
+        logger.info(f"Queued upload job {job.id} for {file.filename} ({spooled.size} bytes)")
+        return FastJSONResponse(
+            status_code=202,
+            content=select_fields({
+                "message": f"Resume {file.filename} queued for processing",
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/jobs/{job.id}",
+                "events_url": f"/api/jobs/{job.id}/events",
+                "file_size": spooled.size,
+                "file_sha256": spooled.sha256
+            }, fields)
+        )
+    
+    try:
+        logger.info(f"Processing uploaded file: {file.filename} ({spooled.size} bytes)")
+        
+        parser_service = services.parser_service
+        ai_service = services.ai_service
+        storage_service = services.storage_service
         
         # Parse the resume file
         logger.info("Parsing resume content...")
-        parsed_resume = await parser_service.parse_resume_file(file_content, file.filename)
+        parsed_resume, full_text = await asyncio.to_thread(
+            profiled(parser_service.parse_resume_path), spooled.path, file.filename
+        )
         
-        # Enhance the resume with AI
+        # Enhance the resume with AI and generate an improved summary
+        # (a single model call when batched enhancement is enabled)
         logger.info("Enhancing resume with AI...")
-        enhanced_resume = ai_service.enhance_entire_resume(parsed_resume)
-        
-        # Generate an improved summary
-        logger.info("Generating improved summary...")
-        improved_summary = ai_service.generate_improved_summary(enhanced_resume)
-        if improved_summary:
-            enhanced_resume["personal_info"]["summary"] = improved_summary
+        enhanced_resume = await ai_service.enhance_resume_with_summary_async(parsed_resume)
         
         # Add metadata about the original file
         enhanced_resume["original_filename"] = file.filename
-        enhanced_resume["file_size"] = len(file_content)
-        enhanced_resume["file_type"] = file_ext
+        enhanced_resume["file_size"] = spooled.size
+        enhanced_resume["file_type"] = spooled.file_type
+        enhanced_resume["file_sha256"] = spooled.sha256
         
         # Save the enhanced resume to storage
         logger.info("Saving enhanced resume to storage...")
         saved_resume = storage_service.save_resume(enhanced_resume)
         
+        # Keep the full extracted text so the resume can be re-parsed later without the original file
+        if full_text:
+            storage_service.save_raw_text(saved_resume["id"], full_text)
+        
         logger.info(f"Successfully processed and saved resume: {file.filename} with ID: {saved_resume['id']}")
         
-        return JSONResponse(
-            content={
+        return FastJSONResponse(
+            content=select_fields({
                 "message": f"Resume {file.filename} uploaded, enhanced, and saved successfully",
                 "resume_id": saved_resume["id"],
                 "original_filename": file.filename,
-                "file_size": len(file_content),
+                "file_size": spooled.size,
+                "file_sha256": spooled.sha256,
                 "ai_enhanced": enhanced_resume.get("ai_enhanced", False),
                 "saved_location": f"data/resume_{saved_resume['id']}.json",
                 "parsed_resume": enhanced_resume,
@@ -103,7 +159,7 @@ async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
                     "enhancement_timestamp": enhanced_resume.get("enhancement_timestamp"),
                     "storage_timestamp": saved_resume.get("last_updated")
                 }
-            }
+            }, fields)
         )
         
     except Exception as e:
@@ -112,24 +168,117 @@ async def upload_resume(file: UploadFile = File(...)) -> Dict[str, Any]:
             status_code=500,
             detail=f"Failed to process resume: {str(e)}"
         )
+    finally:
+        spooled.cleanup()
+
+
+@router.post("/upload-resumes", response_class=StreamingResponse)
+async def upload_resumes(
+    files: List[UploadFile] = File(...),
+    services: ServiceContainer = Depends(get_services)
+) -> StreamingResponse:
+    """
+    Upload many resume files (.pdf, .docx, or .zip archives of them) and process them concurrently.
+    
+    Files run through a staged pipeline: extraction and parsing in a process pool,
+    AI enhancement and summary generation fanned out concurrently, and storage
+    writes grouped into batches. Results are streamed back as NDJSON, one line per
+    file in completion order, followed by a summary line. Each line's `index` is the
+    position of the file in the request; resumes from a zip archive share its index.
+    
+    Args:
+        files (List[UploadFile]): The uploaded files
+        services (ServiceContainer): The shared AI and storage services and extraction pool
+        
+    Returns:
+        StreamingResponse: NDJSON stream of per-file results
+        
+    Raises:
+        HTTPException: If no files or too many files are provided
+    """
+    if not files:
+        raise HTTPException(
+            status_code=400,
+            detail="No files provided"
+        )
+    
+    # Spool every upload to disk; zip archives are expanded into their resumes.
+    # Each resume keeps the position of its file (or archive) in the request as its index
+    uploads = []
+    rejected = []
+    try:
+        for position, file in enumerate(files):
+            filename = file.filename or ""
+            file_ext = filename.split('.')[-1].lower() if "." in filename else ""
+            if file_ext not in ["pdf", "docx", "zip"]:
+                rejected.append((position, filename, "Only PDF, DOCX and ZIP files are supported"))
+                continue
+            try:
+                spooled = await spool_upload(file, allowed_types=[file_ext])
+            except UploadRejectedError as e:
+                rejected.append((position, filename, e.detail))
+                continue
+            
+            if spooled.file_type == "zip":
+                try:
+                    members, member_errors = await asyncio.to_thread(profiled(expand_zip_upload), spooled)
+                except UploadRejectedError as e:
+                    members, member_errors = [], [(filename, e.detail)]
+                finally:
+                    spooled.cleanup()
+                uploads.extend((position, member) for member in members)
+                rejected.extend((position, name, reason) for name, reason in member_errors)
+            else:
+                uploads.append((position, spooled))
+            
+            if len(uploads) > MAX_BATCH_FILES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"A batch may contain at most {MAX_BATCH_FILES} resumes"
+                )
+    except BaseException:
+        for _, spooled in uploads:
+            spooled.cleanup()
+        raise
+    
+    logger.info(f"Processing batch upload: {len(uploads)} resumes, {len(rejected)} rejected")
+    pipeline = BatchUploadPipeline(services.ai_service, services.storage_service, services.extraction_pool)
+    
+    async def stream_results():
+        counts = {"saved": 0, "error": 0, "rejected": len(rejected)}
+        try:
+            for index, filename, reason in rejected:
+                yield dumps({"index": index, "filename": filename, "status": "rejected", "error": reason}) + b"\n"
+            
+            async for result in pipeline.run(uploads):
+                counts[result["status"]] += 1
+                yield dumps(result) + b"\n"
+            
+            yield dumps({"summary": {"total": len(rejected) + len(uploads), **counts}}) + b"\n"
+        finally:
+            for _, spooled in uploads:
+                spooled.cleanup()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 @router.get("/resumes", response_model=Dict[str, Any])
-async def list_saved_resumes() -> Dict[str, Any]:
+async def list_saved_resumes(
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> Dict[str, Any]:
     """
     List all saved resumes with basic metadata.
     
+    Args:
+        storage_service (ResumeStorageService): The shared storage service
+        
     Returns:
         Dict[str, Any]: List of saved resumes and storage information
     """
     try:
-        storage_service = ResumeStorageService()
         resumes = storage_service.list_resumes()
         
-        # Get the actual storage path
-        from ..services.storage_service import DATA_DIR
-        
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": f"Found {len(resumes)} saved resumes",
                 "storage_location": DATA_DIR,
@@ -146,18 +295,25 @@ async def list_saved_resumes() -> Dict[str, Any]:
 
 
 @router.get("/resumes/{resume_id}", response_model=Dict[str, Any])
-async def get_saved_resume(resume_id: str) -> Dict[str, Any]:
+async def get_saved_resume(
+    resume_id: str,
+    fields: Optional[str] = Query(None, pattern=FIELDS_PATTERN),
+    storage_service: ResumeStorageService = Depends(get_storage_service)
+) -> Dict[str, Any]:
     """
     Retrieve a specific saved resume by ID.
     
+    fields= trims the response to the listed paths, e.g. fields=resume_data.personal_info,resume_data.skills.name
+    
     Args:
         resume_id (str): The ID of the resume to retrieve
+        fields (Optional[str]): Comma-separated, dot-separated paths of the fields to return (default: all)
+        storage_service (ResumeStorageService): The shared storage service
         
     Returns:
         Dict[str, Any]: The complete resume data
     """
     try:
-        storage_service = ResumeStorageService()
         resume = storage_service.get_resume(resume_id)
         
         if not resume:
@@ -166,16 +322,15 @@ async def get_saved_resume(resume_id: str) -> Dict[str, Any]:
                 detail=f"Resume with ID {resume_id} not found"
             )
         
-        from ..services.storage_service import DATA_DIR
         file_path = os.path.join(DATA_DIR, f"resume_{resume_id}.json")
         
-        return JSONResponse(
-            content={
+        return FastJSONResponse(
+            content=select_fields({
                 "message": "Resume retrieved successfully",
                 "resume_id": resume_id,
                 "file_location": file_path,
                 "resume_data": resume
-            }
+            }, fields)
         )
         
     except HTTPException:
@@ -186,3 +341,25 @@ async def get_saved_resume(resume_id: str) -> Dict[str, Any]:
             status_code=500,
             detail=f"Failed to retrieve resume: {str(e)}"
         )
+
+
+@router.get("/parser-status", response_model=Dict[str, Any])
+async def get_parser_status(
+    parser_service: ResumeParserService = Depends(get_parser_service)
+) -> Dict[str, Any]:
+    """
+    Get available parsing libraries and PDF extraction statistics.
+    
+    Args:
+        parser_service (ResumeParserService): The shared parser service
+        
+    Returns:
+        Dict[str, Any]: Available libraries, per-extractor timings and escalation counters
+    """
+    from ..services.resume_parser_service import PDF_LIBS
+    
+    return {
+        "parsing_available": parser_service.parsing_available,
+        "libraries": sorted(PDF_LIBS.keys()),
+        "extraction_stats": parser_service.get_extraction_stats()
+    }
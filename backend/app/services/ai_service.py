@@ -1,34 +1,183 @@
 """
 Service for enhancing resume content using AI (Gemini AI or mocked responses)
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Union, AsyncIterator, Awaitable
 from datetime import datetime
+import asyncio
+import copy
+import time
 import os
+import weakref
+import re
 import json
 import logging
+from .enhancement_cache import EnhancementCache, get_enhancement_cache
+from .enhancement_gate import AI_SKIP_GATE, EnhancementGate, GatePlan
+from .storage_service import ResumeStorageService, match_fields
+from ..utils.lazy_import import import_module, module_available
+from ..utils.metrics import metrics
+from ..utils.tracing import span, start_span, traced
+from ..utils.resilience import CircuitBreaker, TokenBucket, backoff_delay
+from ..utils.single_flight import SingleFlight
+from ..utils.token_budget import MAX_OUTPUT_TOKENS, condense_text, estimate_tokens, section_budget
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import the Google Generative AI library
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-    logger.info("Google Generative AI (Gemini) module loaded successfully")
-except ImportError:
-    GEMINI_AVAILABLE = False
+# Probe for the Google Generative AI library without importing it (the import takes most of a second);
+# it is imported when Gemini is first configured
+GEMINI_AVAILABLE = module_available("google.generativeai")
+if not GEMINI_AVAILABLE:
     logger.warning("Google Generative AI (Gemini) module not available. Using mock responses.")
 
+# Gemini model used for all generation calls
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+
+# Alternative API endpoint, e.g. the local stand-in server used for load tests (http://127.0.0.1:8090)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+
+# SDK transport ("grpc" by default); a custom endpoint is always reached over REST
+GEMINI_TRANSPORT = "rest" if GEMINI_API_ENDPOINT else (os.getenv("GEMINI_TRANSPORT") or None)
+
+# Version of the prompt templates; bump whenever a prompt changes so cached enhancements are not reused
+PROMPT_TEMPLATE_VERSION = "1"
+
+# Cache key section used for generated summaries
+SUMMARY_CACHE_SECTION = "summary_generation"
+
+# Enhance all fields of a resume in one structured model call instead of one call per field
+BATCH_ENHANCEMENT = os.getenv("AI_BATCH_ENHANCEMENT", "true").lower() in ("1", "true", "yes")
+
+# Maximum number of concurrent async Gemini calls per event loop (shared by all requests)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+
+# Deadline in seconds for a single async Gemini call
+AI_CALL_TIMEOUT = float(os.getenv("AI_CALL_TIMEOUT", "30"))
+
+# Gemini request quota: sustained calls per minute and burst size (per process; 0 disables limiting)
+AI_RATE_LIMIT_RPM = float(os.getenv("AI_RATE_LIMIT_RPM", "60"))
+AI_RATE_LIMIT_BURST = int(os.getenv("AI_RATE_LIMIT_BURST", "10"))
+
+# Longest a call may queue for rate-limit capacity before falling back to a mock response
+AI_RATE_LIMIT_MAX_WAIT = float(os.getenv("AI_RATE_LIMIT_MAX_WAIT", "10"))
+
+# Retries of a Gemini call after a retryable error, with jittered exponential backoff
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "0.5"))
+AI_RETRY_MAX_DELAY = float(os.getenv("AI_RETRY_MAX_DELAY", "8"))
+
+# Consecutive upstream failures that open the circuit, and how long it stays open
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5"))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+
+# HTTP status codes of Gemini API errors worth retrying (quota exhausted or upstream unavailable)
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Path to a field inside the resume, e.g. ("experience", 0, "achievements", 1)
+FieldPath = Tuple[Union[str, int], ...]
+
+# Labels the model sometimes echoes back from the prompt
+_RESPONSE_LABELS = ['Enhanced description:', 'Enhanced summary:', 'Enhanced skills:', 'Enhanced content:']
+
+
+def field_key(path: FieldPath) -> str:
+    """Format a field path as a string key, e.g. experience[0].achievements[1]"""
+    key = ""
+    for part in path:
+        key += f"[{part}]" if isinstance(part, int) else (f".{part}" if key else part)
+    return key
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Return whether a failed Gemini call should be retried (and counted against the circuit breaker)"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # google.api_core exceptions carry the HTTP status of the failed request
+    return getattr(error, "code", None) in _RETRYABLE_STATUS_CODES
+
+
+# Marks the end of a blocking iterator advanced in a worker thread
+_STREAM_END = object()
+
+
+async def _iterate_in_thread(iterator) -> AsyncIterator[Any]:
+    """Iterate a blocking iterator without blocking the event loop"""
+    while True:
+        item = await asyncio.to_thread(next, iterator, _STREAM_END)
+        if item is _STREAM_END:
+            return
+        yield item
+
+
+def _enhance_span_attributes(self, resume_data: Dict[str, Any], batched: Optional[bool], include_summary: bool,
+                             previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Trace attributes of a whole-resume enhancement"""
+    return {"include_summary": include_summary, "incremental": previous is not None}
+
+
+def _enhanced_span_attributes(result: Tuple[Dict[str, Any], Optional[str]]) -> Dict[str, Any]:
+    """Trace attributes from the result of a whole-resume enhancement: per-decision field counts"""
+    enhanced_resume, _ = result
+    counts = enhanced_resume.get("enhancement_gate") or {}
+    return {"ai_enhanced": enhanced_resume.get("ai_enhanced", False),
+            **{f"fields_{decision}": count for decision, count in counts.items()}}
+
+
+def _genai():
+    """Return the google.generativeai module, importing it on first use"""
+    return import_module("google.generativeai")
+
+
+def _configure_gemini(api_key: str) -> None:
+    """Configure the Gemini SDK with an API key and the configured endpoint and transport"""
+    options = {"api_key": api_key}
+    if GEMINI_TRANSPORT:
+        options["transport"] = GEMINI_TRANSPORT
+    if GEMINI_API_ENDPOINT:
+        options["client_options"] = {"api_endpoint": GEMINI_API_ENDPOINT}
+    _genai().configure(**options)
+
+
+# Shared by every service instance so the limits apply to the whole process
+gemini_rate_limiter = TokenBucket("gemini", AI_RATE_LIMIT_RPM, AI_RATE_LIMIT_BURST, AI_RATE_LIMIT_MAX_WAIT)
+gemini_breaker = CircuitBreaker("gemini", AI_BREAKER_FAILURE_THRESHOLD, AI_BREAKER_RESET_SECONDS)
+
+
+# Estimated tokens per call are exported as a histogram with these bucket bounds
+metrics.set_buckets("gemini_tokens", (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192))
+
+# Identical enhancement requests in flight at the same time share one model call
+enhancement_flights = SingleFlight("ai_enhance")
+
+_ai_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_ai_semaphore() -> asyncio.Semaphore:
+    """Return the global semaphore limiting concurrent Gemini calls on the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _ai_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _ai_semaphores[loop] = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return semaphore
+
+
 class AiEnhancementService:
     """
     Service class to handle AI-based content enhancement for resumes.
     Uses Google's Gemini AI if available, otherwise falls back to mocked responses.
     """
     
-    def __init__(self):
-        """Initialize the service and configure Gemini if available"""
+    def __init__(self, cache: Optional[EnhancementCache] = None):
+        """
+        Initialize the service and configure Gemini if available
+        
+        Args:
+            cache (Optional[EnhancementCache]): Enhancement cache (defaults to the shared process-wide cache)
+        """
         self.gemini_configured = False
+        self.cache = cache or get_enhancement_cache()
+        self.gate = EnhancementGate() if AI_SKIP_GATE else None
         
         # Try to load API key from environment variables
         api_key = os.getenv("GEMINI_API_KEY")
@@ -36,9 +185,10 @@ class AiEnhancementService:
         if GEMINI_AVAILABLE and api_key and api_key != "your_api_key_here":
             try:
                 # Configure the Generative AI library with the API key
-                genai.configure(api_key=api_key)
+                _configure_gemini(api_key)
                 self.gemini_configured = True
-                logger.info("Gemini AI configured successfully")
+                logger.info(f"Gemini AI configured successfully"
+                            f"{f' (endpoint {GEMINI_API_ENDPOINT})' if GEMINI_API_ENDPOINT else ''}")
             except Exception as e:
                 logger.error(f"Failed to configure Gemini AI: {e}")
                 self.gemini_configured = False
@@ -67,7 +217,66 @@ class AiEnhancementService:
         
         # Fall back to mock responses
         return self._get_mock_enhancement(section, content)
-    
+
+    async def enhance_content_async(self, section: str, content: str) -> str:
+        """
+        Async variant of enhance_content that does not block the event loop.
+        Falls back to a mocked response if the call fails or misses its deadline.
+        
+        Args:
+            section (str): The section of the resume (e.g., 'summary', 'experience', 'education')
+            content (str): The original content to enhance
+            
+        Returns:
+            str: The enhanced content
+        """
+        if self.gemini_configured:
+            try:
+                return await self.integrate_gemini_ai_async(section, content)
+            except Exception as e:
+                logger.error(f"Error using Gemini AI: {e!r}")
+                logger.info("Falling back to mock responses")
+        
+        return self._get_mock_enhancement(section, content)
+
+    async def enhance_many_async(self, items: List[Tuple[str, str]], batched: Optional[bool] = None) -> List[str]:
+        """
+        Enhance several pieces of content together, e.g. every section of an "Enhance all" click.
+
+        Identical items are enhanced once and cached items cost no call. The rest go out in one
+        batched prompt when batching is enabled; anything the batch did not return is enhanced
+        per item, concurrently (bounded by AI_MAX_CONCURRENCY).
+
+        Args:
+            items (List[Tuple[str, str]]): (section, content) pairs
+            batched (Optional[bool]): Use one batched model call (defaults to AI_BATCH_ENHANCEMENT)
+
+        Returns:
+            List[str]: The enhanced content, in the order of the items
+        """
+        unique: Dict[Tuple[str, str], FieldPath] = {}
+        for section, content in items:
+            unique.setdefault((section, content), ("items", len(unique)))
+        fields = [(path, section, content) for (section, content), path in unique.items()]
+        results: Dict[str, str] = {}
+
+        if self._use_batch(batched, fields, include_summary=False) and len(fields) > 1:
+            results, _, uncached, _ = await self._prepare_batch_async({}, fields, include_summary=False)
+            if uncached:
+                batch_results, _ = await self._enhance_fields_batched_async(uncached, None)
+                results.update(batch_results)
+
+        remaining = [field for field in fields if field_key(field[0]) not in results]
+        enhanced_values = await asyncio.gather(
+            *(self.enhance_content_async(section, content) for _, section, content in remaining)
+        )
+        for (path, _, _), enhanced in zip(remaining, enhanced_values):
+            results[field_key(path)] = enhanced
+
+        metrics.increment("ai_enhance_many_items_total", len(items), kind="requested")
+        metrics.increment("ai_enhance_many_items_total", len(items) - len(fields), kind="deduplicated")
+        return [results[field_key(unique[(section, content)])] for section, content in items]
+
     def _get_mock_enhancement(self, section: str, content: str) -> str:
         """
         Generate mock enhancements based on the section type.
@@ -113,10 +322,237 @@ class AiEnhancementService:
         
         # Use provided API key if given, otherwise use the one from initialization
         if api_key:
-            genai.configure(api_key=api_key)
+            _configure_gemini(api_key)
+        
+        # Reuse a cached enhancement of the same content if there is one
+        cache_key, cached = self._cache_lookup(section, content)
+        if cached is not None:
+            return cached
+        
+        # Concurrent requests for the same content wait on a single model call
+        return enhancement_flights.do_sync(
+            self._flight_key(section, content, cache_key),
+            lambda: self._generate_enhancement(section, content, cache_key)
+        )
+
+    def _generate_enhancement(self, section: str, content: str, cache_key: Optional[str]) -> str:
+        """Call Gemini for one enhancement, clean the output and cache it"""
+        # Create a section-specific prompt and generate the enhanced content
+        prompt = self._build_enhancement_prompt(section, content)
+        enhanced_text = self._generate(prompt, kind="enhance", max_output_tokens=section_budget(section)[1])
+        
+        # Clean up any markdown or formatting that might be in the response
+        enhanced_text = self._clean_enhanced_text(enhanced_text)
+        self._cache_store(cache_key, enhanced_text)
+        return enhanced_text
+
+    async def integrate_gemini_ai_async(self, section: str, content: str) -> str:
+        """
+        Async variant of integrate_gemini_ai using the SDK's async generation API.
+        
+        Args:
+            section (str): The section of the resume to enhance
+            content (str): The original content to enhance
+            
+        Returns:
+            str: The enhanced content
+        """
+        if not GEMINI_AVAILABLE:
+            raise ImportError("Google Generative AI module not available")
+        
+        cache_key, cached = await self._cache_lookup_async(section, content)
+        if cached is not None:
+            return cached
+        
+        return await enhancement_flights.do(
+            self._flight_key(section, content, cache_key),
+            lambda: self._generate_enhancement_async(section, content, cache_key)
+        )
+
+    async def _generate_enhancement_async(self, section: str, content: str, cache_key: Optional[str]) -> str:
+        """Async variant of _generate_enhancement"""
+        prompt = self._build_enhancement_prompt(section, content)
+        enhanced_text = self._clean_enhanced_text(
+            await self._generate_async(prompt, kind="enhance", max_output_tokens=section_budget(section)[1])
+        )
+        self._cache_store(cache_key, enhanced_text)
+        return enhanced_text
+
+    async def stream_enhancement(self, section: str, content: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Enhance content, yielding the model output as it is generated.
+        
+        Yields ("delta", {"text": ...}) events with raw text chunks, followed by one
+        ("done", {"enhanced_content": ..., "source": ...}) event carrying the final text
+        after the same clean-up as integrate_gemini_ai. Cached and mocked results are
+        sent as a single delta. If the model call fails the final event carries the
+        mock enhancement instead, so clients should always display the final text.
+        
+        Args:
+            section (str): The section of the resume to enhance
+            content (str): The original content to enhance
+            
+        Yields:
+            Tuple[str, Dict[str, Any]]: Event name and payload
+        """
+        if not (GEMINI_AVAILABLE and self.gemini_configured):
+            enhanced_text = self._get_mock_enhancement(section, content)
+            yield "delta", {"text": enhanced_text}
+            yield "done", {"enhanced_content": enhanced_text, "source": "mock"}
+            return
+        
+        cache_key, cached = await self._cache_lookup_async(section, content)
+        if cached is not None:
+            yield "delta", {"text": cached}
+            yield "done", {"enhanced_content": cached, "source": "cache"}
+            return
+        
+        prompt = self._build_enhancement_prompt(section, content)
+        chunks = []
+        stream = self._generate_stream(prompt, kind="enhance_stream", max_output_tokens=section_budget(section)[1])
+        try:
+            async for text in stream:
+                chunks.append(text)
+                yield "delta", {"text": text}
+            enhanced_text = self._clean_enhanced_text("".join(chunks))
+            self._cache_store(cache_key, enhanced_text)
+            source = "gemini"
+        except Exception as e:
+            logger.error(f"Error streaming from Gemini AI: {e!r}")
+            logger.info("Falling back to mock responses")
+            enhanced_text = self._get_mock_enhancement(section, content)
+            source = "mock"
+        finally:
+            # Close the model stream right away if our consumer stopped early
+            await stream.aclose()
+        yield "done", {"enhanced_content": enhanced_text, "source": source}
+
+    async def _generate_stream(self, prompt: str, kind: str, max_output_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Streaming variant of _generate_async, yielding text chunks as they arrive.
+        Opening the stream is rate-limited, retried and circuit-broken like any other
+        call; a stream that fails part-way through is not retried. AI_CALL_TIMEOUT
+        applies to the first chunk and to each gap between chunks.
         
-        # Select the appropriate model (Gemini Pro is good for text generation)
-        model = genai.GenerativeModel('gemini-1.5-pro')
+        Args:
+            prompt (str): The prompt text
+            kind (str): Call type used for metrics
+            max_output_tokens (Optional[int]): Output token limit for the call
+            
+        Yields:
+            str: Raw response text chunks
+        """
+        model = _genai().GenerativeModel(GEMINI_MODEL_NAME)
+        attempt = 0
+        while True:
+            # Fail fast while the circuit is open, before taking a rate-limit token; then pace,
+            # so a rate-limit rejection never claims the half-open probe
+            gemini_breaker.raise_if_open()
+            await gemini_rate_limiter.acquire_async()
+            # The stream may end without an outcome (client gone, generator closed); the
+            # half-open probe is then given up on the way out. A rejected call hands its token back
+            with gemini_breaker.attempt(on_reject=gemini_rate_limiter.refund):
+                async with _get_ai_semaphore():
+                    metrics.increment("gemini_calls_total", kind=kind)
+                    metrics.add_gauge("gemini_call_in_flight", 1, kind=kind)
+                    # Not a context manager: the generator may be closed from another task
+                    call_span = start_span(
+                        "gemini.call", kind="client", **self._call_span_attributes(kind, attempt, prompt, max_output_tokens)
+                    )
+                    start = time.perf_counter()
+                    try:
+                        response = await asyncio.wait_for(
+                            self._start_call(model, prompt, stream=True, max_output_tokens=max_output_tokens),
+                            timeout=AI_CALL_TIMEOUT
+                        )
+                    except Exception as e:
+                        metrics.add_gauge("gemini_call_in_flight", -1, kind=kind)
+                        call_span.record_error(e)
+                        call_span.end()
+                        delay = self._handle_call_error(e, attempt, kind)
+                    else:
+                        metrics.observe("gemini_first_chunk_seconds", time.perf_counter() - start, kind=kind)
+                        call_span.set("gemini.first_chunk_ms", round((time.perf_counter() - start) * 1000, 3))
+                        streamed = []
+                        try:
+                            stream = _iterate_in_thread(iter(response)) if GEMINI_TRANSPORT == "rest" else response.__aiter__()
+                            while True:
+                                try:
+                                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=AI_CALL_TIMEOUT)
+                                except StopAsyncIteration:
+                                    break
+                                streamed.append(chunk.text)
+                                yield chunk.text
+                        except Exception as e:
+                            call_span.record_error(e)
+                            if _is_retryable(e):
+                                gemini_breaker.record_failure()
+                            raise
+                        except (asyncio.CancelledError, GeneratorExit):
+                            # The client went away; the call slot is released on the way out
+                            metrics.increment("gemini_streams_cancelled_total", kind=kind)
+                            call_span.set("gemini.cancelled", True)
+                            raise
+                        finally:
+                            metrics.add_gauge("gemini_call_in_flight", -1, kind=kind)
+                            metrics.observe("gemini_call_seconds", time.perf_counter() - start, kind=kind)
+                            call_span.set_many({"gemini.chunks": len(streamed),
+                                                "gemini.response_chars": sum(len(text) for text in streamed)})
+                            call_span.end()
+                        gemini_breaker.record_success()
+                        self._record_tokens(kind, prompt, "".join(streamed))
+                        return
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _flight_key(section: str, content: str, cache_key: Optional[str]) -> str:
+        """Key identifying identical enhancement requests (the cache key when caching is on)"""
+        return cache_key or EnhancementCache.make_key(section, content, PROMPT_TEMPLATE_VERSION, GEMINI_MODEL_NAME)
+
+    def _cache_lookup(self, section: str, content: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached enhancement for the current prompt version and model.
+        
+        Returns:
+            Tuple[Optional[str], Optional[str]]: The cache key (None if caching is off) and the cached value
+        """
+        key = self._cache_key(section, content)
+        if key is None:
+            return None, None
+        return key, self.cache.get(key)
+
+    async def _cache_lookup_async(self, section: str, content: str) -> Tuple[Optional[str], Optional[str]]:
+        """Async variant of _cache_lookup: a disk lookup runs in a worker thread"""
+        key = self._cache_key(section, content)
+        if key is None:
+            return None, None
+        return key, await self.cache.get_async(key)
+
+    def _cache_key(self, section: str, content: str) -> Optional[str]:
+        """Build the cache key for content under the current prompt version and model (None if caching is off)"""
+        if self.cache is None:
+            return None
+        return EnhancementCache.make_key(section, content, PROMPT_TEMPLATE_VERSION, GEMINI_MODEL_NAME)
+
+    def _cache_store(self, key: Optional[str], value: str) -> None:
+        """Store a model-generated enhancement in the cache (mock results are never cached)"""
+        if self.cache is not None and key is not None and value:
+            self.cache.set(key, value)
+
+    def _build_enhancement_prompt(self, section: str, content: str) -> str:
+        """
+        Build the section-specific prompt used to enhance a single piece of content.
+        Content over the section's input token budget is condensed first.
+        
+        Args:
+            section (str): The section of the resume to enhance
+            content (str): The original content to enhance
+            
+        Returns:
+            str: The prompt text
+        """
+        content = self._budget_input(section, content)
         
         # Create section-specific prompts for better results
         prompts = {
@@ -165,77 +601,676 @@ class AiEnhancementService:
         }
         
         # Use section-specific prompt or default if not found
-        prompt = prompts.get(section.lower(), prompts["default"])
+        return prompts.get(section.lower(), prompts["default"])
+
+    @staticmethod
+    def _clean_enhanced_text(text: str) -> str:
+        """Strip markdown fences and echoed prompt labels from model output"""
+        text = text.strip().replace('```', '')
+        for label in _RESPONSE_LABELS:
+            text = text.replace(label, '')
+        return text.strip()
+
+    def _generate(self, prompt: str, kind: str, max_output_tokens: Optional[int] = None) -> str:
+        """
+        Send a prompt to Gemini and return the raw response text.
+        All model calls go through here. Calls are paced by the shared rate limiter,
+        retried with jittered backoff on retryable errors, and rejected immediately
+        while the circuit breaker is open.
         
-        # Generate the enhanced content
-        response = model.generate_content(prompt)
+        Args:
+            prompt (str): The prompt text
+            kind (str): Call type used for metrics (e.g. 'enhance', 'summary', 'batch')
+            max_output_tokens (Optional[int]): Output token limit for the call
+            
+        Returns:
+            str: The response text
+            
+        Raises:
+            CircuitOpenError: If Gemini is currently considered unhealthy
+            RateLimitExceededError: If no rate-limit capacity frees up within AI_RATE_LIMIT_MAX_WAIT
+        """
+        model = _genai().GenerativeModel(GEMINI_MODEL_NAME)
+        attempt = 0
+        while True:
+            # Fail fast while the circuit is open, before taking a rate-limit token; then pace,
+            # so a rate-limit rejection never claims the half-open probe
+            gemini_breaker.raise_if_open()
+            gemini_rate_limiter.acquire()
+            # A call rejected by the breaker (probe already taken) hands its token back
+            with gemini_breaker.attempt(on_reject=gemini_rate_limiter.refund):
+                try:
+                    metrics.increment("gemini_calls_total", kind=kind)
+                    with metrics.track("gemini_call", kind=kind), span(
+                        "gemini.call", kind="client", **self._call_span_attributes(kind, attempt, prompt, max_output_tokens)
+                    ) as call_span:
+                        response = model.generate_content(prompt, generation_config=self._generation_config(max_output_tokens))
+                        text = response.text
+                        call_span.set("gemini.response_chars", len(text))
+                except Exception as e:
+                    delay = self._handle_call_error(e, attempt, kind)
+                else:
+                    gemini_breaker.record_success()
+                    self._record_tokens(kind, prompt, text)
+                    return text
+            time.sleep(delay)
+            attempt += 1
+
+    async def _generate_async(self, prompt: str, kind: str, max_output_tokens: Optional[int] = None) -> str:
+        """
+        Async variant of _generate.
+        Waits for a slot on the global concurrency semaphore and enforces AI_CALL_TIMEOUT.
         
-        # Extract and return the enhanced text
-        enhanced_text = response.text.strip()
+        Args:
+            prompt (str): The prompt text
+            kind (str): Call type used for metrics (e.g. 'enhance', 'summary', 'batch')
+            max_output_tokens (Optional[int]): Output token limit for the call
+            
+        Returns:
+            str: The response text
+            
+        Raises:
+            asyncio.TimeoutError: If the last attempt does not finish within AI_CALL_TIMEOUT
+            CircuitOpenError: If Gemini is currently considered unhealthy
+            RateLimitExceededError: If no rate-limit capacity frees up within AI_RATE_LIMIT_MAX_WAIT
+        """
+        model = _genai().GenerativeModel(GEMINI_MODEL_NAME)
+        attempt = 0
+        while True:
+            # Fail fast while the circuit is open, before taking a rate-limit token; then pace,
+            # so a rate-limit rejection never claims the half-open probe
+            gemini_breaker.raise_if_open()
+            await gemini_rate_limiter.acquire_async()
+            # A cancelled probe (timeout or client gone) is given up on the way out, and a
+            # call rejected by the breaker hands its token back
+            with gemini_breaker.attempt(on_reject=gemini_rate_limiter.refund):
+                try:
+                    async with _get_ai_semaphore():
+                        metrics.increment("gemini_calls_total", kind=kind)
+                        with metrics.track("gemini_call", kind=kind), span(
+                            "gemini.call", kind="client", **self._call_span_attributes(kind, attempt, prompt, max_output_tokens)
+                        ) as call_span:
+                            response = await asyncio.wait_for(
+                                self._start_call(model, prompt, max_output_tokens=max_output_tokens), timeout=AI_CALL_TIMEOUT
+                            )
+                            text = response.text
+                            call_span.set("gemini.response_chars", len(text))
+                except Exception as e:
+                    delay = self._handle_call_error(e, attempt, kind)
+                else:
+                    gemini_breaker.record_success()
+                    self._record_tokens(kind, prompt, text)
+                    return text
+            # Backoff sleeps happen outside the semaphore so they do not hold a call slot
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @classmethod
+    def _start_call(cls, model: Any, prompt: str, stream: bool = False,
+                    max_output_tokens: Optional[int] = None) -> Awaitable[Any]:
+        """
+        Start an async generation call.
+        The SDK's async client only speaks gRPC, so over REST the blocking call runs in a thread.
+        """
+        generation_config = cls._generation_config(max_output_tokens)
+        if GEMINI_TRANSPORT == "rest":
+            return asyncio.to_thread(model.generate_content, prompt, stream=stream, generation_config=generation_config)
+        return model.generate_content_async(prompt, stream=stream, generation_config=generation_config)
+
+    @staticmethod
+    def _call_span_attributes(kind: str, attempt: int, prompt: str, max_output_tokens: Optional[int]) -> Dict[str, Any]:
+        """Trace attributes of one Gemini call"""
+        return {
+            "gemini.kind": kind,
+            "gemini.model": GEMINI_MODEL_NAME,
+            "gemini.attempt": attempt,
+            "gemini.prompt_chars": len(prompt),
+            "gemini.max_output_tokens": max_output_tokens or 0,
+        }
+
+    @staticmethod
+    def _generation_config(max_output_tokens: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Build the generation config for a call (None keeps the model defaults)"""
+        if not max_output_tokens:
+            return None
+        return {"max_output_tokens": min(max_output_tokens, MAX_OUTPUT_TOKENS)}
+
+    @staticmethod
+    def _record_tokens(kind: str, prompt: str, text: str) -> None:
+        """
+        Export estimated input and output token counts of a finished call.
+        The SDK does not report usage for this API version, so counts are estimated from text length.
+        """
+        metrics.observe("gemini_tokens", estimate_tokens(prompt), kind=kind, direction="input")
+        metrics.observe("gemini_tokens", estimate_tokens(text), kind=kind, direction="output")
+
+    def _budget_input(self, section: str, content: str) -> str:
+        """Condense content that exceeds its section's input token budget"""
+        content, trimmed = condense_text(content, section_budget(section)[0])
+        if trimmed:
+            metrics.increment("ai_inputs_condensed_total", section=section.lower())
+        return content
+
+    @staticmethod
+    def _handle_call_error(error: Exception, attempt: int, kind: str) -> float:
+        """
+        Classify a failed Gemini call and decide whether to retry it.
         
-        # Clean up any markdown or formatting that might be in the response
-        enhanced_text = enhanced_text.replace('```', '').replace('Enhanced description:', '').replace('Enhanced summary:', '').replace('Enhanced skills:', '').replace('Enhanced content:', '').strip()
+        Args:
+            error (Exception): The error raised by the call
+            attempt (int): Zero-based attempt number of the failed call
+            kind (str): Call type used for metrics
+            
+        Returns:
+            float: Seconds to back off before the next attempt
+            
+        Raises:
+            Exception: The original error, if it is not retryable or retries are exhausted
+        """
+        if not _is_retryable(error):
+            # The API answered (e.g. a rejected prompt), so the upstream itself is healthy
+            gemini_breaker.record_success()
+            metrics.increment("gemini_errors_total", kind=kind, retryable="false")
+            raise error
         
-        return enhanced_text
+        gemini_breaker.record_failure()
+        metrics.increment("gemini_errors_total", kind=kind, retryable="true")
+        if attempt >= AI_MAX_RETRIES:
+            raise error
+        
+        delay = backoff_delay(attempt, AI_RETRY_BASE_DELAY, AI_RETRY_MAX_DELAY)
+        metrics.increment("gemini_retries_total", kind=kind)
+        logger.warning(f"Gemini {kind} call failed ({error!r}); retry {attempt + 1}/{AI_MAX_RETRIES} in {delay:.2f}s")
+        return delay
 
-    def enhance_entire_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _collect_enhanceable_fields(self, resume_data: Dict[str, Any]) -> List[Tuple[FieldPath, str, str]]:
+        """
+        List every field of a resume that AI enhancement applies to.
+        
+        Args:
+            resume_data (Dict[str, Any]): The parsed resume data
+            
+        Returns:
+            List[Tuple[FieldPath, str, str]]: (field path, section, original content) in resume order
+        """
+        fields = []
+        
+        summary = (resume_data.get("personal_info") or {}).get("summary")
+        if summary:
+            fields.append((("personal_info", "summary"), "summary", summary))
+        
+        for i, exp in enumerate(resume_data.get("experience") or []):
+            if exp.get("description"):
+                fields.append((("experience", i, "description"), "experience", exp["description"]))
+            if isinstance(exp.get("achievements"), list):
+                for j, achievement in enumerate(exp["achievements"]):
+                    fields.append((("experience", i, "achievements", j), "experience", achievement))
+        
+        for i, edu in enumerate(resume_data.get("education") or []):
+            if edu.get("description"):
+                fields.append((("education", i, "description"), "education", edu["description"]))
+        
+        return fields
+
+    @staticmethod
+    def _set_field(resume_data: Dict[str, Any], path: FieldPath, value: str) -> None:
+        """Set the value of a field inside the resume"""
+        target = resume_data
+        for part in path[:-1]:
+            target = target[part]
+        target[path[-1]] = value
+
+    def enhance_entire_resume(self, resume_data: Dict[str, Any], batched: Optional[bool] = None,
+                              previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Enhance an entire resume using Gemini AI
         
         Args:
             resume_data (Dict[str, Any]): The parsed resume data
+            batched (Optional[bool]): Enhance all fields in one model call (defaults to AI_BATCH_ENHANCEMENT)
+            previous (Optional[Dict[str, Any]]): The stored, already enhanced version of this resume.
+                Fields unchanged since then keep their enhancement and only new or edited fields are enhanced
             
         Returns:
             Dict[str, Any]: The enhanced resume data
         """
-        enhanced_resume = resume_data.copy()
+        enhanced_resume, _ = self._enhance_resume(resume_data, batched, include_summary=False, previous=previous)
+        return enhanced_resume
+
+    def enhance_resume_with_summary(self, resume_data: Dict[str, Any], batched: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Enhance an entire resume and replace its summary with a newly generated one.
+        In batched mode this is a single model call for the whole resume.
+        
+        Args:
+            resume_data (Dict[str, Any]): The parsed resume data
+            batched (Optional[bool]): Use one model call for everything (defaults to AI_BATCH_ENHANCEMENT)
+            
+        Returns:
+            Dict[str, Any]: The enhanced resume data with the improved summary
+        """
+        enhanced_resume, improved_summary = self._enhance_resume(resume_data, batched, include_summary=True)
+        if improved_summary is None:
+            improved_summary = self.generate_improved_summary(enhanced_resume)
+        if improved_summary:
+            enhanced_resume.setdefault("personal_info", {})["summary"] = improved_summary
+        return enhanced_resume
+
+    @metrics.tracked("pipeline_stage", stage="enhance_resume")
+    @traced("pipeline.enhance_resume", attributes=_enhance_span_attributes, result=_enhanced_span_attributes)
+    def _enhance_resume(self, resume_data: Dict[str, Any], batched: Optional[bool], include_summary: bool,
+                        previous: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Enhance all fields of a resume, optionally generating the improved summary in the same batch.
+        
+        Returns:
+            Tuple[Dict[str, Any], Optional[str]]: The enhanced resume and the improved summary
+            (None if it was not generated as part of the batch)
+        """
+        enhanced_resume = copy.deepcopy(resume_data)
+        improved_summary = None
         
         try:
-            # Enhance personal info summary if available
-            if "personal_info" in enhanced_resume and "summary" in enhanced_resume["personal_info"]:
-                if enhanced_resume["personal_info"]["summary"]:
-                    enhanced_resume["personal_info"]["summary"] = self.enhance_content(
-                        "summary", enhanced_resume["personal_info"]["summary"]
-                    )
+            all_fields = self._fields_to_enhance(enhanced_resume, include_summary)
+            plan = self._plan_fields(all_fields, self._unchanged_fields(enhanced_resume, all_fields, previous))
+            fields = plan.to_enhance
+            results: Dict[str, str] = {}
             
-            # Enhance experience descriptions
-            if "experience" in enhanced_resume:
-                for i, exp in enumerate(enhanced_resume["experience"]):
-                    if "description" in exp and exp["description"]:
-                        enhanced_resume["experience"][i]["description"] = self.enhance_content(
-                            "experience", exp["description"]
-                        )
-                    
-                    # Enhance achievements if present
-                    if "achievements" in exp and isinstance(exp["achievements"], list):
-                        enhanced_achievements = []
-                        for achievement in exp["achievements"]:
-                            enhanced_achievement = self.enhance_content("experience", achievement)
-                            enhanced_achievements.append(enhanced_achievement)
-                        enhanced_resume["experience"][i]["achievements"] = enhanced_achievements
-            
-            # Enhance education descriptions
-            if "education" in enhanced_resume:
-                for i, edu in enumerate(enhanced_resume["education"]):
-                    if "description" in edu and edu["description"]:
-                        enhanced_resume["education"][i]["description"] = self.enhance_content(
-                            "education", edu["description"]
-                        )
+            if self._use_batch(batched, fields, include_summary):
+                results, improved_summary, uncached, summary_context = self._prepare_batch(
+                    enhanced_resume, fields, include_summary
+                )
+                if uncached or summary_context is not None:
+                    batch_results, batch_summary = self._enhance_fields_batched(uncached, summary_context)
+                    results.update(batch_results)
+                    improved_summary = improved_summary or batch_summary
             
-            # Add AI enhancement metadata
-            enhanced_resume["ai_enhanced"] = True
-            enhanced_resume["enhancement_timestamp"] = str(datetime.now())
+            # Anything the batch did not return (or unbatched mode) is enhanced field by field
+            for path, section, content in fields:
+                if field_key(path) not in results:
+                    results[field_key(path)] = self.enhance_content(section, content)
             
-            logger.info("Successfully enhanced entire resume with AI")
-            return enhanced_resume
+            self._apply_results(enhanced_resume, all_fields, plan, results)
+            return self._mark_enhanced(enhanced_resume, plan), improved_summary
             
         except Exception as e:
             logger.error(f"Error enhancing resume: {e}")
-            # Return original resume if enhancement fails
-            enhanced_resume["ai_enhanced"] = False
-            enhanced_resume["enhancement_error"] = str(e)
-            return enhanced_resume
+            return self._mark_enhancement_failed(resume_data, e), None
+
+    async def enhance_entire_resume_async(self, resume_data: Dict[str, Any], batched: Optional[bool] = None,
+                                          previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Async variant of enhance_entire_resume.
+        In per-field mode all fields are enhanced concurrently (bounded by AI_MAX_CONCURRENCY).
+        
+        Args:
+            resume_data (Dict[str, Any]): The parsed resume data
+            batched (Optional[bool]): Enhance all fields in one model call (defaults to AI_BATCH_ENHANCEMENT)
+            previous (Optional[Dict[str, Any]]): The stored, already enhanced version of this resume
+                (see enhance_entire_resume)
+            
+        Returns:
+            Dict[str, Any]: The enhanced resume data
+        """
+        enhanced_resume, _ = await self._enhance_resume_async(
+            resume_data, batched, include_summary=False, previous=previous
+        )
+        return enhanced_resume
+
+    async def enhance_resume_with_summary_async(self, resume_data: Dict[str, Any],
+                                                batched: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Async variant of enhance_resume_with_summary.
+        
+        Args:
+            resume_data (Dict[str, Any]): The parsed resume data
+            batched (Optional[bool]): Use one model call for everything (defaults to AI_BATCH_ENHANCEMENT)
+            
+        Returns:
+            Dict[str, Any]: The enhanced resume data with the improved summary
+        """
+        enhanced_resume, improved_summary = await self._enhance_resume_async(resume_data, batched, include_summary=True)
+        if improved_summary is None:
+            improved_summary = await self.generate_improved_summary_async(enhanced_resume)
+        if improved_summary:
+            enhanced_resume.setdefault("personal_info", {})["summary"] = improved_summary
+        return enhanced_resume
+
+    @metrics.tracked("pipeline_stage", stage="enhance_resume")
+    @traced("pipeline.enhance_resume", attributes=_enhance_span_attributes, result=_enhanced_span_attributes)
+    async def _enhance_resume_async(self, resume_data: Dict[str, Any], batched: Optional[bool], include_summary: bool,
+                                    previous: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Async variant of _enhance_resume.
+        Fields the batch did not cover are enhanced concurrently; results keep their field order.
+        """
+        enhanced_resume = copy.deepcopy(resume_data)
+        improved_summary = None
+        
+        try:
+            all_fields = self._fields_to_enhance(enhanced_resume, include_summary)
+            plan = self._plan_fields(all_fields, self._unchanged_fields(enhanced_resume, all_fields, previous))
+            fields = plan.to_enhance
+            results: Dict[str, str] = {}
+            
+            if self._use_batch(batched, fields, include_summary):
+                results, improved_summary, uncached, summary_context = await self._prepare_batch_async(
+                    enhanced_resume, fields, include_summary
+                )
+                if uncached or summary_context is not None:
+                    batch_results, batch_summary = await self._enhance_fields_batched_async(uncached, summary_context)
+                    results.update(batch_results)
+                    improved_summary = improved_summary or batch_summary
+            
+            remaining = [field for field in fields if field_key(field[0]) not in results]
+            enhanced_values = await asyncio.gather(
+                *(self.enhance_content_async(section, content) for _, section, content in remaining)
+            )
+            for (path, _, _), enhanced in zip(remaining, enhanced_values):
+                results[field_key(path)] = enhanced
+            
+            self._apply_results(enhanced_resume, all_fields, plan, results)
+            return self._mark_enhanced(enhanced_resume, plan), improved_summary
+            
+        except Exception as e:
+            logger.error(f"Error enhancing resume: {e}")
+            return self._mark_enhancement_failed(resume_data, e), None
+
+    def _fields_to_enhance(self, resume_data: Dict[str, Any], include_summary: bool) -> List[Tuple[FieldPath, str, str]]:
+        """Collect the fields to enhance, leaving out the summary when a new one will be generated"""
+        fields = self._collect_enhanceable_fields(resume_data)
+        if include_summary:
+            # The existing summary is replaced by the generated one, so don't spend a call on it
+            fields = [field for field in fields if field[0] != ("personal_info", "summary")]
+        return fields
+
+    @staticmethod
+    def _unchanged_fields(resume_data: Dict[str, Any], fields: List[Tuple[FieldPath, str, str]],
+                          previous: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Find the fields that are identical to a field of the previous enhanced version of the resume.
+        
+        Fields are matched by content rather than position, so a bullet that moved because
+        another was inserted or removed above it still counts as unchanged.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Provenance of each unchanged field by field key, carried over
+            from the field it matched in the previous version (empty if there is no previous
+            enhanced version)
+        """
+        if not previous or not previous.get("ai_enhanced"):
+            return {}
+        
+        matches = match_fields(previous, resume_data)
+        changes = ResumeStorageService.diff_fields(previous, resume_data)
+        provenance = previous.get("enhancement_provenance") or {}
+        # Versions saved before provenance was recorded only carry the resume-level timestamp
+        fallback = {"source": "previous_version", "at": previous.get("enhancement_timestamp")}
+        
+        unchanged = {}
+        for path, section, _ in fields:
+            key = field_key(path)
+            metrics.increment("ai_incremental_fields_total", status=changes.get(key, "unchanged"), section=section)
+            if key in matches:
+                unchanged[key] = provenance.get(matches[key], fallback)
+        return unchanged
+
+    def _plan_fields(self, fields: List[Tuple[FieldPath, str, str]],
+                     unchanged: Optional[Dict[str, Dict[str, Any]]] = None) -> GatePlan:
+        """Run the skip-gate over the new or changed fields (all of them are enhanced when the gate is off)"""
+        unchanged = unchanged or {}
+        changed = [field for field in fields if field_key(field[0]) not in unchanged]
+        if self.gate is not None:
+            plan = self.gate.plan(changed, field_key)
+        else:
+            plan = GatePlan()
+            plan.to_enhance = changed
+        plan.carried = unchanged
+        return plan
+
+    def _apply_results(
+        self,
+        enhanced_resume: Dict[str, Any],
+        fields: List[Tuple[FieldPath, str, str]],
+        plan: GatePlan,
+        results: Dict[str, str],
+    ) -> None:
+        """Write enhanced and reused values into the resume; fields the gate kept stay untouched"""
+        plan.apply_reuse(results)
+        for path, _, _ in fields:
+            enhanced = results.get(field_key(path))
+            if enhanced is not None:
+                self._set_field(enhanced_resume, path, enhanced)
+
+    def _batch_cache_keys(self, resume_data: Dict[str, Any], fields: List[Tuple[FieldPath, str, str]],
+                          include_summary: bool) -> Tuple[List[Optional[str]], Optional[str], Optional[str]]:
+        """
+        Build the cache keys a batched call looks up.
+        
+        Returns:
+            Tuple: The cache key of each field (None if caching is off), the summary context
+            (None if no summary is needed) and its cache key
+        """
+        keys = [self._cache_key(section, content) for _, section, content in fields]
+        summary_context = self._build_summary_context(resume_data) if include_summary else None
+        summary_key = self._cache_key(SUMMARY_CACHE_SECTION, summary_context) if summary_context is not None else None
+        return keys, summary_context, summary_key
+    
+    @staticmethod
+    def _split_cached(fields: List[Tuple[FieldPath, str, str]], keys: List[Optional[str]],
+                      summary_context: Optional[str], summary_key: Optional[str],
+                      cached: Dict[str, str]) -> Tuple[Dict[str, str], Optional[str], List[Tuple[FieldPath, str, str]], Optional[str]]:
+        """Split a batch into cached results and the fields (and summary) still to request"""
+        results: Dict[str, str] = {}
+        uncached = []
+        for field, key in zip(fields, keys):
+            if key in cached:
+                results[field_key(field[0])] = cached[key]
+            else:
+                uncached.append(field)
+        
+        improved_summary = cached.get(summary_key) if summary_key is not None else None
+        if improved_summary is not None:
+            summary_context = None
+        return results, improved_summary, uncached, summary_context
     
+    def _prepare_batch(self, resume_data: Dict[str, Any], fields: List[Tuple[FieldPath, str, str]],
+                       include_summary: bool) -> Tuple[Dict[str, str], Optional[str], List[Tuple[FieldPath, str, str]], Optional[str]]:
+        """
+        Resolve what can be served from the cache before a batched call, with one disk lookup.
+        
+        Returns:
+            Tuple: Cached results by field key, the cached summary (or None), the fields still
+            to enhance, and the summary context to send (None if no summary is needed)
+        """
+        keys, summary_context, summary_key = self._batch_cache_keys(resume_data, fields, include_summary)
+        lookup = [key for key in keys + [summary_key] if key is not None]
+        cached = self.cache.get_many(lookup) if lookup else {}
+        return self._split_cached(fields, keys, summary_context, summary_key, cached)
+    
+    async def _prepare_batch_async(self, resume_data: Dict[str, Any], fields: List[Tuple[FieldPath, str, str]],
+                                   include_summary: bool) -> Tuple[Dict[str, str], Optional[str], List[Tuple[FieldPath, str, str]], Optional[str]]:
+        """Async variant of _prepare_batch: the disk lookup runs in a worker thread"""
+        keys, summary_context, summary_key = self._batch_cache_keys(resume_data, fields, include_summary)
+        lookup = [key for key in keys + [summary_key] if key is not None]
+        cached = await self.cache.get_many_async(lookup) if lookup else {}
+        return self._split_cached(fields, keys, summary_context, summary_key, cached)
+
+    def _use_batch(self, batched: Optional[bool], fields: List[Tuple[FieldPath, str, str]], include_summary: bool) -> bool:
+        """Decide whether a resume is enhanced with one batched model call"""
+        if batched is None:
+            batched = BATCH_ENHANCEMENT
+        return bool(batched and self.gemini_configured and (fields or include_summary))
+
+    @staticmethod
+    def _mark_enhanced(enhanced_resume: Dict[str, Any], plan: GatePlan) -> Dict[str, Any]:
+        """Add AI enhancement metadata to a successfully enhanced resume"""
+        enhanced_resume["ai_enhanced"] = True
+        enhanced_resume["enhancement_timestamp"] = str(datetime.now())
+        enhanced_resume["enhancement_gate"] = plan.summary()
+        enhanced_resume["enhancement_provenance"] = plan.provenance(enhanced_resume["enhancement_timestamp"], field_key)
+        
+        logger.info("Successfully enhanced entire resume with AI")
+        return enhanced_resume
+
+    @staticmethod
+    def _mark_enhancement_failed(resume_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """Return the original resume, flagged as not enhanced"""
+        resume = copy.deepcopy(resume_data)
+        resume["ai_enhanced"] = False
+        resume["enhancement_error"] = str(error)
+        return resume
+
+    def _build_batch_prompt(self, fields: List[Tuple[FieldPath, str, str]], summary_context: Optional[str]) -> str:
+        """
+        Build one structured prompt covering every field to enhance.
+        
+        Args:
+            fields (List[Tuple[FieldPath, str, str]]): (field path, section, original content)
+            summary_context (Optional[str]): Resume context for generating a new summary, if wanted
+            
+        Returns:
+            str: The prompt text
+        """
+        payload = {
+            "fields": {field_key(path): {"section": section, "content": self._budget_input(section, content)}
+                       for path, section, content in fields}
+        }
+        summary_instruction = ""
+        if summary_context is not None:
+            payload["summary_context"] = summary_context
+            summary_instruction = """
+                Also write a new "summary": a compelling 3-4 sentence professional summary based on
+                "summary_context" that highlights key achievements, skills and career progression, uses
+                strong action words and focuses on value proposition.
+            """
+        
+        return f"""
+                You are a professional resume writer. Enhance each resume field below. For each field, follow
+                the guidance for its section:
+                - summary: more impactful, showcasing achievements and skills, concise, concrete metrics where possible
+                - experience: focus on achievements and impact with strong action verbs and quantifiable results, concise
+                - education: highlight academic achievements, relevant coursework, or projects that demonstrate skills
+                - other sections: more impactful, professional and achievement-oriented
+                Keep every field professional. Don't add fictional details.
+                {summary_instruction}
+                Respond with a single JSON object and nothing else, in the form
+                {{"fields": {{"<field key>": "<enhanced text>", ...}}{', "summary": "<new summary>"' if summary_context is not None else ''}}}
+                using exactly the field keys given in the input.
+                
+                Input:
+                {json.dumps(payload, ensure_ascii=False)}
+            """
+
+    @staticmethod
+    def _batch_output_budget(fields: List[Tuple[FieldPath, str, str]], summary_context: Optional[str]) -> int:
+        """Output token budget of a batch prompt: each field's section budget, the summary's, and JSON overhead"""
+        budget = sum(section_budget(section)[1] + 16 for _, section, _ in fields) + 16
+        if summary_context is not None:
+            budget += section_budget(SUMMARY_CACHE_SECTION)[1]
+        return budget
+
+    @staticmethod
+    def _parse_batch_response(text: str) -> Dict[str, Any]:
+        """
+        Parse the JSON object returned for a batch prompt.
+        Tolerates markdown code fences and text around the object.
+        
+        Raises:
+            ValueError: If no JSON object can be parsed
+        """
+        text = re.sub(r"^\s*```(?:json)?|```\s*$", "", text.strip())
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end <= start:
+            raise ValueError("No JSON object in batch response")
+        data = json.loads(text[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("Batch response is not a JSON object")
+        return data
+
+    def _enhance_fields_batched(self, fields: List[Tuple[FieldPath, str, str]],
+                                summary_context: Optional[str]) -> Tuple[Dict[str, str], Optional[str]]:
+        """
+        Enhance many fields (and optionally generate a summary) with a single model call.
+        
+        Args:
+            fields (List[Tuple[FieldPath, str, str]]): (field path, section, original content)
+            summary_context (Optional[str]): Resume context for generating a new summary, if wanted
+            
+        Returns:
+            Tuple[Dict[str, str], Optional[str]]: Enhanced text by field key, for the fields that came
+            back well-formed, and the generated summary (None if missing or malformed)
+        """
+        try:
+            prompt = self._build_batch_prompt(fields, summary_context)
+            response_text = self._generate(
+                prompt, kind="batch", max_output_tokens=self._batch_output_budget(fields, summary_context)
+            )
+        except Exception as e:
+            logger.error(f"Batched enhancement failed, falling back to per-field calls: {e}")
+            metrics.increment("ai_batch_fallbacks_total", reason="call_failed")
+            return {}, None
+        
+        return self._read_batch_response(fields, response_text, summary_context)
+
+    async def _enhance_fields_batched_async(self, fields: List[Tuple[FieldPath, str, str]],
+                                            summary_context: Optional[str]) -> Tuple[Dict[str, str], Optional[str]]:
+        """Async variant of _enhance_fields_batched"""
+        try:
+            prompt = self._build_batch_prompt(fields, summary_context)
+            response_text = await self._generate_async(
+                prompt, kind="batch", max_output_tokens=self._batch_output_budget(fields, summary_context)
+            )
+        except Exception as e:
+            logger.error(f"Batched enhancement failed, falling back to per-field calls: {e!r}")
+            metrics.increment("ai_batch_fallbacks_total", reason="call_failed")
+            return {}, None
+        
+        return self._read_batch_response(fields, response_text, summary_context)
+
+    def _read_batch_response(self, fields: List[Tuple[FieldPath, str, str]], response_text: str,
+                             summary_context: Optional[str] = None) -> Tuple[Dict[str, str], Optional[str]]:
+        """
+        Map a batch response back to field keys.
+        
+        Returns:
+            Tuple[Dict[str, str], Optional[str]]: Enhanced text by field key, for the fields that came
+            back well-formed, and the generated summary (None if missing or malformed)
+        """
+        try:
+            data = self._parse_batch_response(response_text)
+        except ValueError as e:
+            logger.error(f"Malformed batch response, falling back to per-field calls: {e}")
+            metrics.increment("ai_batch_fallbacks_total", reason="malformed_response")
+            return {}, None
+        
+        returned = data.get("fields") if isinstance(data.get("fields"), dict) else {}
+        results = {}
+        for path, section, content in fields:
+            key = field_key(path)
+            value = returned.get(key)
+            if isinstance(value, str) and value.strip():
+                results[key] = self._clean_enhanced_text(value)
+                self._cache_store(self._cache_key(section, content), results[key])
+            else:
+                metrics.increment("ai_batch_fallbacks_total", reason="malformed_field")
+        
+        summary = data.get("summary")
+        if isinstance(summary, str) and summary.strip():
+            summary = summary.replace('Professional Summary:', '').strip()
+            if summary_context is not None:
+                self._cache_store(self._cache_key(SUMMARY_CACHE_SECTION, summary_context), summary)
+        else:
+            summary = None
+        
+        if len(results) < len(fields):
+            logger.warning(f"Batched enhancement returned {len(results)} of {len(fields)} fields; "
+                           f"enhancing the rest individually")
+        return results, summary
+    
+    @metrics.tracked("pipeline_stage", stage="generate_summary")
+    @traced("pipeline.generate_summary", result=lambda summary: {"output_chars": len(summary or "")})
     def generate_improved_summary(self, resume_data: Dict[str, Any]) -> str:
         """
         Generate an improved professional summary based on the entire resume
@@ -250,50 +1285,105 @@ class AiEnhancementService:
             return self._generate_mock_summary(resume_data)
         
         try:
-            # Extract key information from resume
-            name = resume_data.get("personal_info", {}).get("name", "Professional")
-            experience = resume_data.get("experience", [])
-            education = resume_data.get("education", [])
-            skills = resume_data.get("skills", [])
-            
-            # Build context for AI
-            context = f"Resume for {name}.\n"
-            
-            if experience:
-                context += "Experience:\n"
-                for exp in experience[:3]:  # Top 3 experiences
-                    context += f"- {exp.get('position', '')} at {exp.get('company', '')}\n"
-            
-            if education:
-                context += "Education:\n"
-                for edu in education[:2]:  # Top 2 education entries
-                    context += f"- {edu.get('degree', '')} from {edu.get('institution', '')}\n"
-            
-            if skills:
-                skill_names = [skill.get("name", "") for skill in skills[:10]]  # Top 10 skills
-                context += f"Key skills: {', '.join(skill_names)}\n"
-            
-            prompt = f"""
-                You are a professional resume writer. Based on the following resume information, 
-                create a compelling professional summary that highlights key achievements, skills, and career progression.
-                The summary should be 3-4 sentences long, use strong action words, and focus on value proposition.
-                
-                {context}
-                
-                Professional Summary:
-            """
+            context = self._build_summary_context(resume_data)
+            cache_key, cached = self._cache_lookup(SUMMARY_CACHE_SECTION, context)
+            if cached is not None:
+                return cached
             
-            model = genai.GenerativeModel('gemini-1.5-pro')
-            response = model.generate_content(prompt)
-            
-            summary = response.text.strip()
+            prompt = self._build_summary_prompt(context)
+            summary = self._generate(
+                prompt, kind="summary", max_output_tokens=section_budget(SUMMARY_CACHE_SECTION)[1]
+            ).strip()
             summary = summary.replace('Professional Summary:', '').strip()
             
+            self._cache_store(cache_key, summary)
             return summary
             
         except Exception as e:
             logger.error(f"Error generating improved summary: {e}")
             return self._generate_mock_summary(resume_data)
+
+    @metrics.tracked("pipeline_stage", stage="generate_summary")
+    @traced("pipeline.generate_summary", result=lambda summary: {"output_chars": len(summary or "")})
+    async def generate_improved_summary_async(self, resume_data: Dict[str, Any]) -> str:
+        """
+        Async variant of generate_improved_summary.
+        
+        Args:
+            resume_data (Dict[str, Any]): The complete resume data
+            
+        Returns:
+            str: An improved professional summary
+        """
+        if not self.gemini_configured:
+            return self._generate_mock_summary(resume_data)
+        
+        try:
+            context = self._build_summary_context(resume_data)
+            cache_key, cached = await self._cache_lookup_async(SUMMARY_CACHE_SECTION, context)
+            if cached is not None:
+                return cached
+            
+            prompt = self._build_summary_prompt(context)
+            summary = (await self._generate_async(
+                prompt, kind="summary", max_output_tokens=section_budget(SUMMARY_CACHE_SECTION)[1]
+            )).strip()
+            summary = summary.replace('Professional Summary:', '').strip()
+            
+            self._cache_store(cache_key, summary)
+            return summary
+        except Exception as e:
+            logger.error(f"Error generating improved summary: {e!r}")
+            return self._generate_mock_summary(resume_data)
+
+    def _build_summary_context(self, resume_data: Dict[str, Any]) -> str:
+        """
+        Build the resume context used to generate an improved summary.
+        
+        Args:
+            resume_data (Dict[str, Any]): The complete resume data
+            
+        Returns:
+            str: Key facts from the resume (top experiences, education and skills),
+            condensed to the summary input token budget
+        """
+        # Extract key information from resume
+        name = resume_data.get("personal_info", {}).get("name", "Professional")
+        experience = resume_data.get("experience", [])
+        education = resume_data.get("education", [])
+        skills = resume_data.get("skills", [])
+        
+        # Build context for AI
+        context = f"Resume for {name}.\n"
+        
+        if experience:
+            context += "Experience:\n"
+            for exp in experience[:3]:  # Top 3 experiences
+                context += f"- {exp.get('position', '')} at {exp.get('company', '')}\n"
+        
+        if education:
+            context += "Education:\n"
+            for edu in education[:2]:  # Top 2 education entries
+                context += f"- {edu.get('degree', '')} from {edu.get('institution', '')}\n"
+        
+        if skills:
+            skill_names = [skill.get("name", "") for skill in skills[:10]]  # Top 10 skills
+            context += f"Key skills: {', '.join(skill_names)}\n"
+        
+        return self._budget_input(SUMMARY_CACHE_SECTION, context)
+
+    @staticmethod
+    def _build_summary_prompt(context: str) -> str:
+        """Build the prompt used to generate an improved summary from resume context"""
+        return f"""
+                You are a professional resume writer. Based on the following resume information, 
+                create a compelling professional summary that highlights key achievements, skills, and career progression.
+                The summary should be 3-4 sentences long, use strong action words, and focus on value proposition.
+                
+                {context}
+                
+                Professional Summary:
+            """
     
     def _generate_mock_summary(self, resume_data: Dict[str, Any]) -> str:
         """Generate a mock improved summary when AI is not available"""
@@ -0,0 +1,293 @@
+"""
+Service for processing many uploaded resumes through a concurrent, staged pipeline
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+
+from .ai_service import AiEnhancementService
+from .resume_parser_service import ResumeParserService
+from .storage_service import ResumeStorageService
+from ..utils.metrics import metrics
+from ..utils.profiling import current_session, profiled, raw_stats
+from ..utils.tracing import SpanContext, collecting_spans, current_context, record_spans
+from ..utils.upload_spool import SpooledUpload
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Worker processes for text extraction and parsing (CPU-bound)
+EXTRACT_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+
+# Resumes enhanced with AI at the same time (I/O-bound)
+AI_CONCURRENCY = int(os.getenv("BATCH_AI_CONCURRENCY", "8"))
+
+# Most resumes handed to the storage writer thread at once (written in one pass, still one file each)
+STORAGE_BATCH_SIZE = int(os.getenv("BATCH_STORAGE_BATCH_SIZE", "25"))
+
+# Maximum number of files accepted by a single batch request
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "500"))
+
+# Sentinel marking the end of a stage's input
+_DONE = object()
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_extraction_worker() -> None:
+    """
+    Start a pool worker with an empty metrics registry.
+
+    Forked workers inherit a copy of the parent's registry; without clearing it, the
+    first drain would ship those counts back and merge would add them a second time.
+    """
+    metrics.reset()
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool used for text extraction, creating it on first use"""
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, initializer=_init_extraction_worker)
+    return _extraction_pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Shut the shared extraction pool down, cancelling extractions that have not started"""
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=True, cancel_futures=True)
+        _extraction_pool = None
+
+
+def extract_resume(path: str, filename: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Extract and parse one spooled resume. Runs in a worker process.
+
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: Parsed resume data and the full extracted text
+    """
+    return ResumeParserService().parse_resume_path(path, filename)
+
+
+def _extract_in_worker(path: str, filename: str, profile: bool = False,
+                       trace: Optional[SpanContext] = None) -> Dict[str, Any]:
+    """Run extract_resume in a pool worker, shipping back the metrics, spans and profile recorded there"""
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    with collecting_spans(trace) as spans:
+        try:
+            result, error = extract_resume(path, filename), None
+        except Exception as e:
+            result, error = None, e
+    return {
+        "result": result,
+        "error": error,
+        "metrics": metrics.drain(),
+        "spans": spans,
+        "profile": raw_stats(profiler) if profiler is not None else None,
+    }
+
+
+async def run_extraction(pool: Optional[ProcessPoolExecutor], path: str,
+                         filename: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Extract and parse one spooled resume in the process pool.
+
+    Metrics recorded in the worker process (extraction and parsing stage timings,
+    extractor counters) are merged into this process's registry, and its trace
+    spans continue the caller's trace. When the calling request is being profiled,
+    the worker profiles the task and its stats are merged into the request's profile.
+
+    Returns:
+        Tuple[Dict[str, Any], Optional[str]]: Parsed resume data and the full extracted text
+    """
+    loop = asyncio.get_running_loop()
+    session = current_session()
+    shipped = await loop.run_in_executor(
+        pool, _extract_in_worker, path, filename, session is not None, current_context()
+    )
+    metrics.merge(shipped["metrics"])
+    record_spans(shipped["spans"])
+    if shipped["profile"] is not None:
+        session.add(shipped["profile"])
+    if shipped["error"] is not None:
+        raise shipped["error"]
+    return shipped["result"]
+
+
+class BatchUploadPipeline:
+    """
+    Pipeline that runs extract -> parse -> enhance -> summarize -> save for many resumes.
+
+    Each stage has its own bounded concurrency: extraction runs in a process pool,
+    AI enhancement fans out over async workers, and a single writer hands the
+    resumes that are ready to a worker thread in groups, saving each group in one
+    pass (one thread hop and one timestamp per group; every resume is still its own file). Stages are connected by bounded queues so a
+    slow stage applies backpressure instead of buffering every resume in memory.
+    """
+
+    def __init__(
+        self,
+        ai_service: AiEnhancementService,
+        storage_service: ResumeStorageService,
+        extraction_pool: Optional[ProcessPoolExecutor] = None,
+        extract_concurrency: int = EXTRACT_WORKERS,
+        ai_concurrency: int = AI_CONCURRENCY,
+        storage_batch_size: int = STORAGE_BATCH_SIZE,
+    ):
+        self.ai_service = ai_service
+        self.storage_service = storage_service
+        self.extraction_pool = extraction_pool or get_extraction_pool()
+        self.extract_concurrency = max(1, extract_concurrency)
+        self.ai_concurrency = max(1, ai_concurrency)
+        self.storage_batch_size = max(1, storage_batch_size)
+
+    async def run(self, uploads: List[Tuple[int, SpooledUpload]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process spooled uploads and yield one result per file as soon as it completes.
+
+        Args:
+            uploads (List[Tuple[int, SpooledUpload]]): (index, spooled file) pairs
+
+        Yields:
+            Dict[str, Any]: Per-file result with index, filename, status and resume id or error
+        """
+        if not uploads:
+            return
+
+        extract_queue: asyncio.Queue = asyncio.Queue()
+        ai_queue: asyncio.Queue = asyncio.Queue(maxsize=self.ai_concurrency * 2)
+        storage_queue: asyncio.Queue = asyncio.Queue(maxsize=self.storage_batch_size * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        for item in uploads:
+            extract_queue.put_nowait(item)
+
+        extractors = [asyncio.create_task(self._extract_worker(extract_queue, ai_queue, results))
+                      for _ in range(self.extract_concurrency)]
+        enhancers = [asyncio.create_task(self._enhance_worker(ai_queue, storage_queue, results))
+                     for _ in range(self.ai_concurrency)]
+        writer = asyncio.create_task(self._storage_writer(storage_queue, results))
+
+        async def close_stages():
+            # Signal each stage to stop once the previous one has drained
+            for _ in extractors:
+                await extract_queue.put(_DONE)
+            await asyncio.gather(*extractors)
+            for _ in enhancers:
+                await ai_queue.put(_DONE)
+            await asyncio.gather(*enhancers)
+            await storage_queue.put(_DONE)
+            await writer
+
+        closer = asyncio.create_task(close_stages())
+        try:
+            for _ in range(len(uploads)):
+                yield await results.get()
+            await closer
+        finally:
+            for task in [*extractors, *enhancers, writer, closer]:
+                task.cancel()
+
+    async def _extract_worker(self, inbox: asyncio.Queue, outbox: asyncio.Queue, results: asyncio.Queue) -> None:
+        """Extract and parse files in the process pool"""
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            index, spooled = item
+            start = time.perf_counter()
+            try:
+                parsed, text = await run_extraction(self.extraction_pool, spooled.path, spooled.filename)
+            except Exception as e:
+                logger.error(f"Extraction failed for {spooled.filename}: {e}")
+                await results.put(self._error_result(index, spooled, "extract", e))
+                continue
+            timings = {"extract": round(time.perf_counter() - start, 4)}
+            await outbox.put((index, spooled, parsed, text, timings))
+
+    async def _enhance_worker(self, inbox: asyncio.Queue, outbox: asyncio.Queue, results: asyncio.Queue) -> None:
+        """Enhance parsed resumes and generate their summaries"""
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            index, spooled, parsed, text, timings = item
+            start = time.perf_counter()
+            try:
+                enhanced = await self.ai_service.enhance_resume_with_summary_async(parsed)
+            except Exception as e:
+                logger.error(f"Enhancement failed for {spooled.filename}: {e}")
+                await results.put(self._error_result(index, spooled, "enhance", e))
+                continue
+            timings["enhance"] = round(time.perf_counter() - start, 4)
+
+            enhanced["original_filename"] = spooled.filename
+            enhanced["file_size"] = spooled.size
+            enhanced["file_type"] = spooled.file_type
+            enhanced["file_sha256"] = spooled.sha256
+            await outbox.put((index, spooled, enhanced, text, timings))
+
+    async def _storage_writer(self, inbox: asyncio.Queue, results: asyncio.Queue) -> None:
+        """Write enhanced resumes to storage, taking whatever is ready as one group"""
+        finished = False
+        while not finished:
+            batch = []
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            batch.append(item)
+            # Take whatever else is already waiting, up to the batch size
+            while len(batch) < self.storage_batch_size and not inbox.empty():
+                item = inbox.get_nowait()
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+
+            start = time.perf_counter()
+            try:
+                saved = await asyncio.to_thread(profiled(self._save_batch), batch)
+            except Exception as e:
+                logger.error(f"Saving a batch of {len(batch)} resumes failed: {e}")
+                for index, spooled, _, _, _ in batch:
+                    await results.put(self._error_result(index, spooled, "save", e))
+                continue
+            elapsed = round(time.perf_counter() - start, 4)
+
+            for (index, spooled, enhanced, _, timings), saved_resume in zip(batch, saved):
+                timings["save"] = elapsed
+                await results.put({
+                    "index": index,
+                    "filename": spooled.filename,
+                    "status": "saved",
+                    "resume_id": saved_resume["id"],
+                    "file_size": spooled.size,
+                    "file_sha256": spooled.sha256,
+                    "ai_enhanced": enhanced.get("ai_enhanced", False),
+                    "timings": timings,
+                })
+
+    def _save_batch(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        """Save a group of resumes and their full-text sidecars in one pass"""
+        return self.storage_service.save_resumes(
+            [enhanced for _, _, enhanced, _, _ in batch],
+            [text for _, _, _, text, _ in batch],
+        )
+
+    @staticmethod
+    def _error_result(index: int, spooled: SpooledUpload, stage: str, error: Exception) -> Dict[str, Any]:
+        """Build the result reported for a file that failed in a pipeline stage"""
+        return {
+            "index": index,
+            "filename": spooled.filename,
+            "status": "error",
+            "stage": stage,
+            "error": str(error),
+        }
@@ -0,0 +1,411 @@
+"""
+Service for caching AI enhancement results in memory and on disk (SQLite)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .storage_service import DATA_DIR
+from ..utils.metrics import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AI_CACHE_MEMORY_ENTRIES = int(os.getenv("AI_CACHE_MEMORY_ENTRIES", "2048"))
+AI_CACHE_DISK_ENTRIES = int(os.getenv("AI_CACHE_DISK_ENTRIES", "200000"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+AI_CACHE_DB_PATH = os.getenv("AI_CACHE_DB_PATH", os.path.join(DATA_DIR, "enhancement_cache.sqlite3"))
+
+# How many disk writes happen between eviction passes
+_EVICTION_INTERVAL = 500
+
+# Most queued writes and access-time updates applied in one transaction
+_WRITE_BATCH_SIZE = 256
+
+# SQLite's limit on bound parameters per statement is at least this
+_MAX_QUERY_KEYS = 500
+
+# Queue item asking the writer thread to stop
+_STOP = object()
+
+
+class EnhancementCache:
+    """
+    Two-tier cache for AI enhancements.
+
+    Entries are keyed on the normalized section, a hash of the normalized content,
+    the prompt template version and the model name. Lookups check an in-memory LRU
+    first, then SQLite; disk hits are promoted to memory. Both tiers honour the TTL,
+    and the disk tier is trimmed to a maximum number of entries (least recently used
+    first).
+
+    Callers never wait for a disk write: new entries and the access times of disk
+    hits are queued to a writer thread, which applies them in batched transactions
+    and runs eviction. Disk reads use their own connection; the async lookups run
+    them in a worker thread so the event loop is never blocked on SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = AI_CACHE_DB_PATH,
+        memory_entries: int = AI_CACHE_MEMORY_ENTRIES,
+        disk_entries: int = AI_CACHE_DISK_ENTRIES,
+        ttl_seconds: int = AI_CACHE_TTL_SECONDS,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path (Optional[str]): SQLite file for the disk tier (None for memory only)
+            memory_entries (int): Maximum entries kept in memory
+            disk_entries (int): Maximum entries kept on disk
+            ttl_seconds (int): Time-to-live of an entry
+        """
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writes_since_eviction = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._writer_db: Optional[sqlite3.Connection] = None
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._writer_db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+                self._writer_db.execute("PRAGMA journal_mode=WAL")
+                self._writer_db.execute("PRAGMA synchronous=NORMAL")
+                self._writer_db.execute(
+                    "CREATE TABLE IF NOT EXISTS enhancements ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._writer_db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_enhancements_accessed ON enhancements (accessed_at)"
+                )
+                # WAL lets reads on this connection run while the writer thread commits
+                self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            except sqlite3.Error as e:
+                logger.error(f"Enhancement cache disk tier unavailable, using memory only: {e}")
+                self._db = self._writer_db = None
+            else:
+                self._writer = threading.Thread(target=self._write_loop, name="enhancement-cache-writer", daemon=True)
+                self._writer.start()
+
+    @staticmethod
+    def make_key(section: str, content: str, prompt_version: str, model_name: str) -> str:
+        """
+        Build the cache key for an enhancement.
+
+        Section names are lower-cased and content whitespace is collapsed, so trivially
+        different copies of the same text share an entry.
+
+        Args:
+            section (str): Resume section (or call type, e.g. 'summary_generation')
+            content (str): The content being enhanced
+            prompt_version (str): Version of the prompt templates
+            model_name (str): Name of the model producing the enhancement
+
+        Returns:
+            str: The cache key
+        """
+        normalized = re.sub(r"\s+", " ", content).strip()
+        content_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{section.strip().lower()}:{content_hash}:{prompt_version}:{model_name}"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached enhancement.
+
+        Reads SQLite on a memory miss; from the event loop use get_async instead.
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            Optional[str]: The cached enhancement, or None on a miss
+        """
+        return self.get_many([key]).get(key)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """Async variant of get: a memory hit is answered at once, the disk is read in a worker thread"""
+        return (await self.get_many_async([key])).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up several cached enhancements, reading the disk tier once for all memory misses.
+
+        Args:
+            keys (Iterable[str]): Keys from make_key
+
+        Returns:
+            Dict[str, str]: The cached enhancements by key (misses are left out)
+        """
+        found, missing = self._get_from_memory(keys)
+        if missing:
+            on_disk = self._get_from_disk(missing)
+            found.update(on_disk)
+            self._count_misses(len(missing) - len(on_disk))
+        return found
+
+    async def get_many_async(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Async variant of get_many: the disk tier is read in a worker thread"""
+        found, missing = self._get_from_memory(keys)
+        if missing:
+            on_disk = await asyncio.to_thread(self._get_from_disk, missing)
+            found.update(on_disk)
+            self._count_misses(len(missing) - len(on_disk))
+        return found
+
+    def _get_from_memory(self, keys: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Split keys into the values found in the memory tier and the keys to look up on disk"""
+        now = time.time()
+        found: Dict[str, str] = {}
+        missing: Dict[str, None] = {}
+        with self._lock:
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                entry = self._memory.get(key)
+                if entry is not None:
+                    value, created_at = entry
+                    if now - created_at <= self.ttl_seconds:
+                        self._memory.move_to_end(key)
+                        metrics.increment("ai_cache_requests_total", tier="memory", result="hit")
+                        found[key] = value
+                        continue
+                    del self._memory[key]
+                missing[key] = None
+        return found, list(missing)
+
+    def _get_from_disk(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Read keys from the disk tier, promoting hits to memory.
+
+        The hits' access times are queued to the writer thread rather than updated here.
+        """
+        if self._db is None:
+            return {}
+        now = time.time()
+        found: Dict[str, str] = {}
+        try:
+            with self._read_lock:
+                for start in range(0, len(keys), _MAX_QUERY_KEYS):
+                    chunk = keys[start:start + _MAX_QUERY_KEYS]
+                    rows = self._db.execute(
+                        f"SELECT key, value, created_at FROM enhancements WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, value, created_at in rows:
+                        if now - created_at <= self.ttl_seconds:
+                            found[key] = (value, created_at)
+        except sqlite3.Error as e:
+            logger.warning(f"Enhancement cache read failed: {e}")
+            return {}
+
+        with self._lock:
+            for key, (value, created_at) in found.items():
+                self._remember(key, value, created_at)
+                self._writes.put(("touch", key, now))
+                metrics.increment("ai_cache_requests_total", tier="disk", result="hit")
+        return {key: value for key, (value, _) in found.items()}
+
+    @staticmethod
+    def _count_misses(misses: int) -> None:
+        """Count lookups found in neither tier"""
+        if misses:
+            metrics.increment("ai_cache_requests_total", misses, tier="all", result="miss")
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store an enhancement in both tiers.
+
+        The memory tier is updated at once; the disk write is queued to the writer thread.
+
+        Args:
+            key (str): Key from make_key
+            value (str): The enhancement to cache
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._writer is not None:
+                self._writes.put(("set", key, value, now))
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        """Insert into the memory tier, evicting the least recently used entry if full (lock held)"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            metrics.increment("ai_cache_evictions_total", tier="memory")
+
+    def _write_loop(self) -> None:
+        """Apply queued writes and access-time updates in batches until asked to stop (writer thread)"""
+        while True:
+            items = [self._writes.get()]
+            while len(items) < _WRITE_BATCH_SIZE:
+                try:
+                    items.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in items)
+            try:
+                self._apply_writes([item for item in items if item is not _STOP])
+            finally:
+                for _ in items:
+                    self._writes.task_done()
+            if stop:
+                return
+
+    def _apply_writes(self, items: List[tuple]) -> None:
+        """Write one batch of queued entries and access times in a single transaction (writer thread)"""
+        entries: Dict[str, tuple] = {}
+        touches: Dict[str, float] = {}
+        for item in items:
+            if item[0] == "set":
+                _, key, value, now = item
+                entries[key] = (key, value, now, now)
+                touches.pop(key, None)
+            else:
+                _, key, now = item
+                if key not in entries:
+                    touches[key] = max(now, touches.get(key, 0.0))
+        if not entries and not touches:
+            return
+
+        try:
+            self._writer_db.execute("BEGIN")
+            if entries:
+                self._writer_db.executemany(
+                    "INSERT OR REPLACE INTO enhancements (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    list(entries.values()),
+                )
+            if touches:
+                self._writer_db.executemany(
+                    "UPDATE enhancements SET accessed_at = ? WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in touches.items()],
+                )
+            self._writer_db.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.warning(f"Enhancement cache write failed: {e}")
+            if self._writer_db.in_transaction:
+                self._writer_db.execute("ROLLBACK")
+            return
+
+        metrics.increment("ai_cache_disk_write_batches_total")
+        self._writes_since_eviction += len(entries)
+        if self._writes_since_eviction >= _EVICTION_INTERVAL:
+            try:
+                self._evict_disk(time.time())
+            except sqlite3.Error as e:
+                logger.warning(f"Enhancement cache eviction failed: {e}")
+
+    def _evict_disk(self, now: float) -> None:
+        """Drop expired entries and trim the disk tier to its size bound (writer thread)"""
+        self._writes_since_eviction = 0
+        expired = self._writer_db.execute(
+            "DELETE FROM enhancements WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        count = self._writer_db.execute("SELECT COUNT(*) FROM enhancements").fetchone()[0]
+        trimmed = 0
+        if count > self.disk_entries:
+            trimmed = self._writer_db.execute(
+                "DELETE FROM enhancements WHERE key IN "
+                "(SELECT key FROM enhancements ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.disk_entries,),
+            ).rowcount
+        if expired or trimmed:
+            metrics.increment("ai_cache_evictions_total", expired + trimmed, tier="disk")
+
+    def flush(self) -> None:
+        """Wait until every queued disk write has been applied"""
+        if self._writer is not None:
+            self._writes.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache size and hit-rate metrics.
+
+        Counts the disk tier's rows; call it from a worker thread, not the event loop.
+
+        Returns:
+            Dict[str, Any]: Entry counts per tier, hits per tier, misses, overall hit rate and
+            disk writes still queued
+        """
+        memory_hits = metrics.get_counter("ai_cache_requests_total", tier="memory", result="hit")
+        disk_hits = metrics.get_counter("ai_cache_requests_total", tier="disk", result="hit")
+        misses = metrics.get_counter("ai_cache_requests_total", tier="all", result="miss")
+        lookups = memory_hits + disk_hits + misses
+
+        with self._lock:
+            memory_size = len(self._memory)
+
+        disk_size = None
+        if self._db is not None:
+            try:
+                with self._read_lock:
+                    disk_size = self._db.execute("SELECT COUNT(*) FROM enhancements").fetchone()[0]
+            except sqlite3.Error:
+                pass
+
+        return {
+            "memory_entries": memory_size,
+            "disk_entries": disk_size,
+            "memory_hits": int(memory_hits),
+            "disk_hits": int(disk_hits),
+            "misses": int(misses),
+            "hit_rate": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            "pending_writes": self._writes.qsize(),
+        }
+
+    def close(self) -> None:
+        """Apply the queued disk writes, stop the writer thread and close the disk tier"""
+        if self._writer is not None:
+            self._writes.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        with self._read_lock:
+            for db in (self._db, self._writer_db):
+                if db is not None:
+                    db.close()
+            self._db = self._writer_db = None
+
+
+_enhancement_cache: Optional[EnhancementCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_enhancement_cache() -> Optional[EnhancementCache]:
+    """Return the process-wide enhancement cache (None if caching is disabled)"""
+    global _enhancement_cache
+    if not AI_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _enhancement_cache is None:
+            _enhancement_cache = EnhancementCache()
+        return _enhancement_cache
+
+
+def close_enhancement_cache() -> None:
+    """Close the process-wide enhancement cache; the next get_enhancement_cache opens a new one"""
+    global _enhancement_cache
+    with _cache_lock:
+        if _enhancement_cache is not None:
+            _enhancement_cache.close()
+            _enhancement_cache = None
@@ -0,0 +1,290 @@
+"""
+Service for deciding locally which resume fields are worth sending to the AI model
+"""
+import os
+import re
+from typing import Dict, Any, Callable, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from ..utils.metrics import metrics
+
+# Skip model calls for fields that are empty, already strong, or near-duplicates of a sibling
+AI_SKIP_GATE = os.getenv("AI_SKIP_GATE", "true").lower() in ("1", "true", "yes")
+
+# Fields shorter than this (in words) are left as they are
+AI_SKIP_MIN_WORDS = int(os.getenv("AI_SKIP_MIN_WORDS", "4"))
+
+# Fields scoring at least this (0-1) are considered strong enough to keep
+AI_SKIP_STRONG_SCORE = float(os.getenv("AI_SKIP_STRONG_SCORE", "0.9"))
+
+# Word-set Jaccard similarity at which two fields of the same section count as near-duplicates
+# (their figures and proper nouns must also be identical)
+AI_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("AI_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
+# Word count range of a well-sized bullet
+STRONG_MIN_WORDS = 8
+STRONG_MAX_WORDS = 40
+
+# Verbs that open a strong resume bullet
+ACTION_VERBS = {
+    "accelerated", "achieved", "architected", "automated", "boosted", "built", "championed", "consolidated",
+    "created", "cut", "decreased", "delivered", "deployed", "designed", "developed", "directed", "doubled",
+    "drove", "eliminated", "engineered", "established", "expanded", "generated", "grew", "implemented",
+    "improved", "increased", "initiated", "introduced", "launched", "led", "managed", "mentored", "migrated",
+    "modernized", "negotiated", "optimized", "orchestrated", "overhauled", "owned", "pioneered", "produced",
+    "rebuilt", "redesigned", "reduced", "refactored", "resolved", "restructured", "revamped", "saved",
+    "scaled", "shipped", "simplified", "spearheaded", "standardized", "streamlined", "strengthened",
+    "tripled", "transformed", "unified",
+}
+
+# Phrases typical of weak, duty-focused bullets
+WEAK_PHRASES = ("responsible for", "worked on", "helped with", "duties included", "tasked with",
+                "involved in", "assisted with", "participated in")
+
+_WORD = re.compile(r"[a-z0-9%$]+")
+_QUANTIFIED = re.compile(r"\d|%|\$|€|£")
+_FIGURE = re.compile(r"[$€£]?\d+(?:[.,]\d+)*\s?(?:%|[kKmMbB]\b|x\b)?")
+_TOKEN_PUNCTUATION = "()[]{}\"'“”‘’,;:!?."
+
+# (field path, section, content), as collected by AiEnhancementService
+Field = Tuple[tuple, str, str]
+
+
+class _Scheduled(NamedTuple):
+    """A field scheduled for enhancement, as compared against later fields"""
+    key: str
+    section: str
+    text: str
+    words: Set[str]
+    anchors: FrozenSet[str]
+
+
+def score_content(section: str, content: str) -> Dict[str, Any]:
+    """
+    Score how strong a piece of resume content already is.
+
+    The score adds up an opening action verb (0.35), a quantified result (0.35) and
+    a well-sized length (0.3), minus 0.4 for duty-style phrasing. Summaries are
+    not held to bullet rules and never count as strong.
+
+    Args:
+        section (str): Resume section of the content
+        content (str): The content to score
+
+    Returns:
+        Dict[str, Any]: Word count, individual signals and the overall score (0-1)
+    """
+    text = content.strip()
+    words = _WORD.findall(text.lower())
+    lowered = text.lower()
+    action_verb = bool(words) and words[0] in ACTION_VERBS
+    quantified = bool(_QUANTIFIED.search(text))
+    good_length = STRONG_MIN_WORDS <= len(words) <= STRONG_MAX_WORDS
+    weak_phrase = any(phrase in lowered for phrase in WEAK_PHRASES)
+
+    score = 0.0
+    if section.lower() != "summary":
+        score = 0.35 * action_verb + 0.35 * quantified + 0.3 * good_length - 0.4 * weak_phrase
+    return {
+        "words": len(words),
+        "action_verb": action_verb,
+        "quantified": quantified,
+        "good_length": good_length,
+        "weak_phrase": weak_phrase,
+        "score": round(max(0.0, score), 2),
+    }
+
+
+def _anchor_tokens(content: str) -> FrozenSet[str]:
+    """
+    Collect the tokens of a text that an enhancement must not get wrong: figures and proper nouns.
+
+    Figures keep their unit ('35%', '$1.2M', '3x'). Proper nouns are capitalized words
+    that don't open a line or sentence, e.g. product, company and technology names.
+    """
+    anchors = {figure.replace(" ", "") for figure in _FIGURE.findall(content)}
+    for line in content.splitlines():
+        sentence_start = True
+        for token in line.split():
+            word = token.strip(_TOKEN_PUNCTUATION)
+            if word and not sentence_start and any(char.isupper() for char in word):
+                anchors.add(word)
+            if word:
+                sentence_start = token.endswith((".", "!", "?"))
+    return frozenset(anchors)
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two word sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class GatePlan:
+    """
+    Per-field decisions for one resume.
+
+    Attributes:
+        to_enhance (List[Field]): Fields to send to the model, in resume order
+        kept (Dict[str, str]): Field keys left unchanged, with the reason
+        reused (Dict[str, str]): Field keys that take the enhancement of another (key -> source key)
+        carried (Dict[str, Dict[str, Any]]): Field keys unchanged since the previous enhanced version,
+            with the provenance recorded for them then
+    """
+
+    def __init__(self):
+        self.to_enhance: List[Field] = []
+        self.kept: Dict[str, str] = {}
+        self.reused: Dict[str, str] = {}
+        self.carried: Dict[str, Dict[str, Any]] = {}
+
+    def apply_reuse(self, results: Dict[str, str]) -> None:
+        """Copy each source field's enhancement to the fields that reuse it"""
+        for key, source in self.reused.items():
+            if source in results:
+                results[key] = results[source]
+
+    def summary(self) -> Dict[str, int]:
+        """Count the fields per decision"""
+        return {
+            "enhanced": len(self.to_enhance),
+            "kept": len(self.kept),
+            "reused": len(self.reused),
+            "unchanged": len(self.carried),
+        }
+
+    def provenance(self, timestamp: str, key_of: Callable[[tuple], str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Record where the value of every field comes from.
+
+        Args:
+            timestamp (str): Time of this enhancement run
+            key_of (Callable[[tuple], str]): Formats a field path as its result key
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Field key -> source ('enhanced', 'kept', 'reused' or the
+            entry carried over from the previous version) and the time it was produced
+        """
+        provenance = {key: dict(entry) for key, entry in self.carried.items()}
+        for path, _, _ in self.to_enhance:
+            provenance[key_of(path)] = {"source": "enhanced", "at": timestamp}
+        for key, reason in self.kept.items():
+            provenance[key] = {"source": "kept", "reason": reason, "at": timestamp}
+        for key, source in self.reused.items():
+            provenance[key] = {"source": "reused", "from": source, "at": timestamp}
+        return provenance
+
+
+class EnhancementGate:
+    """
+    Decides per field whether to call the model, reuse a sibling's enhancement, or keep the text.
+
+    - Empty or trivially short fields are kept as they are.
+    - Bullets that already open with an action verb, carry a figure and have a
+      sensible length are kept as they are.
+    - A field with the same text as an earlier field of the same section that is
+      being enhanced, or whose words nearly match it with exactly the same figures and
+      proper nouns, reuses that field's enhancement instead of a call of its own.
+      Bullets differing in a number or a name are always enhanced on their own, so an
+      enhancement never carries another bullet's figures.
+    - Everything else is enhanced.
+    """
+
+    def __init__(
+        self,
+        min_words: int = AI_SKIP_MIN_WORDS,
+        strong_score: float = AI_SKIP_STRONG_SCORE,
+        duplicate_threshold: float = AI_NEAR_DUPLICATE_THRESHOLD,
+    ):
+        self.min_words = min_words
+        self.strong_score = strong_score
+        self.duplicate_threshold = duplicate_threshold
+
+    def plan(self, fields: List[Field], key_of: Callable[[tuple], str]) -> GatePlan:
+        """
+        Decide what to do with each field of a resume.
+
+        Args:
+            fields (List[Field]): (field path, section, content) in resume order
+            key_of (Callable[[tuple], str]): Formats a field path as its result key
+
+        Returns:
+            GatePlan: The per-field decisions
+        """
+        plan = GatePlan()
+        # Fields already scheduled for enhancement
+        scheduled: List[_Scheduled] = []
+
+        for field in fields:
+            path, section, content = field
+            key = key_of(path)
+            signals = score_content(section, content or "")
+
+            if signals["words"] < self.min_words:
+                self._decide(plan.kept, key, "too_short", section)
+                continue
+            if signals["score"] >= self.strong_score:
+                self._decide(plan.kept, key, "already_strong", section)
+                continue
+
+            candidate = _Scheduled(key, section, " ".join(content.lower().split()),
+                                   set(_WORD.findall(content.lower())), _anchor_tokens(content))
+            duplicate = self._find_duplicate(scheduled, candidate)
+            if duplicate is not None:
+                source, reason = duplicate
+                self._decide(plan.reused, key, source, section, reason=reason)
+                continue
+
+            scheduled.append(candidate)
+            plan.to_enhance.append(field)
+            metrics.increment("ai_gate_decisions_total", decision="enhance", reason="needs_work", section=section)
+
+        return plan
+
+    def _find_duplicate(self, scheduled: List[_Scheduled], candidate: _Scheduled) -> Optional[Tuple[str, str]]:
+        """
+        Find a scheduled field of the same section whose enhancement the candidate can reuse.
+
+        Returns:
+            Optional[Tuple[str, str]]: Key of that field and the reason ('duplicate' for the same
+            text, 'near_duplicate' for nearly the same words with identical figures and proper nouns)
+        """
+        for other in scheduled:
+            if other.section != candidate.section:
+                continue
+            if other.text == candidate.text:
+                return other.key, "duplicate"
+            if other.anchors == candidate.anchors and \
+                    _similarity(candidate.words, other.words) >= self.duplicate_threshold:
+                return other.key, "near_duplicate"
+        return None
+
+    @staticmethod
+    def _decide(decisions: Dict[str, str], key: str, value: str, section: str, reason: Optional[str] = None) -> None:
+        """Record a skip decision and count it"""
+        decisions[key] = value
+        decision = "reuse" if reason else "keep"
+        metrics.increment("ai_gate_decisions_total", decision=decision, reason=reason or value, section=section)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """
+        Return gate decision counts and the share of model calls avoided.
+
+        Returns:
+            Dict[str, Any]: Fields seen, enhanced, kept and reused, and the share avoided
+        """
+        counters = metrics.snapshot("ai_gate_decisions_total")["counters"]
+        totals = {"enhance": 0, "keep": 0, "reuse": 0}
+        for series, value in counters.items():
+            for decision in totals:
+                if f'decision="{decision}"' in series:
+                    totals[decision] += int(value)
+        seen = sum(totals.values())
+        return {
+            "fields_seen": seen,
+            "enhanced": totals["enhance"],
+            "kept": totals["keep"],
+            "reused": totals["reuse"],
+            "calls_avoided_share": round((totals["keep"] + totals["reuse"]) / seen, 4) if seen else 0.0,
+        }
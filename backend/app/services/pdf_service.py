@@ -7,43 +7,23 @@ import logging
 from datetime import datetime
 from typing import Dict, Any, Optional, Union, BinaryIO
 from pathlib import Path
+from ..utils.lazy_import import module_available
+from ..utils.metrics import metrics
+from ..utils.tracing import traced
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import PDF libraries
-PDF_GENERATION_AVAILABLE = False
-PDF_LIBRARY = None
+# PDF generation libraries in order of preference; the first installed one is used.
+# Availability is probed without importing, and the library is imported on the first render
+PDF_LIBRARY = next((name for name in ("reportlab", "xhtml2pdf", "weasyprint") if module_available(name)), None)
+PDF_GENERATION_AVAILABLE = PDF_LIBRARY is not None
 
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    
-    PDF_GENERATION_AVAILABLE = True
-    PDF_LIBRARY = "reportlab"
-    logger.info("Using ReportLab for PDF generation")
-except ImportError:
-    logger.warning("ReportLab not available")
-    try:
-        from xhtml2pdf import pisa
-        
-        PDF_GENERATION_AVAILABLE = True
-        PDF_LIBRARY = "xhtml2pdf"
-        logger.info("Using xhtml2pdf for PDF generation")
-    except ImportError:
-        logger.warning("xhtml2pdf not available")
-        try:
-            from weasyprint import HTML
-            
-            PDF_GENERATION_AVAILABLE = True
-            PDF_LIBRARY = "weasyprint"
-            logger.info("Using WeasyPrint for PDF generation")
-        except ImportError:
-            logger.warning("WeasyPrint not available")
-            logger.error("No PDF generation libraries available")
+if PDF_GENERATION_AVAILABLE:
+    logger.info(f"Using {PDF_LIBRARY} for PDF generation")
+else:
+    logger.error("No PDF generation libraries available")
 
 
 class PdfGenerationService:
@@ -58,6 +38,10 @@ class PdfGenerationService:
         templates_dir = Path(__file__).parent.parent / "templates"
         templates_dir.mkdir(exist_ok=True)
     
+    @metrics.tracked("pipeline_stage", stage="pdf_render")
+    @traced("pipeline.pdf_render",
+            attributes=lambda self, resume_data: {"library": self.pdf_library},
+            result=lambda pdf: {"output_bytes": len(pdf) if pdf else 0})
     def generate_resume_pdf(self, resume_data: Dict[str, Any]) -> Optional[bytes]:
         """
         Generate a PDF from resume data.
@@ -93,6 +77,10 @@ class PdfGenerationService:
         Returns:
             bytes: PDF content as bytes
         """
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        
         # Create a buffer for the PDF
         buffer = io.BytesIO()
         
@@ -275,6 +263,8 @@ class PdfGenerationService:
         # Create a buffer for the PDF
         result = io.BytesIO()
         
+        from xhtml2pdf import pisa
+        
         # Convert HTML to PDF
         pisa.CreatePDF(io.StringIO(html), result)
         
@@ -297,6 +287,8 @@ class PdfGenerationService:
         # Create HTML template for the resume
         html_content = self._generate_resume_html(resume_data)
         
+        from weasyprint import HTML
+        
         # Generate PDF using WeasyPrint
         pdf = HTML(string=html_content).write_pdf()
         
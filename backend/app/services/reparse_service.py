@@ -0,0 +1,242 @@
+"""
+Service for re-parsing stored resumes from their saved full text
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set
+
+from .resume_parser_service import ResumeParserService
+from .storage_service import DATA_DIR, ResumeStorageService, flatten_fields
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Keys the parser writes, per section. Everything else in a stored resume (summaries,
+# descriptions, achievements, dates, hand-edited values) came from AI enhancement or the
+# user and is never touched by a re-parse
+PARSER_PERSONAL_INFO = ("name", "email", "phone", "linkedin", "github")
+PARSER_ENTRY_FIELDS = {
+    "education": ("institution", "degree"),
+    "experience": ("position", "company"),
+}
+
+# Sections the parser fills with a set of items: a re-parse only adds the items it newly finds
+PARSER_ITEM_SECTIONS = {
+    "skills": lambda item: str(item.get("name", "")).lower() if isinstance(item, dict) else str(item).lower(),
+    "certifications": lambda item: str(item).lower(),
+    "languages": lambda item: str(item).lower(),
+}
+
+
+def parser_fingerprint() -> str:
+    """Short hash of the parser's source, identifying the parser version a checkpoint was made with"""
+    with open(inspect.getsourcefile(ResumeParserService), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def merge_parsed_fields(stored: Dict[str, Any], reparsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a fresh parse to a stored resume, key by key.
+
+    Only parser-owned keys are updated, and only where the fresh parse found a value:
+    personal info keys in PARSER_PERSONAL_INFO, and the PARSER_ENTRY_FIELDS of each
+    education and experience entry (matched by position, new entries appended). Skills,
+    certifications and languages only gain the items the parser newly finds. AI-enhanced
+    and user-edited content, and entries the parser no longer finds, are kept.
+
+    Args:
+        stored (Dict[str, Any]): The stored resume record
+        reparsed (Dict[str, Any]): Output of parse_resume_text for the same text
+
+    Returns:
+        Dict[str, Any]: The updated resume record (stored is not modified)
+    """
+    updated = dict(stored)
+
+    personal_info = dict(stored.get("personal_info") or {})
+    for key in PARSER_PERSONAL_INFO:
+        value = (reparsed.get("personal_info") or {}).get(key)
+        if value:
+            personal_info[key] = value
+    updated["personal_info"] = personal_info
+
+    for section, keys in PARSER_ENTRY_FIELDS.items():
+        entries = [dict(entry) for entry in stored.get(section) or []]
+        for i, fresh in enumerate(reparsed.get(section) or []):
+            if i >= len(entries):
+                entries.append(dict(fresh))
+                continue
+            for key in keys:
+                if fresh.get(key):
+                    entries[i][key] = fresh[key]
+        updated[section] = entries
+
+    for section, item_key in PARSER_ITEM_SECTIONS.items():
+        items = list(stored.get(section) or [])
+        seen = {item_key(item) for item in items}
+        for item in reparsed.get(section) or []:
+            if item_key(item) not in seen:
+                items.append(item)
+                seen.add(item_key(item))
+        updated[section] = items
+
+    return updated
+
+
+def diff_parsed_fields(stored: Dict[str, Any], reparsed: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    List the fields of a stored resume that merge_parsed_fields would change.
+
+    Args:
+        stored (Dict[str, Any]): The stored resume record
+        reparsed (Dict[str, Any]): Output of parse_resume_text for the same text
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Changed field paths (e.g. experience[0].company) mapped to
+        their old and new values
+    """
+    old_fields = flatten_fields(stored)
+    new_fields = flatten_fields(merge_parsed_fields(stored, reparsed))
+    return {
+        path: {"old": old_fields.get(path), "new": value}
+        for path, value in sorted(new_fields.items())
+        if old_fields.get(path) != value
+    }
+
+
+def reparse_resume(resume_id: str) -> Dict[str, Any]:
+    """
+    Re-parse one stored resume from its full-text sidecar.
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        resume_id (str): ID of the resume to re-parse
+
+    Returns:
+        Dict[str, Any]: Result with the resume id, status, changed fields and the fresh parse
+    """
+    try:
+        stored = ResumeStorageService.get_resume(resume_id)
+        text = ResumeStorageService.get_raw_text(resume_id)
+        if stored is None or text is None:
+            return {"id": resume_id, "status": "missing", "changes": {}}
+
+        reparsed = ResumeParserService().parse_resume_text(text)
+        changes = diff_parsed_fields(stored, reparsed)
+        return {
+            "id": resume_id,
+            "status": "changed" if changes else "unchanged",
+            "changes": changes,
+            "reparsed": reparsed if changes else None,
+        }
+    except Exception as e:
+        return {"id": resume_id, "status": "error", "error": str(e), "changes": {}}
+
+
+class ResumeReparseService:
+    """
+    Service class to re-run the resume parser over the stored corpus.
+    Work is spread over a process pool; progress is checkpointed to a JSON Lines
+    report so an interrupted run resumes where it stopped. Checkpointed results are
+    tagged with the parser version, so a run with a changed parser starts over.
+    """
+
+    def __init__(self, checkpoint_path: Optional[str] = None, workers: Optional[int] = None):
+        """
+        Initialize the re-parse job.
+
+        Args:
+            checkpoint_path (Optional[str]): JSON Lines file recording one result (with its diff) per
+                resume (defaults to one per parser version in the data directory)
+            workers (Optional[int]): Number of worker processes (defaults to the CPU count)
+        """
+        self.parser_version = parser_fingerprint()
+        self.checkpoint_path = checkpoint_path or os.path.join(DATA_DIR, f"reparse_{self.parser_version}.jsonl")
+        self.workers = workers or os.cpu_count() or 1
+
+    def _load_checkpoint(self, apply: bool) -> Set[str]:
+        """
+        Return the IDs already recorded in the checkpoint file.
+
+        Results of another parser version don't count, and neither do changes that a
+        report-only run found but did not apply when this run applies them.
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+
+        done = set()
+        with open(self.checkpoint_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        result = json.loads(line)
+                        resume_id = result["id"]
+                    except (ValueError, KeyError):
+                        # Ignore a partially written last line from an interrupted run
+                        continue
+                    if result.get("parser_version") != self.parser_version:
+                        continue
+                    if apply and result.get("status") == "changed" and not result.get("applied"):
+                        continue
+                    done.add(resume_id)
+        return done
+
+    def run(self, apply: bool = False, resume_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Re-parse every stored resume that has a full-text sidecar.
+
+        Args:
+            apply (bool): Write changed fields back to storage (otherwise only report)
+            resume_ids (Optional[List[str]]): Restrict the run to these IDs
+
+        Returns:
+            Dict[str, Any]: Summary with per-status counts and per-field change counts
+        """
+        ids = resume_ids if resume_ids is not None else ResumeStorageService.list_resume_ids_with_raw_text()
+        done = self._load_checkpoint(apply)
+        pending = [resume_id for resume_id in ids if resume_id not in done]
+        logger.info(f"Re-parsing {len(pending)} resumes ({len(done)} already checkpointed) "
+                    f"with {self.workers} workers, parser version {self.parser_version}")
+
+        summary = {"total": len(ids), "skipped": len(ids) - len(pending), "statuses": {}, "field_changes": {}}
+        if not pending:
+            return summary
+
+        checkpoint_dir = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, open(self.checkpoint_path, "a") as checkpoint:
+            for result in pool.map(reparse_resume, pending, chunksize=chunksize):
+                reparsed = result.pop("reparsed", None)
+                result["parser_version"] = self.parser_version
+                result["applied"] = False
+
+                if apply and reparsed is not None:
+                    # Merge into the latest stored version, in case it changed while the job ran
+                    stored = ResumeStorageService.get_resume(result["id"])
+                    if stored is not None:
+                        updated = merge_parsed_fields(stored, reparsed)
+                        updated["reparsed_at"] = datetime.now().isoformat()
+                        ResumeStorageService.save_resume(updated)
+                        result["applied"] = True
+
+                checkpoint.write(json.dumps(result) + "\n")
+                checkpoint.flush()
+
+                status = result["status"]
+                summary["statuses"][status] = summary["statuses"].get(status, 0) + 1
+                for path in result["changes"]:
+                    # Count per field, not per entry: experience[3].company counts as experience[].company
+                    field = re.sub(r"\[\d+\]", "[]", path)
+                    summary["field_changes"][field] = summary["field_changes"].get(field, 0) + 1
+
+        logger.info(f"Re-parse finished: {summary['statuses']}")
+        return summary
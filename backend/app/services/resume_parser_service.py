@@ -3,41 +3,92 @@ Service for parsing resume files (PDF and DOCX) into structured JSON data
 """
 import re
 import io
+import mmap
+import time
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
+from ..utils.metrics import metrics
+from ..utils.tracing import traced
+from ..utils.docx_reader import extract_docx_text
+from ..utils.lazy_import import LazyModules
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Try to import PDF/DOCX parsing libraries
-PARSING_AVAILABLE = False
-PDF_LIBS = {}
-
-try:
-    import PyPDF2
-    PDF_LIBS['PyPDF2'] = PyPDF2
-    logger.info("PyPDF2 available for PDF parsing")
-except ImportError:
-    logger.warning("PyPDF2 not available")
-
-try:
-    import pdfplumber
-    PDF_LIBS['pdfplumber'] = pdfplumber
-    logger.info("pdfplumber available for PDF parsing")
-except ImportError:
-    logger.warning("pdfplumber not available")
-
-try:
-    from docx import Document
-    PDF_LIBS['python-docx'] = Document
-    logger.info("python-docx available for DOCX parsing")
-except ImportError:
-    logger.warning("python-docx not available")
+# PDF/DOCX parsing libraries and what to import for each ("module" or "module:attribute")
+PARSING_LIBRARIES = {
+    "PyPDF2": "PyPDF2",
+    "pdfplumber": "pdfplumber",
+    "python-docx": "docx:Document",
+}
+
+# The installed ones; probing does not import them, each is imported the first time it is used
+PDF_LIBS = LazyModules(PARSING_LIBRARIES)
+for _name in sorted(set(PARSING_LIBRARIES) - set(PDF_LIBS)):
+    logger.warning(f"{_name} not available")
 
 PARSING_AVAILABLE = len(PDF_LIBS) > 0
 
+# Thresholds used to route PDFs between extractors
+PDF_INSPECT_MAX_PAGES = 3
+PDF_MAX_FONTS_PER_PAGE = 12
+MIN_CHARS_PER_PAGE = 200
+MAX_AVG_WORD_LENGTH = 15
+LAYOUT_HEAVY_PRODUCERS = ["canva", "indesign", "illustrator", "photoshop", "figma", "affinity"]
+
+# Raw file bytes or a read-only memory map of a spooled upload
+FileContent = Union[bytes, mmap.mmap]
+
+
+class _MappedFileStream(io.RawIOBase):
+    """Read-only, seekable stream over a memory map that reads without copying the whole file"""
+
+    def __init__(self, mapped: mmap.mmap):
+        super().__init__()
+        self._mapped = mapped
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._mapped)
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        chunk = self._mapped[self._pos:self._pos + len(buffer)]
+        size = len(chunk)
+        buffer[:size] = chunk
+        self._pos += size
+        return size
+
+
+def _as_stream(file_content: FileContent):
+    """
+    Return a seekable binary stream over file content.
+
+    Raw bytes are wrapped in a BytesIO; memory-mapped files are read through
+    a buffered view so the file is never copied into a bytes object.
+    """
+    if isinstance(file_content, (bytes, bytearray)):
+        return io.BytesIO(file_content)
+    return io.BufferedReader(_MappedFileStream(file_content))
+
+
 class ResumeParserService:
     """Service for parsing resume files into structured data"""
     
@@ -45,55 +96,245 @@ class ResumeParserService:
         """Initialize the parser service"""
         self.parsing_available = PARSING_AVAILABLE
         
-    def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file content"""
+    @metrics.tracked("pipeline_stage", stage="extract_text")
+    @traced("pipeline.extract_text",
+            attributes=lambda self, file_content: {"format": "pdf", "input_bytes": len(file_content)},
+            result=lambda text: {"output_chars": len(text)})
+    def extract_text_from_pdf(self, file_content: FileContent) -> str:
+        """
+        Extract text from PDF file content.
+
+        The document is pre-inspected and routed to the cheapest extractor
+        likely to succeed (PyPDF2 for plain text-layer PDFs, pdfplumber for
+        design-heavy layouts). PyPDF2 output that looks degraded is escalated
+        to pdfplumber.
+        """
         if not self.parsing_available:
             raise Exception("No PDF parsing libraries available")
-            
-        text = ""
-        
-        # Try pdfplumber first (better text extraction)
+
+        inspection = self._inspect_pdf(file_content)
+        extractor, reason = self._choose_pdf_extractor(inspection)
+        metrics.increment("pdf_extraction_routed_total", extractor=extractor, reason=reason)
+        logger.info(f"Routing PDF to {extractor} ({reason}): {inspection['page_count']} pages, "
+                    f"producer={inspection['producer']!r}")
+
+        text = None
+        if extractor == "PyPDF2":
+            text = self._run_pdf_extractor("PyPDF2", self._extract_with_pypdf2, file_content, inspection)
+            if text is not None:
+                degradation = self._detect_degraded_text(text, inspection["page_count"])
+                if degradation is None or 'pdfplumber' not in PDF_LIBS:
+                    return text
+                logger.info(f"PyPDF2 output looks degraded ({degradation}), escalating to pdfplumber")
+                metrics.increment("pdf_extraction_escalations_total", reason=degradation)
+            else:
+                metrics.increment("pdf_extraction_escalations_total", reason="error")
+
         if 'pdfplumber' in PDF_LIBS:
-            try:
-                with PDF_LIBS['pdfplumber'].open(io.BytesIO(file_content)) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                logger.info("Successfully extracted text using pdfplumber")
-                return text
-            except Exception as e:
-                logger.warning(f"pdfplumber failed: {e}")
-        
-        # Fallback to PyPDF2
-        if 'PyPDF2' in PDF_LIBS:
-            try:
-                pdf_reader = PDF_LIBS['PyPDF2'].PdfReader(io.BytesIO(file_content))
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                logger.info("Successfully extracted text using PyPDF2")
-                return text
-            except Exception as e:
-                logger.warning(f"PyPDF2 failed: {e}")
-        
+            plumber_text = self._run_pdf_extractor("pdfplumber", self._extract_with_pdfplumber, file_content, inspection)
+            if plumber_text is not None:
+                # Keep the PyPDF2 result if escalation did not actually do better
+                if text and len(plumber_text.strip()) < len(text.strip()):
+                    return text
+                return plumber_text
+
+        # Last resort when pdfplumber was chosen but failed
+        if text is None and extractor != "PyPDF2" and 'PyPDF2' in PDF_LIBS:
+            text = self._run_pdf_extractor("PyPDF2", self._extract_with_pypdf2, file_content, inspection)
+
+        if text is not None:
+            return text
+
         raise Exception("Failed to extract text from PDF")
-    
-    def extract_text_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file content"""
+
+    def _inspect_pdf(self, file_content: FileContent) -> Dict[str, Any]:
+        """
+        Cheaply inspect a PDF without extracting any text.
+
+        Reads the producer, page count and, for the first few pages, the number
+        of fonts and images referenced by each page's resources.
+
+        Returns:
+            Dict[str, Any]: Inspection results (reader is kept for reuse by PyPDF2)
+        """
+        inspection = {
+            "reader": None,
+            "producer": "",
+            "page_count": 0,
+            "fonts_per_page": 0.0,
+            "images_per_page": 0.0,
+            "type3_fonts": False,
+            "pages_without_fonts": 0,
+        }
+        if 'PyPDF2' not in PDF_LIBS:
+            return inspection
+
+        start = time.perf_counter()
+        try:
+            reader = PDF_LIBS['PyPDF2'].PdfReader(_as_stream(file_content))
+            inspection["reader"] = reader
+            inspection["page_count"] = len(reader.pages)
+            info = reader.metadata
+            if info and info.producer:
+                inspection["producer"] = str(info.producer)
+
+            sampled = reader.pages[:PDF_INSPECT_MAX_PAGES]
+            font_count = 0
+            image_count = 0
+            for page in sampled:
+                resources = page.get("/Resources")
+                resources = resources.get_object() if resources is not None else {}
+                fonts = resources.get("/Font")
+                fonts = fonts.get_object() if fonts is not None else {}
+                if not fonts:
+                    inspection["pages_without_fonts"] += 1
+                for font in fonts.values():
+                    font_count += 1
+                    if font.get_object().get("/Subtype") == "/Type3":
+                        inspection["type3_fonts"] = True
+                xobjects = resources.get("/XObject")
+                xobjects = xobjects.get_object() if xobjects is not None else {}
+                for xobject in xobjects.values():
+                    if xobject.get_object().get("/Subtype") == "/Image":
+                        image_count += 1
+
+            if sampled:
+                inspection["fonts_per_page"] = font_count / len(sampled)
+                inspection["images_per_page"] = image_count / len(sampled)
+        except Exception as e:
+            logger.warning(f"PDF pre-inspection failed: {e}")
+            inspection["reader"] = None
+        finally:
+            metrics.observe("pdf_inspection_seconds", time.perf_counter() - start)
+
+        return inspection
+
+    def _choose_pdf_extractor(self, inspection: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Pick the cheapest extractor likely to succeed for an inspected PDF.
+
+        Returns:
+            Tuple[str, str]: Extractor name and the reason it was chosen
+        """
+        if 'PyPDF2' not in PDF_LIBS:
+            return "pdfplumber", "pypdf2_unavailable"
+        if 'pdfplumber' not in PDF_LIBS:
+            return "PyPDF2", "pdfplumber_unavailable"
+        if inspection["reader"] is None:
+            return "pdfplumber", "inspection_failed"
+
+        producer = inspection["producer"].lower()
+        if any(tool in producer for tool in LAYOUT_HEAVY_PRODUCERS):
+            return "pdfplumber", "layout_heavy_producer"
+        if inspection["type3_fonts"]:
+            return "pdfplumber", "type3_fonts"
+        if inspection["fonts_per_page"] > PDF_MAX_FONTS_PER_PAGE:
+            return "pdfplumber", "font_dense"
+        return "PyPDF2", "simple_text_layer"
+
+    def _run_pdf_extractor(self, name: str, extractor, file_content: FileContent,
+                           inspection: Dict[str, Any]) -> Optional[str]:
+        """Run one extractor, recording its timing and outcome. Returns None on failure."""
+        start = time.perf_counter()
+        try:
+            text = extractor(file_content, inspection)
+            metrics.increment("pdf_extraction_total", extractor=name, outcome="success")
+            logger.info(f"Successfully extracted text using {name}")
+            return text
+        except Exception as e:
+            metrics.increment("pdf_extraction_total", extractor=name, outcome="error")
+            logger.warning(f"{name} failed: {e}")
+            return None
+        finally:
+            metrics.observe("pdf_extraction_seconds", time.perf_counter() - start, extractor=name)
+
+    def _extract_with_pypdf2(self, file_content: FileContent, inspection: Dict[str, Any]) -> str:
+        """Extract text with PyPDF2, reusing the reader from pre-inspection when possible"""
+        pdf_reader = inspection.get("reader") or PDF_LIBS['PyPDF2'].PdfReader(_as_stream(file_content))
+        text = ""
+        for page in pdf_reader.pages:
+            text += (page.extract_text() or "") + "\n"
+        return text
+
+    def _extract_with_pdfplumber(self, file_content: FileContent, inspection: Dict[str, Any]) -> str:
+        """Extract text with pdfplumber (slower, better on complex layouts)"""
+        text = ""
+        with PDF_LIBS['pdfplumber'].open(_as_stream(file_content)) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+        return text
+
+    def _detect_degraded_text(self, text: str, page_count: int) -> Optional[str]:
+        """
+        Check extracted text for signs of a poor extraction.
+
+        Returns:
+            Optional[str]: The reason the text looks degraded, or None if it looks fine
+        """
+        stripped = text.strip()
+        if not stripped:
+            return "empty"
+
+        if page_count and len(stripped) / page_count < MIN_CHARS_PER_PAGE:
+            return "sparse"
+
+        cid_markers = stripped.count("(cid:") + stripped.count("\ufffd")
+        if cid_markers * 20 > len(stripped.split()):
+            return "unmapped_glyphs"
+
+        words = stripped.split()
+        avg_word_length = sum(len(word) for word in words) / len(words)
+        if avg_word_length > MAX_AVG_WORD_LENGTH:
+            return "missing_spaces"
+
+        return None
+
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """Return per-extractor timings, routing decisions and escalation counters"""
+        return metrics.snapshot(prefix="pdf_")
+
+    @metrics.tracked("pipeline_stage", stage="extract_text")
+    @traced("pipeline.extract_text",
+            attributes=lambda self, file_content: {"format": "docx", "input_bytes": len(file_content)},
+            result=lambda text: {"output_chars": len(text)})
+    def extract_text_from_docx(self, file_content: FileContent) -> str:
+        """
+        Extract text from DOCX file content.
+
+        Streams word/document.xml straight from the archive (paragraphs and
+        table cells in reading order, media parts skipped) and falls back to
+        python-docx if the document cannot be streamed.
+        """
+        start = time.perf_counter()
+        try:
+            text = extract_docx_text(_as_stream(file_content))
+            logger.info("Successfully extracted text from DOCX")
+            return text
+        except Exception as e:
+            logger.warning(f"Streaming DOCX extraction failed: {e}")
+        finally:
+            metrics.observe("docx_extraction_seconds", time.perf_counter() - start, extractor="stream")
+
         if 'python-docx' not in PDF_LIBS:
-            raise Exception("python-docx library not available")
-            
+            raise Exception("Failed to extract text from DOCX")
+
         try:
-            doc = PDF_LIBS['python-docx'](io.BytesIO(file_content))
+            doc = PDF_LIBS['python-docx'](_as_stream(file_content))
             text = ""
             for paragraph in doc.paragraphs:
                 text += paragraph.text + "\n"
-            logger.info("Successfully extracted text from DOCX")
+            logger.info("Successfully extracted text from DOCX using python-docx")
             return text
         except Exception as e:
             logger.error(f"Failed to extract text from DOCX: {e}")
             raise Exception("Failed to extract text from DOCX")
     
+    @metrics.tracked("pipeline_stage", stage="parse_resume_text")
+    @traced("pipeline.parse_resume_text",
+            attributes=lambda self, text: {"input_chars": len(text)},
+            result=lambda data: {f"{section}_entries": len(data[section]) for section in ("education", "experience", "skills")})
     def parse_resume_text(self, text: str) -> Dict[str, Any]:
         """Parse extracted text into structured resume data"""
         # Clean up the text
@@ -278,12 +519,40 @@ class ResumeParserService:
         
         return languages
     
-    async def parse_resume_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Parse a resume file and return structured data"""
+    def parse_resume_path(self, path: str, filename: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Parse a resume file on disk, memory-mapping it instead of reading it into memory.
+        This is CPU-bound; async callers should run it in a thread or process pool.
+
+        Args:
+            path (str): Path to the (non-empty) resume file
+            filename (str): Original filename, used to pick the extractor
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[str]]: Structured resume data and the full
+            extracted text (None if parsing fell back to mock data)
+        """
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self.extract_and_parse(mapped, filename)
+
+    async def parse_resume_file(self, file_content: FileContent, filename: str) -> Dict[str, Any]:
+        """Parse a resume file (raw bytes or a memory-mapped file) and return structured data"""
+        parsed_data, _ = self.extract_and_parse(file_content, filename)
+        return parsed_data
+
+    def extract_and_parse(self, file_content: FileContent, filename: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Extract the text of a resume file and parse it into structured data.
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[str]]: Structured resume data and the full
+            extracted text (None if parsing fell back to mock data)
+        """
         if not self.parsing_available:
             logger.warning("No parsing libraries available, returning mock data")
             # Return mock data if parsing is not available
-            return self._get_mock_resume_data()
+            return self._get_mock_resume_data(), None
         
         # Extract text based on file type
         file_ext = filename.split('.')[-1].lower()
@@ -300,12 +569,12 @@ class ResumeParserService:
             parsed_data = self.parse_resume_text(text)
             parsed_data["raw_text"] = text[:1000] + "..." if len(text) > 1000 else text  # Include sample of raw text
             
-            return parsed_data
+            return parsed_data, text
             
         except Exception as e:
             logger.error(f"Failed to parse resume: {e}")
             # Return mock data on error
-            return self._get_mock_resume_data()
+            return self._get_mock_resume_data(), None
     
     def _get_mock_resume_data(self) -> Dict[str, Any]:
         """Return mock resume data for fallback"""
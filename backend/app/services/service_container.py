@@ -0,0 +1,174 @@
+"""
+Service container holding the services shared by every request for the lifetime of the app
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+from fastapi import Request
+
+from .ai_service import AiEnhancementService
+from .batch_upload_service import EXTRACT_WORKERS, get_extraction_pool, shutdown_extraction_pool
+from .enhancement_cache import EnhancementCache, close_enhancement_cache, get_enhancement_cache
+from .pdf_service import PdfGenerationService
+from .resume_parser_service import ResumeParserService
+from .storage_service import DATA_DIR, ResumeStorageService
+from .upload_job_service import UploadJobQueue
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Start the extraction worker processes at startup instead of on the first upload
+WARM_EXTRACTION_POOL = os.getenv("WARM_EXTRACTION_POOL", "true").lower() in ("1", "true", "yes")
+
+
+class ServiceContainer:
+    """
+    Builds the application's services once at startup, warms them up, and shuts them down.
+
+    Routers receive the services through FastAPI dependencies (see get_services)
+    instead of creating their own, so the Gemini SDK is configured once, the
+    enhancement cache and extraction pool are opened once, and the upload job
+    workers share the same instances as the request handlers.
+    """
+
+    def __init__(self):
+        self.storage_service: Optional[ResumeStorageService] = None
+        self.parser_service: Optional[ResumeParserService] = None
+        self.pdf_service: Optional[PdfGenerationService] = None
+        self.enhancement_cache: Optional[EnhancementCache] = None
+        self.ai_service: Optional[AiEnhancementService] = None
+        self.extraction_pool: Optional[ProcessPoolExecutor] = None
+        self.job_queue: Optional[UploadJobQueue] = None
+
+        self.ready = False
+        self.started_at: Optional[str] = None
+        self.startup_seconds: Optional[float] = None
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    async def start(self) -> None:
+        """Build and warm up every service; the app is ready once all of them succeeded"""
+        started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+
+        await self._warm_up("storage", self._start_storage)
+        await self._warm_up("enhancement_cache", self._start_enhancement_cache)
+        await self._warm_up("ai", self._start_ai)
+        await self._warm_up("parser", self._start_parser)
+        await self._warm_up("pdf", self._start_pdf)
+        await self._warm_up("extraction_pool", self._start_extraction_pool)
+        await self._warm_up("upload_jobs", self._start_job_queue)
+
+        self.startup_seconds = round(time.perf_counter() - started, 3)
+        self.ready = all(component["ready"] for component in self.components.values())
+        logger.info(f"Services started in {self.startup_seconds}s (ready: {self.ready})")
+
+    async def stop(self) -> None:
+        """Stop accepting work, then shut the services down in reverse order of startup"""
+        self.ready = False
+        if self.job_queue is not None:
+            await self.job_queue.stop()
+        if self.extraction_pool is not None:
+            await asyncio.to_thread(shutdown_extraction_pool)
+            self.extraction_pool = None
+        if self.enhancement_cache is not None:
+            # Waits for the writer thread to apply the queued disk writes
+            await asyncio.to_thread(close_enhancement_cache)
+            self.enhancement_cache = None
+        logger.info("Services stopped")
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Return readiness, startup time and per-component warm-up results.
+
+        Returns:
+            Dict[str, Any]: Readiness details for the /ready endpoint
+        """
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "startup_seconds": self.startup_seconds,
+            "components": self.components,
+        }
+
+    async def _warm_up(self, name: str, start: Callable[[], Any]) -> None:
+        """Run one component's start-up step, recording how long it took and whether it failed"""
+        started = time.perf_counter()
+        try:
+            details = await start()
+            self.components[name] = {"ready": True, **(details or {})}
+        except Exception as e:
+            logger.error(f"Failed to start {name}: {e!r}")
+            self.components[name] = {"ready": False, "error": str(e)}
+        self.components[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _start_storage(self) -> Dict[str, Any]:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        self.storage_service = ResumeStorageService()
+        return {"data_dir": DATA_DIR}
+
+    async def _start_enhancement_cache(self) -> Dict[str, Any]:
+        # Opens the SQLite tier and creates its schema
+        self.enhancement_cache = await asyncio.to_thread(get_enhancement_cache)
+        return {"enabled": self.enhancement_cache is not None}
+
+    async def _start_ai(self) -> Dict[str, Any]:
+        # Configures the Gemini SDK once for the whole app
+        self.ai_service = AiEnhancementService(self.enhancement_cache)
+        return {"gemini_configured": self.ai_service.gemini_configured}
+
+    async def _start_parser(self) -> Dict[str, Any]:
+        self.parser_service = ResumeParserService()
+        return {"parsing_available": self.parser_service.parsing_available}
+
+    async def _start_pdf(self) -> Dict[str, Any]:
+        self.pdf_service = PdfGenerationService()
+        return {"pdf_available": self.pdf_service.pdf_available}
+
+    async def _start_extraction_pool(self) -> Dict[str, Any]:
+        self.extraction_pool = get_extraction_pool()
+        if WARM_EXTRACTION_POOL:
+            # One trivial task per worker starts every process now rather than under the first upload
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.extraction_pool, os.getpid)
+                                   for _ in range(EXTRACT_WORKERS)))
+        return {"workers": EXTRACT_WORKERS, "warmed": WARM_EXTRACTION_POOL}
+
+    async def _start_job_queue(self) -> Dict[str, Any]:
+        self.job_queue = UploadJobQueue(self.ai_service, self.storage_service, self.extraction_pool)
+        self.job_queue.start()
+        return {"workers": self.job_queue.workers}
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """FastAPI dependency returning the app's service container"""
+    return request.app.state.services
+
+
+def get_ai_service(request: Request) -> AiEnhancementService:
+    """FastAPI dependency returning the shared AI enhancement service"""
+    return get_services(request).ai_service
+
+
+def get_storage_service(request: Request) -> ResumeStorageService:
+    """FastAPI dependency returning the shared resume storage service"""
+    return get_services(request).storage_service
+
+
+def get_parser_service(request: Request) -> ResumeParserService:
+    """FastAPI dependency returning the shared resume parser service"""
+    return get_services(request).parser_service
+
+
+def get_pdf_service(request: Request) -> PdfGenerationService:
+    """FastAPI dependency returning the shared PDF generation service"""
+    return get_services(request).pdf_service
+
+
+def get_job_queue(request: Request) -> UploadJobQueue:
+    """FastAPI dependency returning the upload job queue"""
+    return get_services(request).job_queue
@@ -2,14 +2,130 @@
 Service for storing and retrieving resume data
 """
 import os
+import re
 import json
+import gzip
 import uuid
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Deque, List, Optional, Tuple, Union
+
+from ..utils.metrics import metrics
+from ..utils.tracing import traced
 
 # Path to store resume data
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 
+# Suffix of the compressed sidecar holding a resume's full extracted text
+RAW_TEXT_SUFFIX = ".txt.gz"
+
+# Top-level keys holding storage and enhancement metadata rather than resume content
+METADATA_KEYS = {
+    "id", "last_updated", "reparsed_at", "ai_enhanced", "enhancement_timestamp", "enhancement_error",
+    "enhancement_gate", "enhancement_provenance", "field_changes",
+}
+
+# List indices in a field path, e.g. the [0] and [2] of experience[0].achievements[2]
+_INDEX_PATTERN = re.compile(r"\[\d+\]")
+
+
+def flatten_fields(data: Union[Dict[str, Any], List[Any]], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten the content of a resume into leaf values keyed by field path.
+
+    Keys use the same format as AI enhancement, e.g. experience[0].achievements[1].
+    Top-level metadata keys are left out.
+
+    Args:
+        data (Union[Dict[str, Any], List[Any]]): Resume data (or a part of it)
+        prefix (str): Path of data within the resume
+
+    Returns:
+        Dict[str, Any]: Leaf values by field path
+    """
+    fields = {}
+    items = enumerate(data) if isinstance(data, list) else data.items()
+    for key, value in items:
+        if not prefix and key in METADATA_KEYS:
+            continue
+        path = f"{prefix}[{key}]" if isinstance(key, int) else (f"{prefix}.{key}" if prefix else key)
+        if isinstance(value, (dict, list)):
+            fields.update(flatten_fields(value, path))
+        else:
+            fields[path] = value
+    return fields
+
+
+def content_key(path: str, value: Any) -> Tuple[str, Any]:
+    """
+    Key identifying a field's content regardless of its position in lists.
+
+    List indices are dropped from the path and whitespace in strings is collapsed, so a
+    bullet keeps its key when bullets are inserted or removed before it.
+    """
+    if isinstance(value, str):
+        value = " ".join(value.split())
+    return _INDEX_PATTERN.sub("[]", path), value
+
+
+def match_fields(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Find the field of the previous version each field of the current version came from.
+
+    A field matches the previous field at the same path if their content is the same;
+    otherwise it matches a not yet matched previous field of the same kind with the same
+    content (e.g. a bullet that moved down when one was inserted above it).
+
+    Args:
+        previous (Dict[str, Any]): The stored version
+        current (Dict[str, Any]): The new version
+
+    Returns:
+        Dict[str, str]: Paths of unchanged (possibly moved) current fields mapped to their previous paths
+    """
+    old_fields = flatten_fields(previous)
+    new_fields = flatten_fields(current)
+
+    matches = {
+        path: path for path, value in new_fields.items()
+        if path in old_fields and content_key(path, old_fields[path]) == content_key(path, value)
+    }
+
+    unmatched: Dict[Tuple[str, Any], Deque[str]] = defaultdict(deque)
+    for path, value in old_fields.items():
+        if path not in matches:
+            unmatched[content_key(path, value)].append(path)
+    for path, value in new_fields.items():
+        if path not in matches:
+            candidates = unmatched.get(content_key(path, value))
+            if candidates:
+                matches[path] = candidates.popleft()
+    return matches
+
+
+def merge_edits(stored: Dict[str, Any], edits: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a partial edit to a stored resume.
+
+    Objects are merged key by key, so keys left out of the edit keep their stored
+    values; lists and plain values in the edit replace the stored ones.
+
+    Args:
+        stored (Dict[str, Any]): The stored resume (or a part of it)
+        edits (Dict[str, Any]): The edited fields
+
+    Returns:
+        Dict[str, Any]: A new dict with the edits applied; neither argument is modified
+    """
+    merged = dict(stored)
+    for key, value in edits.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_edits(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 class ResumeStorageService:
     """
     Service class to handle resume storage operations.
@@ -17,6 +133,8 @@ class ResumeStorageService:
     """
     
     @staticmethod
+    @metrics.tracked("pipeline_stage", stage="save_resume")
+    @traced("pipeline.save_resume", result=lambda saved: {"resume_id": saved["id"]})
     def save_resume(resume_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Save a resume to storage.
@@ -30,12 +148,47 @@ class ResumeStorageService:
         # Ensure data directory exists
         os.makedirs(DATA_DIR, exist_ok=True)
         
+        return ResumeStorageService._write_resume(resume_data, datetime.now().isoformat())
+    
+    @staticmethod
+    @metrics.tracked("pipeline_stage", stage="save_resumes")
+    @traced("pipeline.save_resumes", result=lambda saved: {"resumes": len(saved)})
+    def save_resumes(resumes: List[Dict[str, Any]],
+                     raw_texts: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Save several resumes, and their full-text sidecars, in one pass.
+        
+        The data directory is checked once and the resumes share one timestamp;
+        each resume is still written to its own file, as save_resume does.
+        
+        Args:
+            resumes (List[Dict[str, Any]]): Resume data dictionaries
+            raw_texts (Optional[List[Optional[str]]]): Full extracted text of each resume
+                (None entries, or no list at all, store no sidecar)
+            
+        Returns:
+            List[Dict[str, Any]]: The saved resumes with added metadata, in input order
+        """
+        os.makedirs(DATA_DIR, exist_ok=True)
+        
+        timestamp = datetime.now().isoformat()
+        saved = []
+        for resume_data, text in zip(resumes, raw_texts or [None] * len(resumes)):
+            saved_resume = ResumeStorageService._write_resume(resume_data, timestamp)
+            if text:
+                ResumeStorageService._write_raw_text(saved_resume["id"], text)
+            saved.append(saved_resume)
+        return saved
+    
+    @staticmethod
+    def _write_resume(resume_data: Dict[str, Any], timestamp: str) -> Dict[str, Any]:
+        """Assign an ID if needed, stamp and write one resume file (the data directory must exist)"""
         # Generate a unique ID for the resume if not provided
         if "id" not in resume_data:
             resume_data["id"] = str(uuid.uuid4())
         
         # Add timestamp
-        resume_data["last_updated"] = datetime.now().isoformat()
+        resume_data["last_updated"] = timestamp
         
         # Save the resume data to a JSON file
         filename = f"resume_{resume_data['id']}.json"
@@ -65,6 +218,40 @@ class ResumeStorageService:
         with open(filepath, "r") as f:
             return json.load(f)
     
+    @staticmethod
+    def diff_fields(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Compare two versions of a resume field by field.
+        
+        Fields are matched by content (see match_fields), so inserting a bullet only
+        reports that bullet as added and the ones after it as moved, not as modified.
+        
+        Args:
+            previous (Dict[str, Any]): The stored version
+            current (Dict[str, Any]): The new version
+            
+        Returns:
+            Dict[str, str]: Field paths that differ, mapped to 'added', 'modified', 'moved' or 'removed'
+        """
+        old_fields = flatten_fields(previous)
+        new_fields = flatten_fields(current)
+        matches = match_fields(previous, current)
+        matched_old = set(matches.values())
+        
+        changes = {}
+        for path in new_fields:
+            if path in matches:
+                if matches[path] != path:
+                    changes[path] = "moved"
+            elif path in old_fields and path not in matched_old:
+                changes[path] = "modified"
+            else:
+                changes[path] = "added"
+        # Removed fields whose path now holds a moved or added field are reported by that status
+        for path in old_fields.keys() - matched_old:
+            changes.setdefault(path, "removed")
+        return changes
+    
     @staticmethod
     def list_resumes() -> List[Dict[str, Any]]:
         """
@@ -90,3 +277,65 @@ class ResumeStorageService:
                     })
         
         return resumes
+    
+    @staticmethod
+    def save_raw_text(resume_id: str, text: str) -> str:
+        """
+        Store the full extracted text of a resume in a compressed sidecar file.
+        
+        Args:
+            resume_id (str): ID of the resume the text belongs to
+            text (str): The full extracted text
+            
+        Returns:
+            str: Path of the sidecar file
+        """
+        os.makedirs(DATA_DIR, exist_ok=True)
+        
+        return ResumeStorageService._write_raw_text(resume_id, text)
+    
+    @staticmethod
+    def _write_raw_text(resume_id: str, text: str) -> str:
+        """Write a full-text sidecar atomically (the data directory must exist)"""
+        filepath = os.path.join(DATA_DIR, f"resume_{resume_id}{RAW_TEXT_SUFFIX}")
+        tmp_path = f"{filepath}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(text)
+        os.replace(tmp_path, filepath)
+        
+        return filepath
+    
+    @staticmethod
+    def get_raw_text(resume_id: str) -> Optional[str]:
+        """
+        Retrieve the full extracted text of a resume.
+        
+        Args:
+            resume_id (str): ID of the resume
+            
+        Returns:
+            Optional[str]: The stored text or None if no sidecar exists
+        """
+        filepath = os.path.join(DATA_DIR, f"resume_{resume_id}{RAW_TEXT_SUFFIX}")
+        
+        if not os.path.exists(filepath):
+            return None
+        
+        with gzip.open(filepath, "rt", encoding="utf-8") as f:
+            return f.read()
+    
+    @staticmethod
+    def list_resume_ids_with_raw_text() -> List[str]:
+        """
+        List the IDs of all resumes that have a stored full-text sidecar.
+        
+        Returns:
+            List[str]: Resume IDs, sorted
+        """
+        os.makedirs(DATA_DIR, exist_ok=True)
+        
+        return sorted(
+            filename[len("resume_"):-len(RAW_TEXT_SUFFIX)]
+            for filename in os.listdir(DATA_DIR)
+            if filename.startswith("resume_") and filename.endswith(RAW_TEXT_SUFFIX)
+        )
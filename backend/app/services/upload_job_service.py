@@ -0,0 +1,507 @@
+"""
+Service for processing uploaded resumes as background jobs with progress tracking
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from .ai_service import AiEnhancementService
+from .batch_upload_service import get_extraction_pool, run_extraction
+from .storage_service import DATA_DIR, ResumeStorageService
+from ..utils.metrics import metrics
+from ..utils.profiling import (
+    activate, current_session, deactivate, finish_session, profiled, start_session_when_free
+)
+from ..utils.tracing import current_context, resumed, span
+from ..utils.upload_spool import SpooledUpload
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Jobs processed at the same time
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "4"))
+
+# Jobs allowed to wait for a worker; further uploads are refused until the queue drains
+UPLOAD_JOB_QUEUE_SIZE = int(os.getenv("UPLOAD_JOB_QUEUE_SIZE", "100"))
+
+# How long finished jobs stay available for polling
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", "3600"))
+
+# Directory holding every job's state, shared by all worker processes (and hosts, if it is on shared storage)
+UPLOAD_JOB_STATE_DIR = os.getenv("UPLOAD_JOB_STATE_DIR", os.path.join(DATA_DIR, "jobs"))
+
+# How often a worker process that does not own a job re-reads its state while streaming its events
+UPLOAD_JOB_POLL_SECONDS = float(os.getenv("UPLOAD_JOB_POLL_SECONDS", "0.5"))
+
+# How often the owning worker process rewrites the state of its unfinished jobs, as a heartbeat
+UPLOAD_JOB_HEARTBEAT_SECONDS = float(os.getenv("UPLOAD_JOB_HEARTBEAT_SECONDS", "10"))
+
+# Unfinished jobs whose state has not been written for this long are reported as failed (owner died)
+UPLOAD_JOB_STALE_SECONDS = float(os.getenv("UPLOAD_JOB_STALE_SECONDS", "60"))
+
+# Stages reported for every job, in order
+JOB_STAGES = ["queued", "parsed", "enhanced", "saved"]
+
+# Statuses after which a job no longer changes
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Job IDs are uuid4 hex strings; anything else is never looked up on disk
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobQueueFullError(Exception):
+    """Raised when an upload job cannot be queued because the queue is full"""
+
+
+class UploadJob:
+    """
+    State of one upload job.
+
+    Every stage transition is appended to the job's event list; listeners wait on
+    `changed`, which is replaced after each update so each update wakes them once.
+    """
+
+    def __init__(self, spooled: SpooledUpload):
+        self.id = uuid.uuid4().hex
+        self.spooled = spooled
+        self.status = "queued"
+        self.stage = "queued"
+        self.resume_id: Optional[str] = None
+        self.ai_enhanced: Optional[bool] = None
+        self.error: Optional[str] = None
+        # Profile the job too when the request that submitted it is being profiled
+        self.profile = current_session() is not None
+        # The job's spans continue the submitting request's trace
+        self.trace_context = current_context()
+        self.created_at = datetime.now().isoformat()
+        self.finished_monotonic: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.changed = asyncio.Event()
+        self.persist_lock = asyncio.Lock()
+        self._started = time.perf_counter()
+        self.record("queued")
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has succeeded or failed"""
+        return self.status in FINISHED_STATUSES
+
+    def record(self, stage: str, **details: Any) -> None:
+        """
+        Move the job to a stage and notify listeners.
+
+        Args:
+            stage (str): One of JOB_STAGES, or "failed"
+            **details: Extra fields included in the progress event
+        """
+        self.stage = stage
+        if stage == "saved":
+            self.status = "succeeded"
+        elif stage == "failed":
+            self.status = "failed"
+        elif stage != "queued":
+            self.status = "running"
+        if self.finished:
+            self.finished_monotonic = time.monotonic()
+
+        self.events.append({
+            "stage": stage,
+            "status": self.status,
+            "at": datetime.now().isoformat(),
+            "elapsed": round(time.perf_counter() - self._started, 4),
+            **details,
+        })
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job's public state"""
+        return {
+            "job_id": self.id,
+            "filename": self.spooled.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "resume_id": self.resume_id,
+            "ai_enhanced": self.ai_enhanced,
+            "error": self.error,
+            "created_at": self.created_at,
+            "events": list(self.events),
+        }
+
+
+class JobStateStore:
+    """
+    Job states as JSON files, so that every worker process can answer for every job.
+
+    Only the process running a job writes its file (atomically, on every stage
+    change and every heartbeat); any process can read it. An unfinished job whose
+    file has not been written for stale_seconds belonged to a process that died,
+    and is marked failed when it is read. Blocking file access, so call it from a thread.
+    """
+
+    def __init__(self, directory: str = UPLOAD_JOB_STATE_DIR, stale_seconds: float = UPLOAD_JOB_STALE_SECONDS):
+        self.directory = directory
+        self.stale_seconds = stale_seconds
+
+    def _path(self, job_id: str) -> str:
+        """Path of a job's state file"""
+        return os.path.join(self.directory, f"job_{job_id}.json")
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """
+        Write a job's state, replacing the previous one, and stamp it with `updated_at`.
+
+        Args:
+            state (Dict[str, Any]): The job's public state, as returned by UploadJob.to_dict
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(state["job_id"])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({**state, "updated_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    def is_stale(self, state: Dict[str, Any]) -> bool:
+        """Whether an unfinished job's owner has stopped writing its state"""
+        if state.get("status") in FINISHED_STATUSES:
+            return False
+        try:
+            updated_at = datetime.fromisoformat(state.get("updated_at") or state["created_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return (datetime.now() - updated_at).total_seconds() > self.stale_seconds
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a job's state.
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            Optional[Dict[str, Any]]: The job's public state, or None if unknown or expired
+        """
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id), "r") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if self.is_stale(state):
+            state = self._fail_stale(state)
+        return state
+
+    def _fail_stale(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark a stale job failed, and save that so it is pruned like any finished job"""
+        logger.warning(f"Upload job {state['job_id']} stopped at stage {state.get('stage')}: "
+                       f"its state was not updated for {self.stale_seconds}s")
+        error = "The worker process running the job stopped before it finished"
+        state = {
+            **state,
+            "status": "failed",
+            "stage": "failed",
+            "error": error,
+            "events": state.get("events", []) + [{
+                "stage": "failed",
+                "status": "failed",
+                "at": datetime.now().isoformat(),
+                "failed_stage": state.get("stage"),
+                "error": error,
+            }],
+        }
+        try:
+            self.save(state)
+        except OSError as e:
+            logger.warning(f"Could not save the state of upload job {state['job_id']}: {e}")
+        return state
+
+    def prune(self, ttl_seconds: int) -> int:
+        """
+        Delete the state of finished (or stale) jobs last updated more than ttl_seconds ago.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        cutoff = time.time() - ttl_seconds
+        deleted = 0
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith("job_") and filename.endswith(".json")):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                with open(path, "r") as f:
+                    state = json.load(f)
+                if state.get("status") in FINISHED_STATUSES or self.is_stale(state):
+                    os.remove(path)
+                    deleted += 1
+            except (OSError, ValueError):
+                continue
+        return deleted
+
+
+class UploadJobQueue:
+    """
+    Bounded queue of upload jobs served by a fixed pool of async workers.
+
+    Extraction runs in the shared extraction process pool, AI enhancement on the
+    event loop (bounded by the global Gemini semaphore) and storage writes in a
+    thread, so the HTTP request that submitted a job can return immediately.
+
+    Each job runs in the worker process that accepted it, and its state is written
+    to a JobStateStore after every stage and every UPLOAD_JOB_HEARTBEAT_SECONDS, so
+    status and event requests are answered by whichever process receives them, and
+    jobs of a process that died are reported as failed once their state goes stale.
+    """
+
+    def __init__(
+        self,
+        ai_service: AiEnhancementService,
+        storage_service: ResumeStorageService,
+        extraction_pool: Optional[ProcessPoolExecutor] = None,
+        workers: int = UPLOAD_JOB_WORKERS,
+        queue_size: int = UPLOAD_JOB_QUEUE_SIZE,
+        ttl_seconds: int = UPLOAD_JOB_TTL_SECONDS,
+        store: Optional[JobStateStore] = None,
+    ):
+        self.ai_service = ai_service
+        self.storage_service = storage_service
+        self.extraction_pool = extraction_pool or get_extraction_pool()
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.ttl_seconds = ttl_seconds
+        self.store = store or JobStateStore()
+        # Jobs accepted by this process
+        self.jobs: Dict[str, UploadJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the workers on the running event loop (no-op if already running)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"Started {self.workers} upload job workers (queue size {self.queue_size})")
+
+    async def stop(self) -> None:
+        """Cancel the workers and fail the jobs that did not finish"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        for job in self.jobs.values():
+            if not job.finished:
+                job.spooled.cleanup()
+                job.error = "Server shut down before the job finished"
+                job.record("failed", error=job.error)
+                await self._persist(job)
+
+    async def submit(self, spooled: SpooledUpload) -> UploadJob:
+        """
+        Queue a spooled upload for processing. The job takes ownership of the file.
+
+        Args:
+            spooled (SpooledUpload): The spooled resume file
+
+        Returns:
+            UploadJob: The queued job
+
+        Raises:
+            JobQueueFullError: If the queue is full
+        """
+        self.start()
+        self._prune()
+        job = UploadJob(spooled)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics.increment("upload_jobs_total", result="refused")
+            raise JobQueueFullError(f"Upload job queue is full ({self.queue_size} jobs waiting)")
+        self.jobs[job.id] = job
+        metrics.increment("upload_jobs_total", result="queued")
+        # Visible to the other worker processes before the ID is handed out
+        await self._persist(job)
+        return job
+
+    async def get_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a job's public state, whichever worker process runs it.
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            Optional[Dict[str, Any]]: The job's state, or None if unknown or expired
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return await asyncio.to_thread(self.store.load, job_id)
+
+    async def follow(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a job's progress events, starting with those already recorded,
+        until its final event.
+
+        Jobs of this process are followed as they change; jobs of another worker
+        process are followed by re-reading their state every UPLOAD_JOB_POLL_SECONDS,
+        which ends with a failed event if that process stops updating it.
+
+        Args:
+            job_id (str): ID of the job to follow
+
+        Yields:
+            Dict[str, Any]: Progress events
+        """
+        sent = 0
+        job = self.jobs.get(job_id)
+        if job is not None:
+            while True:
+                changed = job.changed
+                while sent < len(job.events):
+                    yield job.events[sent]
+                    sent += 1
+                if job.finished:
+                    return
+                await changed.wait()
+
+        while True:
+            state = await asyncio.to_thread(self.store.load, job_id)
+            if state is None:
+                return
+            for event in state["events"][sent:]:
+                yield event
+            sent = len(state["events"])
+            if state["status"] in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(UPLOAD_JOB_POLL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counts per status, for the jobs of this worker process"""
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": statuses,
+        }
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the TTL, and delete expired job states in the background"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished and job.finished_monotonic < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+        if expired:
+            asyncio.get_running_loop().run_in_executor(None, self.store.prune, self.ttl_seconds)
+
+    async def _persist(self, job: UploadJob) -> None:
+        """Write a job's current state to the shared store"""
+        try:
+            # The state is taken under the lock, so the last write always holds the latest state
+            async with job.persist_lock:
+                await asyncio.to_thread(self.store.save, job.to_dict())
+        except OSError as e:
+            logger.warning(f"Could not save the state of upload job {job.id}: {e}")
+
+    async def _heartbeat(self) -> None:
+        """Rewrite the state of unfinished jobs regularly, so other processes can tell this one is alive"""
+        while True:
+            await asyncio.sleep(UPLOAD_JOB_HEARTBEAT_SECONDS)
+            for job in list(self.jobs.values()):
+                if not job.finished:
+                    await self._persist(job)
+
+    async def _worker(self) -> None:
+        """Process queued jobs one at a time"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: UploadJob) -> None:
+        """Run the job, under a profiler of its own when its request was profiled"""
+        session = await start_session_when_free(job.id) if job.profile else None
+        if session is None:
+            await self._process(job)
+            return
+        token = activate(session)
+        try:
+            await self._process(job)
+        finally:
+            deactivate(token)
+            session.stop()
+            await asyncio.to_thread(finish_session, session, "upload_job")
+
+    async def _process(self, job: UploadJob) -> None:
+        """Run the job's stages in a span continuing the submitting request's trace"""
+        with resumed(job.trace_context), span("upload_job", job_id=job.id, input_bytes=job.spooled.size,
+                                                file_type=job.spooled.file_type) as job_span:
+            await self._run_stages(job)
+            job_span.set("status", job.status)
+
+    async def _run_stages(self, job: UploadJob) -> None:
+        """Run extract -> parse -> enhance -> summarize -> save for one job"""
+        spooled = job.spooled
+        stage = "parse"
+        try:
+            with metrics.timer("upload_job_seconds", stage="parse"):
+                parsed, text = await run_extraction(self.extraction_pool, spooled.path, spooled.filename)
+            job.record("parsed")
+            await self._persist(job)
+
+            stage = "enhance"
+            with metrics.timer("upload_job_seconds", stage="enhance"):
+                enhanced = await self.ai_service.enhance_resume_with_summary_async(parsed)
+            job.ai_enhanced = enhanced.get("ai_enhanced", False)
+            job.record("enhanced", ai_enhanced=job.ai_enhanced)
+            await self._persist(job)
+
+            enhanced["original_filename"] = spooled.filename
+            enhanced["file_size"] = spooled.size
+            enhanced["file_type"] = spooled.file_type
+            enhanced["file_sha256"] = spooled.sha256
+
+            stage = "save"
+            with metrics.timer("upload_job_seconds", stage="save"):
+                saved = await asyncio.to_thread(profiled(self._save), enhanced, text)
+            job.resume_id = saved["id"]
+            job.record("saved", resume_id=job.resume_id)
+            await self._persist(job)
+            metrics.increment("upload_jobs_total", result="succeeded")
+            logger.info(f"Upload job {job.id} saved {spooled.filename} as resume {job.resume_id}")
+        except Exception as e:
+            logger.error(f"Upload job {job.id} failed during {stage} of {spooled.filename}: {e}")
+            job.error = str(e)
+            job.record("failed", failed_stage=stage, error=job.error)
+            await self._persist(job)
+            metrics.increment("upload_jobs_total", result="failed")
+        finally:
+            spooled.cleanup()
+
+    def _save(self, enhanced: Dict[str, Any], text: Optional[str]) -> Dict[str, Any]:
+        """Save the enhanced resume and its full-text sidecar"""
+        saved = self.storage_service.save_resume(enhanced)
+        if text:
+            self.storage_service.save_raw_text(saved["id"], text)
+        return saved
+
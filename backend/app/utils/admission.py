@@ -0,0 +1,223 @@
+"""
+Utility for admission control: per endpoint class concurrency limits with bounded wait queues
+"""
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Deque, List, Optional, Pattern, Tuple
+
+from .fast_json import FastJSONResponse
+from .metrics import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Turn admission control off entirely (every request is admitted at once)
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+
+# Longest Retry-After (seconds) suggested to a shed client
+ADMISSION_MAX_RETRY_AFTER = int(os.getenv("ADMISSION_MAX_RETRY_AFTER", "60"))
+
+# Per endpoint class: (concurrent requests, waiting requests, longest wait in seconds), per worker
+# process. Each can be overridden with ADMISSION_<CLASS>_CONCURRENCY, _QUEUE and _MAX_WAIT;
+# a concurrency of 0 leaves the class unlimited
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "upload": (8, 16, 10.0),
+    "ai": (16, 32, 10.0),
+    "pdf": (4, 16, 5.0),
+    "storage_read": (64, 128, 2.0),
+}
+
+# (method, path pattern, endpoint class); requests matching none are not limited
+ENDPOINT_CLASSES: List[Tuple[str, Pattern, str]] = [
+    ("POST", re.compile(r"^/api/upload-resumes?$"), "upload"),
+    ("POST", re.compile(r"^/api/ai-enhance(-batch|/stream)?$"), "ai"),
+    ("POST", re.compile(r"^/api/resume/[^/]+/enhance$"), "ai"),
+    ("POST", re.compile(r"^/api/generate-pdf$"), "pdf"),
+    ("GET", re.compile(r"^/api/resume/[^/]+/pdf$"), "pdf"),
+    ("GET", re.compile(r"^/api/resumes?(/[^/]+)?$"), "storage_read"),
+]
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, endpoint_class: str, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"{endpoint_class} requests are over capacity ({reason}), retry in {retry_after}s")
+        self.endpoint_class = endpoint_class
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one endpoint class.
+
+    Up to concurrency requests run at once. Further requests wait in arrival order
+    for a slot, at most queue_size of them; a request arriving to a full queue is
+    shed at once with 429, and one that waits longer than max_wait is shed with 503.
+    A released slot is handed straight to the oldest waiter, so latecomers cannot
+    overtake the queue.
+
+    Used from the event loop only, so no lock is needed.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float):
+        """
+        Args:
+            name (str): Endpoint class, used as the metrics label
+            concurrency (int): Requests allowed to run at once (0 or less disables the limit)
+            queue_size (int): Requests allowed to wait for a slot
+            max_wait (float): Longest a request may wait for a slot, in seconds
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = max(0, queue_size)
+        self.max_wait = max_wait
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._avg_hold = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the class is limited at all"""
+        return self.concurrency > 0
+
+    def _update_gauges(self) -> None:
+        """Publish the running and waiting request counts"""
+        metrics.set_gauge("admission_in_flight", self._active, endpoint_class=self.name)
+        metrics.set_gauge("admission_queue_depth", len(self._waiters), endpoint_class=self.name)
+
+    def _retry_after(self) -> int:
+        """Estimate in whole seconds when a slot will be free, from the queue length and hold times"""
+        estimate = self._avg_hold * (len(self._waiters) + 1) / self.concurrency
+        return max(1, min(ADMISSION_MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def _shed(self, reason: str, status_code: int) -> AdmissionRejectedError:
+        """Count a shed request and build the error for it"""
+        metrics.increment("admission_shed_total", endpoint_class=self.name, reason=reason)
+        return AdmissionRejectedError(self.name, reason, status_code, self._retry_after())
+
+    async def acquire(self) -> None:
+        """
+        Wait (without blocking the event loop) for a slot.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or the wait exceeds max_wait
+        """
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._shed("queue_full", 429)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._shed("wait_timeout", 503) from None
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the client went away
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+        metrics.observe("admission_wait_seconds", time.perf_counter() - start, endpoint_class=self.name)
+
+    def release(self, held: float) -> None:
+        """
+        Free a slot, handing it to the oldest waiter if there is one.
+
+        Args:
+            held (float): Seconds the slot was held
+        """
+        self._avg_hold = held if not self._avg_hold else 0.8 * self._avg_hold + 0.2 * held
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot moves to the waiter, so the running count stays the same
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self._active -= 1
+        self._update_gauges()
+
+
+def build_limiters() -> Dict[str, AdmissionLimiter]:
+    """Create a limiter per endpoint class from DEFAULT_LIMITS and the environment"""
+    limiters = {}
+    for name, (concurrency, queue_size, max_wait) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        limiters[name] = AdmissionLimiter(
+            name,
+            concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+            queue_size=int(os.getenv(f"{prefix}_QUEUE", str(queue_size))),
+            max_wait=float(os.getenv(f"{prefix}_MAX_WAIT", str(max_wait))),
+        )
+    return limiters
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Return the endpoint class of a request, or None if it is not limited"""
+    for class_method, pattern, name in ENDPOINT_CLASSES:
+        if method == class_method and pattern.match(path):
+            return name
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting requests per endpoint class, or shedding them fast.
+
+    Requests are classified by method and path before the body is read, so a shed
+    upload costs nothing beyond its headers. The slot is held until the response
+    (including a streamed one) has been sent. Shed requests get a JSON error with a
+    Retry-After header; running and waiting requests per class are exported as
+    admission_in_flight and admission_queue_depth, shed requests as admission_shed_total.
+    """
+
+    def __init__(self, app: Callable, limiters: Optional[Dict[str, AdmissionLimiter]] = None):
+        self.app = app
+        self.limiters = limiters if limiters is not None else build_limiters()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_class = classify(scope["method"], scope["path"])
+        limiter = self.limiters.get(endpoint_class) if endpoint_class else None
+        if limiter is None or not limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except AdmissionRejectedError as e:
+            logger.info(f"Shed {scope['method']} {scope['path']}: {e}")
+            response = FastJSONResponse(
+                status_code=e.status_code,
+                content={"detail": str(e)},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
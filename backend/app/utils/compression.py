@@ -0,0 +1,146 @@
+"""
+Middleware compressing response bodies with brotli or gzip above a size threshold
+"""
+import gzip
+import os
+from typing import Any, Callable, Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+
+from .lazy_import import import_module, module_available
+from .metrics import metrics
+
+# Compress responses at all
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Bodies smaller than this (bytes) are sent as they are: the saving would not pay for the work
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# gzip level (1-9) and brotli quality (0-11); the defaults trade a little ratio for much less CPU
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Content types that are already compressed (or are event streams) are never compressed
+SKIPPED_CONTENT_TYPES = (
+    "application/pdf", "application/zip", "application/gzip", "image/", "audio/", "video/", "text/event-stream",
+)
+
+# brotli is optional; without it only gzip is offered
+BROTLI_AVAILABLE = module_available("brotli")
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a body with the given content coding.
+
+    Args:
+        body (bytes): The uncompressed body
+        encoding (str): 'br' or 'gzip'
+
+    Returns:
+        bytes: The compressed body
+    """
+    if encoding == "br":
+        return import_module("brotli").compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding for a request's Accept-Encoding header.
+
+    Brotli is preferred when it is installed and accepted, then gzip; codings
+    the client gives q=0 are never picked.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header value
+
+    Returns:
+        Optional[str]: 'br', 'gzip', or None to send the body as it is
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in (("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete response bodies of at least COMPRESSION_MIN_SIZE bytes.
+
+    Only responses sent in one body message are compressed. Streamed responses
+    (NDJSON batch results, server-sent events, PDF downloads) pass through
+    untouched, so their chunks still reach the client as soon as they are produced.
+    """
+
+    def __init__(self, app: Callable, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # The start message is held back until the first body message shows whether to compress
+        start_message: Optional[Dict[str, Any]] = None
+
+        async def send_compressed(message: Dict[str, Any]) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if message.get("more_body") or len(body) < self.minimum_size or not self._compressible(headers):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            if len(compressed) >= len(body):
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            metrics.increment("http_compression_input_bytes_total", len(body), encoding=encoding)
+            metrics.increment("http_compression_output_bytes_total", len(compressed), encoding=encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(headers: MutableHeaders) -> bool:
+        """Whether a response's headers allow compressing its body"""
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(SKIPPED_CONTENT_TYPES)
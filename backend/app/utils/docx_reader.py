@@ -0,0 +1,97 @@
+"""
+Utility for streaming text out of DOCX files without loading the whole document
+"""
+import zipfile
+from typing import BinaryIO, Iterator, List, Union
+from xml.etree.ElementTree import iterparse
+
+# Part of the package holding the main document body
+DOCUMENT_PART = "word/document.xml"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+_PARAGRAPH = _W + "p"
+_TEXT = _W + "t"
+_TAB = _W + "tab"
+_BREAKS = (_W + "br", _W + "cr")
+_CELL = _W + "tc"
+_TABLE = _W + "tbl"
+_FALLBACK = _MC + "Fallback"
+
+
+def iter_docx_blocks(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Stream the text blocks of a DOCX file in reading order.
+
+    Only ``word/document.xml`` is read from the archive, incrementally, so
+    embedded media parts are never decompressed. Paragraphs outside tables
+    are yielded one by one; each table cell is yielded as a single block
+    (its paragraphs joined by newlines), row by row.
+
+    Args:
+        source (Union[str, BinaryIO]): Path or seekable binary stream of the DOCX file
+
+    Yields:
+        str: Non-empty text blocks
+    """
+    with zipfile.ZipFile(source) as archive:
+        with archive.open(DOCUMENT_PART) as document:
+            paragraphs: List[List[str]] = []  # stack, paragraphs can nest via text boxes
+            cells: List[List[str]] = []  # stack, cells can nest via nested tables
+            fallback_depth = 0
+
+            for event, elem in iterparse(document, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    if tag == _PARAGRAPH:
+                        paragraphs.append([])
+                    elif tag == _CELL:
+                        cells.append([])
+                    elif tag == _FALLBACK:
+                        # Alternate content fallbacks duplicate the preferred choice
+                        fallback_depth += 1
+                    continue
+
+                if tag == _TEXT:
+                    if paragraphs and not fallback_depth and elem.text:
+                        paragraphs[-1].append(elem.text)
+                elif tag == _TAB:
+                    if paragraphs and not fallback_depth:
+                        paragraphs[-1].append("\t")
+                elif tag in _BREAKS:
+                    if paragraphs and not fallback_depth:
+                        paragraphs[-1].append("\n")
+                elif tag == _FALLBACK:
+                    fallback_depth -= 1
+                elif tag == _PARAGRAPH:
+                    text = "".join(paragraphs.pop()).strip()
+                    if text and not fallback_depth:
+                        if cells:
+                            cells[-1].append(text)
+                        else:
+                            yield text
+                    elem.clear()
+                elif tag == _CELL:
+                    text = "\n".join(cells.pop())
+                    if text:
+                        if cells:
+                            cells[-1].append(text)
+                        else:
+                            yield text
+                    elem.clear()
+                elif tag == _TABLE:
+                    elem.clear()
+
+
+def extract_docx_text(source: Union[str, BinaryIO]) -> str:
+    """
+    Extract all text from a DOCX file, one block per line.
+
+    Args:
+        source (Union[str, BinaryIO]): Path or seekable binary stream of the DOCX file
+
+    Returns:
+        str: The extracted text
+    """
+    return "".join(block + "\n" for block in iter_docx_blocks(source))
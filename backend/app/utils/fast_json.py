@@ -0,0 +1,59 @@
+"""
+Utility for serializing API responses quickly, with orjson when it is installed
+"""
+import json
+import logging
+import os
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from .lazy_import import import_module, module_available
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Serialize with orjson when it is installed; false falls back to the standard library encoder
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+_orjson = import_module("orjson") if FAST_JSON and module_available("orjson") else None
+if FAST_JSON and _orjson is None:
+    logger.info("orjson is not installed, serializing responses with the json module")
+
+
+def _default(value: Any) -> Any:
+    """Convert what orjson cannot serialize natively (Decimal, sets, Pydantic models...)"""
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content as compact UTF-8 JSON.
+
+    With orjson this is several times faster than json.dumps and skips the
+    intermediate str; without it the output matches Starlette's JSONResponse.
+
+    Args:
+        content (Any): JSON-compatible content
+
+    Returns:
+        bytes: The encoded JSON
+    """
+    if _orjson is not None:
+        return _orjson.dumps(content, default=_default, option=_orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def dumps_str(content: Any) -> str:
+    """Like dumps, but return a str (for server-sent event and NDJSON lines)"""
+    return dumps(content).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps; the app's default response class"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
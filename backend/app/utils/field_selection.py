@@ -0,0 +1,56 @@
+"""
+Utility for trimming response bodies to the fields a client asked for with fields=
+"""
+from typing import Dict, Any, Optional
+
+# Allowed characters of a fields= value: comma-separated, dot-separated key paths
+FIELDS_PATTERN = r"^[A-Za-z0-9_.,\s]*$"
+
+
+def _field_tree(fields: str) -> Dict[str, Any]:
+    """
+    Turn 'a,b.c,b.d' into {'a': None, 'b': {'c': None, 'd': None}}.
+
+    None marks a key selected whole; selecting a key whole overrides paths below it.
+    """
+    tree: Dict[str, Any] = {}
+    for path in filter(None, (part.strip() for part in fields.split(","))):
+        node = tree
+        *parents, leaf = path.split(".")
+        for key in parents:
+            if key in node and node[key] is None:
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[leaf] = None
+    return tree
+
+
+def _select(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the keys in tree, applying it to every item of a list"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _select(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def select_fields(data: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    """
+    Return only the requested fields of a response body.
+
+    Paths are dot-separated keys; a path through a list applies to each of its
+    items, e.g. 'parsed_resume.experience.position'. Unknown paths are ignored.
+
+    Args:
+        data (Dict[str, Any]): The full response body
+        fields (Optional[str]): Comma-separated paths, or None/empty for everything
+
+    Returns:
+        Dict[str, Any]: The trimmed body
+    """
+    if not fields or not fields.strip():
+        return data
+    return _select(data, _field_tree(fields))
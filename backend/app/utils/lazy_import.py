@@ -0,0 +1,107 @@
+"""
+Utility for probing optional libraries without importing them and importing them on first use
+"""
+import importlib
+import importlib.util
+import logging
+import sys
+import time
+from typing import Any, Dict, Iterator, Mapping
+
+from .metrics import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_probe_cache: Dict[str, bool] = {}
+
+
+def module_available(name: str) -> bool:
+    """
+    Check whether a module can be imported, without importing it.
+
+    Only the import system's finders are consulted (importlib.util.find_spec), so
+    the check costs a few filesystem lookups rather than the library's import time.
+    Parent packages of a dotted name are imported, so probe the top-level package
+    where that matters.
+
+    Args:
+        name (str): Dotted module name, e.g. 'pdfplumber' or 'google.generativeai'
+
+    Returns:
+        bool: True if the module is installed
+    """
+    available = _probe_cache.get(name)
+    if available is None:
+        try:
+            available = importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            # A missing parent package raises instead of returning None
+            available = False
+        _probe_cache[name] = available
+    return available
+
+
+def import_module(name: str) -> Any:
+    """
+    Import a module on first use, recording how long the first import took.
+
+    Args:
+        name (str): Dotted module name
+
+    Returns:
+        Any: The module
+    """
+    if name in sys.modules:
+        # importlib.import_module also waits for an import still running in another thread
+        return importlib.import_module(name)
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    metrics.observe("lazy_import_seconds", elapsed, module=name)
+    logger.info(f"Imported {name} on first use in {elapsed * 1000:.0f} ms")
+    return module
+
+
+class LazyModules(Mapping):
+    """
+    Read-only mapping of optional libraries that are installed, imported on first access.
+
+    Keys are probed with module_available when the mapping is created, so
+    `name in modules` and iteration never import anything. Values are given as
+    'module' or 'module:attribute' (e.g. 'docx:Document').
+    """
+
+    def __init__(self, specs: Dict[str, str]):
+        self._specs = {key: spec for key, spec in specs.items() if module_available(spec.split(":", 1)[0])}
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._loaded.get(key)
+        if value is None:
+            value = self._load(key)
+        return value
+
+    def _load(self, key: str) -> Any:
+        """Import one library and remember it"""
+        module_name, _, attribute = self._specs[key].partition(":")
+        value = import_module(module_name)
+        if attribute:
+            value = getattr(value, attribute)
+        self._loaded[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._specs
+
+    def load_all(self) -> None:
+        """Import every installed library now, e.g. before forking so workers share them"""
+        for key in self._specs:
+            if key not in self._loaded:
+                self._load(key)
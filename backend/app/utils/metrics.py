@@ -0,0 +1,351 @@
+"""
+Utility for collecting in-process counters, gauges and timings, and exporting them to Prometheus
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Histogram bucket upper bounds (seconds) used for every metric whose name ends in _seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    """Build a hashable, order-independent key from label values"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_series(name: str, key: LabelKey) -> str:
+    """Format a metric name and its labels as name{label="value"}"""
+    if not key:
+        return name
+    labels = ",".join(f'{label}="{value}"' for label, value in key)
+    return f"{name}{{{labels}}}"
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _prometheus_series(name: str, key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Format a series in the Prometheus text format, optionally with one more label (e.g. le)"""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return name
+    labels = ",".join(f'{label}="{_escape_label(value)}"' for label, value in pairs)
+    return f"{name}{{{labels}}}"
+
+
+def _prometheus_value(value: float) -> str:
+    """Format a sample value, writing whole numbers without a fraction"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry for counters, gauges and timing summaries.
+    Kept deliberately small so recording stays cheap on the request path: an
+    observation is a dictionary update and, for histograms, a bisect over the
+    bucket bounds, all under one lock.
+    """
+
+    def __init__(self):
+        """Initialize empty metric stores"""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._timings: Dict[str, Dict[LabelKey, Dict[str, Any]]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+
+    def set_buckets(self, name: str, buckets: Sequence[float]) -> None:
+        """
+        Export a metric recorded with observe as a histogram with these bucket bounds.
+
+        Metrics whose name ends in _seconds use LATENCY_BUCKETS unless set here;
+        any other observed metric is exported as a summary (count and sum only).
+
+        Args:
+            name (str): Metric name
+            buckets (Sequence[float]): Upper bounds of the buckets, in increasing order
+        """
+        with self._lock:
+            self._buckets[name] = tuple(sorted(buckets))
+
+    def _bounds(self, name: str) -> Optional[Tuple[float, ...]]:
+        """Return the histogram bucket bounds of a metric, or None if it has none"""
+        bounds = self._buckets.get(name)
+        if bounds is None and name.endswith("_seconds"):
+            bounds = LATENCY_BUCKETS
+        return bounds
+
+    def increment(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Metric name
+            amount (float): Amount to add
+            **labels: Label values identifying the series
+        """
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Record a single observation (e.g. a duration in seconds).
+
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            **labels: Label values identifying the series
+        """
+        self._observe(name, _label_key(labels), value)
+
+    def _observe(self, name: str, key: LabelKey, value: float) -> None:
+        """Record an observation for an already built label key"""
+        with self._lock:
+            series = self._timings.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = {"count": 0, "sum": 0.0, "max": value}
+                bounds = self._bounds(name)
+                if bounds is not None:
+                    # One count per bucket plus +Inf; made cumulative when exported
+                    summary["buckets"] = [0] * (len(bounds) + 1)
+                    summary["bounds"] = bounds
+            summary["count"] += 1
+            summary["sum"] += value
+            if value > summary["max"]:
+                summary["max"] = value
+            if "buckets" in summary:
+                summary["buckets"][bisect_left(summary["bounds"], value)] += 1
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Set a gauge to a value.
+
+        Args:
+            name (str): Metric name
+            value (float): Current value
+            **labels: Label values identifying the series
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def add_gauge(self, name: str, amount: float, **labels: Any) -> None:
+        """
+        Add to (or, with a negative amount, subtract from) a gauge.
+
+        Args:
+            name (str): Metric name
+            amount (float): Amount to add
+            **labels: Label values identifying the series
+        """
+        self._add_gauge(name, _label_key(labels), amount)
+
+    def _add_gauge(self, name: str, key: LabelKey, amount: float) -> None:
+        """Add to a gauge for an already built label key"""
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Record the wall-clock duration of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def track(self, name: str, **labels: Any) -> Iterator[None]:
+        """
+        Count the enclosed block in the {name}_in_flight gauge and time it in {name}_seconds.
+
+        Args:
+            name (str): Metric name prefix, e.g. 'pipeline_stage'
+            **labels: Label values identifying the series
+        """
+        gauge, timing, key = f"{name}_in_flight", f"{name}_seconds", _label_key(labels)
+        self._add_gauge(gauge, key, 1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_gauge(gauge, key, -1)
+            self._observe(timing, key, time.perf_counter() - start)
+
+    def tracked(self, name: str, **labels: Any) -> Callable[[Callable], Callable]:
+        """
+        Decorator applying track to every call of a function or coroutine function.
+
+        Args:
+            name (str): Metric name prefix, e.g. 'pipeline_stage'
+            **labels: Label values identifying the series
+        """
+        # Names and label key are built once here rather than on every call
+        gauge, timing, key = f"{name}_in_flight", f"{name}_seconds", _label_key(labels)
+
+        def decorate(func: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    self._add_gauge(gauge, key, 1)
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self._add_gauge(gauge, key, -1)
+                        self._observe(timing, key, time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self._add_gauge(gauge, key, 1)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._add_gauge(gauge, key, -1)
+                    self._observe(timing, key, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        """Return the current value of a counter series (0 if never incremented)"""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Any]:
+        """
+        Return a JSON-serializable copy of all metrics.
+
+        Args:
+            prefix (str): Only include metrics whose name starts with this prefix
+
+        Returns:
+            Dict[str, Any]: Counters and timing summaries keyed by series name
+        """
+        with self._lock:
+            counters = {
+                _format_series(name, key): value
+                for name, series in self._counters.items() if name.startswith(prefix)
+                for key, value in series.items()
+            }
+            timings = {}
+            for name, series in self._timings.items():
+                if not name.startswith(prefix):
+                    continue
+                for key, summary in series.items():
+                    timings[_format_series(name, key)] = {
+                        "count": int(summary["count"]),
+                        "sum": round(summary["sum"], 6),
+                        "avg": round(summary["sum"] / summary["count"], 6),
+                        "max": round(summary["max"], 6),
+                    }
+        return {"counters": counters, "timings": timings}
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        Return the raw counters and timings and clear them.
+
+        Worker processes of a process pool record into their own registry; the
+        task ships the drained metrics back so the parent can merge them.
+
+        Returns:
+            Dict[str, Any]: Picklable counters and timings, for merge
+        """
+        with self._lock:
+            drained = {"counters": self._counters, "timings": self._timings}
+            self._counters = {}
+            self._timings = {}
+        return drained
+
+    def merge(self, drained: Dict[str, Any]) -> None:
+        """
+        Add metrics drained from another registry (see drain) to this one.
+
+        Args:
+            drained (Dict[str, Any]): The result of drain in another process
+        """
+        with self._lock:
+            for name, series in drained["counters"].items():
+                own = self._counters.setdefault(name, {})
+                for key, value in series.items():
+                    own[key] = own.get(key, 0.0) + value
+            for name, series in drained["timings"].items():
+                own = self._timings.setdefault(name, {})
+                for key, summary in series.items():
+                    mine = own.get(key)
+                    if mine is None:
+                        own[key] = dict(summary)
+                        if "buckets" in summary:
+                            own[key]["buckets"] = list(summary["buckets"])
+                        continue
+                    mine["count"] += summary["count"]
+                    mine["sum"] += summary["sum"]
+                    mine["max"] = max(mine["max"], summary["max"])
+                    if "buckets" in mine and mine.get("bounds") == summary.get("bounds"):
+                        mine["buckets"] = [a + b for a, b in zip(mine["buckets"], summary["buckets"])]
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+
+        Counters and gauges are exported as they are. Observed metrics with buckets
+        become histograms, the rest summaries; both carry _count and _sum.
+
+        Returns:
+            str: The exposition text
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in self._counters[name].items():
+                    lines.append(f"{_prometheus_series(name, key)} {_prometheus_value(value)}")
+            for name in sorted(self._gauges):
+                lines.append(f"# TYPE {name} gauge")
+                for key, value in self._gauges[name].items():
+                    lines.append(f"{_prometheus_series(name, key)} {_prometheus_value(value)}")
+            for name in sorted(self._timings):
+                series = self._timings[name]
+                histogram = all("buckets" in summary for summary in series.values())
+                lines.append(f"# TYPE {name} {'histogram' if histogram else 'summary'}")
+                for key, summary in series.items():
+                    if histogram:
+                        cumulative = 0
+                        bounds = list(summary["bounds"]) + [math.inf]
+                        for bound, count in zip(bounds, summary["buckets"]):
+                            cumulative += count
+                            le = ("le", _prometheus_value(float(bound)))
+                            lines.append(f"{_prometheus_series(name + '_bucket', key, le)} {cumulative}")
+                    lines.append(f"{_prometheus_series(name + '_sum', key)} {_prometheus_value(summary['sum'])}")
+                    lines.append(f"{_prometheus_series(name + '_count', key)} {int(summary['count'])}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded metrics"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Process-wide registry shared by all services
+metrics = MetricsRegistry()
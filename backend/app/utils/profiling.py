@@ -0,0 +1,302 @@
+"""
+Utility for profiling individual requests on demand with cProfile
+"""
+import asyncio
+import cProfile
+import functools
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from .metrics import metrics
+from .tracing import current_request_id
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Shared secret: a request sent with a matching X-Profile-Token header is profiled (unset disables the header)
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+
+# Share of requests (0-1) profiled at random; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+# Directory the .prof files are written to
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "profiles"),
+)
+
+# Request header carrying the admin token, and response header naming the profile
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+REQUEST_ID_HEADER = b"x-request-id"
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_-]+")
+
+# Only one session at a time per process: cProfile hooks the event loop thread, so it
+# sees every coroutine running there, and two sessions would record each other's work
+_session_lock = threading.Lock()
+
+_active_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class _RawStats:
+    """Stats recorded by another profiler, in the shape pstats.Stats loads"""
+
+    def __init__(self, stats: Dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def raw_stats(profiler: cProfile.Profile) -> Dict[Any, Any]:
+    """
+    Stop a profiler and return its raw stats.
+
+    The result is a plain, picklable dictionary, so worker processes can send it
+    back with their task's result for ProfileSession.add.
+
+    Args:
+        profiler (cProfile.Profile): The profiler to stop
+
+    Returns:
+        Dict[Any, Any]: The profiler's stats
+    """
+    profiler.disable()
+    profiler.create_stats()
+    return profiler.stats
+
+
+class ProfileSession:
+    """
+    Profile of one request: the event loop thread, plus the work it offloads.
+
+    Work offloaded to threads (see profiled) and to worker processes is profiled
+    separately and merged in when the profile is written.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.time()
+        self._profiler = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._offloaded: List[Dict[Any, Any]] = []
+
+    def start(self) -> None:
+        """Start profiling the calling thread (the event loop)"""
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        """Stop profiling the event loop thread"""
+        self._profiler.disable()
+
+    def add(self, stats: Dict[Any, Any]) -> None:
+        """
+        Merge stats recorded in another thread or process into this profile.
+
+        Args:
+            stats (Dict[Any, Any]): Stats returned by raw_stats
+        """
+        with self._lock:
+            self._offloaded.append(stats)
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Call a function in the current (worker) thread under a profiler of its own"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(raw_stats(profiler))
+
+    def save(self, route: str) -> str:
+        """
+        Write the merged profile as a .prof file (load it with pstats, snakeviz or flameprof).
+
+        Args:
+            route (str): Route template or job kind the profile is tagged with
+
+        Returns:
+            str: Path of the written file
+        """
+        stats = pstats.Stats(self._profiler)
+        with self._lock:
+            offloaded, self._offloaded = self._offloaded, []
+        for recorded in offloaded:
+            stats.add(_RawStats(recorded))
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        timestamp = datetime.fromtimestamp(self.started).strftime("%Y%m%dT%H%M%S")
+        tag = _SAFE_NAME.sub("_", route).strip("_") or "root"
+        path = os.path.join(PROFILE_DIR, f"{timestamp}_{tag}_{self.request_id}.prof")
+        if os.path.exists(path):
+            # Client-supplied request ids can repeat
+            path = f"{path[:-len('.prof')]}_{uuid.uuid4().hex[:8]}.prof"
+        stats.dump_stats(path)
+        return path
+
+
+def start_session(request_id: str) -> Optional[ProfileSession]:
+    """
+    Start profiling for the current task, unless another session is running in this process.
+
+    Args:
+        request_id (str): Id the profile is tagged with
+
+    Returns:
+        Optional[ProfileSession]: The running session, or None if profiling is busy
+    """
+    if not _session_lock.acquire(blocking=False):
+        metrics.increment("profiles_total", result="busy")
+        return None
+    session = ProfileSession(request_id)
+    session.start()
+    return session
+
+
+async def start_session_when_free(request_id: str, timeout: float = 5.0) -> Optional[ProfileSession]:
+    """
+    Like start_session, but wait (without blocking the event loop) for a running session to finish.
+
+    Used by upload jobs, whose submitting request is usually still being profiled
+    when the job starts.
+
+    Args:
+        request_id (str): Id the profile is tagged with
+        timeout (float): Longest wait in seconds
+
+    Returns:
+        Optional[ProfileSession]: The running session, or None if profiling stayed busy
+    """
+    deadline = time.monotonic() + timeout
+    while _session_lock.locked() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return start_session(request_id)
+
+
+def finish_session(session: ProfileSession, route: str) -> Optional[str]:
+    """
+    Stop a session, write its profile and let the next session start.
+
+    Args:
+        session (ProfileSession): The session returned by start_session
+        route (str): Route template or job kind the profile is tagged with
+
+    Returns:
+        Optional[str]: Path of the profile, or None if it could not be written
+    """
+    session.stop()
+    try:
+        path = session.save(route)
+        metrics.increment("profiles_total", result="written")
+        logger.info(f"Wrote profile of {route} ({session.request_id}) to {path}")
+        return path
+    except Exception as e:
+        metrics.increment("profiles_total", result="error")
+        logger.error(f"Failed to write profile of {route} ({session.request_id}): {e}")
+        return None
+    finally:
+        _session_lock.release()
+
+
+def current_session() -> Optional[ProfileSession]:
+    """Return the profile session of the current request or job, if it is being profiled"""
+    return _active_session.get()
+
+
+def activate(session: Optional[ProfileSession]):
+    """Make a session current for this task (and the threads and tasks it starts); returns a reset token"""
+    return _active_session.set(session)
+
+
+def deactivate(token) -> None:
+    """Undo activate"""
+    _active_session.reset(token)
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Wrap a function that is offloaded to a thread so its work shows up in the request's profile.
+
+    asyncio.to_thread copies the caller's context into the thread, so the wrapper
+    finds the session there; without one it just calls the function.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _active_session.get()
+        if session is None:
+            return func(*args, **kwargs)
+        return session.run(func, *args, **kwargs)
+    return wrapper
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests an admin asks for, or a random sample.
+
+    A request is profiled when it carries an X-Profile-Token header matching
+    PROFILE_ADMIN_TOKEN, or at random with probability PROFILE_SAMPLE_RATE. The
+    profile is written to PROFILE_DIR, tagged with the route template and the
+    request id (X-Request-ID, or a generated one), which is echoed in X-Profile-Id.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        trigger = self._trigger(headers)
+        session = start_session(self._request_id(headers)) if trigger else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        metrics.increment("profiles_total", result="started", trigger=trigger)
+        profile_id = session.request_id.encode()
+
+        async def send_with_profile_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (PROFILE_ID_HEADER, profile_id)]
+            await send(message)
+
+        token = activate(session)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            deactivate(token)
+            session.stop()
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            await asyncio.to_thread(finish_session, session, route)
+
+    @staticmethod
+    def _trigger(headers: Dict[bytes, bytes]) -> Optional[str]:
+        """Return why this request should be profiled ('header' or 'sample'), or None"""
+        token = headers.get(PROFILE_TOKEN_HEADER)
+        if token is not None and PROFILE_ADMIN_TOKEN and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN.encode()):
+            return "header"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    @staticmethod
+    def _request_id(headers: Dict[bytes, bytes]) -> str:
+        """Use the request id set by the tracing middleware, else the caller's X-Request-ID or a new id"""
+        request_id = current_request_id() or headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if request_id and len(request_id) <= 64 and not _SAFE_NAME.search(request_id):
+            return request_id
+        return uuid.uuid4().hex
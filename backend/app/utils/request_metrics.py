@@ -0,0 +1,47 @@
+"""
+Middleware recording request counts, latency and in-flight requests per route
+"""
+import time
+from typing import Any, Callable, Dict
+
+from .metrics import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests per route, method and status.
+
+    Requests are labelled with the path template of the route that handled them
+    (e.g. /api/resumes/{resume_id}), so ids never create new series; requests
+    that match no route are labelled 'unmatched'. Written as plain ASGI rather
+    than BaseHTTPMiddleware so a request costs a few registry updates and no
+    extra task.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.add_gauge("http_requests_in_flight", 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.add_gauge("http_requests_in_flight", -1)
+            # The router adds the matched route to the (shared) scope
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.increment("http_requests_total", method=method, route=route, status=status)
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start, method=method, route=route)
@@ -0,0 +1,298 @@
+"""
+Utility for protecting calls to an upstream service: rate limiting, retry backoff and circuit breaking
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+from .metrics import metrics
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a call would have to wait longer than allowed for rate-limit capacity"""
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Return a jittered exponential backoff delay ("full jitter").
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        base (float): Delay ceiling for the first retry, in seconds
+        cap (float): Maximum delay ceiling, in seconds
+
+    Returns:
+        float: Seconds to wait, uniformly drawn from [0, min(cap, base * 2 ** attempt)]
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at rate_per_minute up to burst. A caller that finds
+    the bucket empty reserves the next token and sleeps until it is due, so waiting
+    callers are served in arrival order; callers that would wait longer than
+    max_wait are rejected instead.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, max_wait: float):
+        """
+        Args:
+            name (str): Label used for this limiter's metrics
+            rate_per_minute (float): Sustained call rate (0 or less disables limiting)
+            burst (int): Bucket capacity, i.e. calls allowed back to back after idling
+            max_wait (float): Longest a caller may wait for a token, in seconds
+        """
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > self.max_wait:
+                metrics.increment("rate_limiter_rejected_total", limiter=self.name)
+                raise RateLimitExceededError(
+                    f"Rate limit for {self.name} exceeded (next slot in {wait:.1f}s)"
+                )
+            self._tokens -= 1
+        if wait:
+            metrics.increment("rate_limiter_delayed_total", limiter=self.name)
+            metrics.observe("rate_limiter_wait_seconds", wait, limiter=self.name)
+        return wait
+
+    def acquire(self) -> None:
+        """
+        Block until a token is available.
+
+        Raises:
+            RateLimitExceededError: If the wait would exceed max_wait
+        """
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """
+        Wait without blocking the event loop until a token is available.
+
+        Raises:
+            RateLimitExceededError: If the wait would exceed max_wait
+        """
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def refund(self) -> None:
+        """Hand back a token taken for a call that was then not made"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+        metrics.increment("rate_limiter_refunded_total", limiter=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the limiter configuration and counters.
+
+        Returns:
+            Dict[str, Any]: Rate, burst, available tokens, delayed and rejected calls
+        """
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "available_tokens": round(tokens, 2) if self.rate > 0 else None,
+            "delayed": int(metrics.get_counter("rate_limiter_delayed_total", limiter=self.name)),
+            "rejected": int(metrics.get_counter("rate_limiter_rejected_total", limiter=self.name)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Closed: calls pass and consecutive failures are counted. After failure_threshold
+    failures the circuit opens and calls are rejected immediately. Once
+    reset_timeout has passed it goes half-open and lets a single probe call
+    through; the probe's outcome closes or re-opens the circuit. A probe that ends
+    without an outcome (cancelled, or never sent) must be given up with attempt()'s
+    cleanup, or the circuit would stay half-open with a probe that never finishes.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        """
+        Args:
+            name (str): Label used for this breaker's metrics
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Numbers the probes, so a finished caller can only give up its own probe
+        self._probe_id = 0
+        self._lock = threading.Lock()
+
+    def _admit(self) -> Tuple[bool, int]:
+        """Return whether a call may proceed, and its probe number if it is the half-open probe (else 0)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True, 0
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_id += 1
+                return True, self._probe_id
+        metrics.increment("circuit_breaker_rejected_total", breaker=self.name)
+        return False, 0
+
+    def allow(self) -> bool:
+        """
+        Return whether a call may proceed now.
+        In the half-open state only the first caller is let through as the probe;
+        prefer attempt(), which also gives the probe up if the call never reports back.
+        """
+        return self._admit()[0]
+
+    def check(self) -> None:
+        """
+        Raise if a call may not proceed now.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with a probe already running)
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    def raise_if_open(self) -> None:
+        """
+        Raise if the circuit is open, without claiming the half-open probe.
+        Lets a caller fail fast before spending anything else (e.g. a rate-limit token) on a call.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and not yet due for a probe
+        """
+        if self.state == self.OPEN:
+            metrics.increment("circuit_breaker_rejected_total", breaker=self.name)
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    @contextmanager
+    def attempt(self, on_reject: Optional[Callable[[], None]] = None) -> Iterator[None]:
+        """
+        Run the enclosed call through the breaker.
+
+        The block is expected to call record_success or record_failure. If it is the
+        half-open probe and exits any other way (cancellation, a client disconnect,
+        an error that says nothing about the upstream), the probe is given up so the
+        next call can probe instead.
+
+        Args:
+            on_reject (Optional[Callable[[], None]]): Called before raising when the call is
+                rejected, e.g. to hand back a rate-limit token taken for it
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with a probe already running)
+        """
+        allowed, probe = self._admit()
+        if not allowed:
+            if on_reject is not None:
+                on_reject()
+            raise CircuitOpenError(f"Circuit for {self.name} is open")
+        try:
+            yield
+        finally:
+            if probe:
+                self._release_probe(probe)
+
+    def _release_probe(self, probe: int) -> None:
+        """Give up a probe that ended without an outcome, unless the breaker has moved on since"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probe_in_flight and self._probe_id == probe:
+                self._probe_in_flight = False
+                metrics.increment("circuit_breaker_probes_abandoned_total", breaker=self.name)
+
+    def record_success(self) -> None:
+        """Record that the upstream answered; closes a half-open circuit"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record an upstream failure; opens the circuit at the threshold or when a probe fails"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        """Move to a new state (lock held)"""
+        self._state = state
+        metrics.increment("circuit_breaker_transitions_total", breaker=self.name, state=state)
+
+    @property
+    def state(self) -> str:
+        """Current state, reporting an open circuit past its timeout as half-open"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the breaker state and counters.
+
+        Returns:
+            Dict[str, Any]: State, consecutive failures, seconds until a probe is allowed,
+            times opened and calls rejected
+        """
+        state = self.state
+        with self._lock:
+            retry_in: Optional[float] = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+            failures = self._failures
+        return {
+            "state": state,
+            "consecutive_failures": failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_seconds": retry_in,
+            "times_opened": int(metrics.get_counter("circuit_breaker_transitions_total", breaker=self.name, state=self.OPEN)),
+            "rejected": int(metrics.get_counter("circuit_breaker_rejected_total", breaker=self.name)),
+        }
@@ -0,0 +1,114 @@
+"""
+Utility for coalescing concurrent identical calls into a single in-flight call
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+
+class _SyncCall:
+    """State of an in-flight synchronous call shared by its waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it is in flight wait for it and share its result or exception. Once the
+    call finishes the key is released, so later calls run again (caching is left
+    to the caller).
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Label used for this group's metrics
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self._calls: Dict[Hashable, _SyncCall] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run an async call once per key among concurrent callers.
+
+        The shared call runs as its own task, so a waiter being cancelled (e.g. a
+        client disconnecting) does not cancel the call for everyone else.
+
+        Args:
+            key (Hashable): Identity of the call
+            fn (Callable[[], Awaitable[T]]): Starts the call; only invoked by the leader
+
+        Returns:
+            T: The shared result
+        """
+        task_key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            metrics.increment("singleflight_calls_total", group=self.name, role="leader")
+            task = asyncio.ensure_future(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        else:
+            metrics.increment("singleflight_calls_total", group=self.name, role="coalesced")
+        return await asyncio.shield(task)
+
+    def do_sync(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run a blocking call once per key among concurrent threads.
+
+        Args:
+            key (Hashable): Identity of the call
+            fn (Callable[[], T]): Performs the call; only invoked by the leader
+
+        Returns:
+            T: The shared result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _SyncCall()
+
+        if not leader:
+            metrics.increment("singleflight_calls_total", group=self.name, role="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.increment("singleflight_calls_total", group=self.name, role="leader")
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return how many calls were executed and how many were saved by coalescing.
+
+        Returns:
+            Dict[str, int]: Leader calls, coalesced calls and calls currently in flight
+        """
+        return {
+            "executed": int(metrics.get_counter("singleflight_calls_total", group=self.name, role="leader")),
+            "coalesced": int(metrics.get_counter("singleflight_calls_total", group=self.name, role="coalesced")),
+            "in_flight": len(self._tasks) + len(self._calls),
+        }
@@ -0,0 +1,103 @@
+"""
+Utility for estimating prompt sizes and keeping AI inputs and outputs within per-section token budgets
+"""
+import math
+import os
+import re
+from typing import Dict, List, Tuple
+
+# Average characters per token for English prose (Gemini's tokenizer lands close to 4)
+CHARS_PER_TOKEN = 4.0
+
+# Enforce the budgets below (inputs over budget are condensed before they reach the model)
+TOKEN_BUDGETS_ENABLED = os.getenv("AI_TOKEN_BUDGETS", "true").lower() in ("1", "true", "yes")
+
+# Multiplier applied to every budget, to loosen or tighten them without editing the table
+TOKEN_BUDGET_SCALE = float(os.getenv("AI_TOKEN_BUDGET_SCALE", "1.0"))
+
+# Upper bound for max_output_tokens on any single call (batched prompts add up their fields)
+MAX_OUTPUT_TOKENS = int(os.getenv("AI_MAX_OUTPUT_TOKENS", "8192"))
+
+# (input tokens, output tokens) per section; the summary_generation entry covers the summary context
+SECTION_TOKEN_BUDGETS: Dict[str, Tuple[int, int]] = {
+    "summary": (400, 250),
+    "experience": (600, 350),
+    "education": (300, 200),
+    "skills": (250, 150),
+    "projects": (500, 300),
+    "certifications": (200, 120),
+    "summary_generation": (1200, 300),
+}
+DEFAULT_TOKEN_BUDGET = (400, 250)
+
+# Sentence or bullet boundaries used when condensing text
+_SEGMENT_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text without calling the model.
+
+    Args:
+        text (str): The text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def section_budget(section: str) -> Tuple[int, int]:
+    """
+    Return the (input, output) token budget for a section.
+
+    Args:
+        section (str): Resume section or call type (e.g. 'experience', 'summary_generation')
+
+    Returns:
+        Tuple[int, int]: Input and output token budgets
+    """
+    input_budget, output_budget = SECTION_TOKEN_BUDGETS.get(section.strip().lower(), DEFAULT_TOKEN_BUDGET)
+    return int(input_budget * TOKEN_BUDGET_SCALE), int(output_budget * TOKEN_BUDGET_SCALE)
+
+
+def _segment_score(segment: str) -> int:
+    """Rank a sentence for keeping: quantified results carry the most information in a resume"""
+    return len(re.findall(r"\d", segment)) + 3 * segment.count("%") + 2 * len(re.findall(r"[$€£]", segment))
+
+
+def condense_text(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Shrink a text to fit a token budget without a model call.
+
+    Sentences and bullet lines are kept extractively: the first one always (it usually
+    names the role or topic), then the highest-scoring remaining ones (those with
+    figures), in their original order. If the text is still too long it is cut at
+    a word boundary.
+
+    Args:
+        text (str): The text to condense
+        max_tokens (int): Token budget
+
+    Returns:
+        Tuple[str, bool]: The text within budget, and whether it was changed
+    """
+    if not TOKEN_BUDGETS_ENABLED or estimate_tokens(text) <= max_tokens:
+        return text, False
+
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    segments: List[str] = [segment.strip() for segment in _SEGMENT_SPLIT.split(text) if segment.strip()]
+    if len(segments) > 1:
+        ranked = sorted(range(1, len(segments)), key=lambda i: (-_segment_score(segments[i]), i))
+        keep = {0}
+        used = len(segments[0])
+        for index in ranked:
+            if used + 1 + len(segments[index]) <= max_chars:
+                keep.add(index)
+                used += 1 + len(segments[index])
+        text = " ".join(segments[i] for i in sorted(keep))
+
+    if len(text) > max_chars:
+        cut = text[:max_chars]
+        text = cut.rsplit(" ", 1)[0] if " " in cut else cut
+    return text.strip(), True
@@ -0,0 +1,545 @@
+"""
+Utility for tracing requests through the pipeline as nested spans, logged as JSON and optionally exported as OTLP
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Union
+
+from .lazy_import import import_module
+from .metrics import metrics
+
+# Setup logging
+logger = logging.getLogger(__name__)
+span_logger = logging.getLogger("app.trace")
+
+# Log format: 'text' (default) or 'json' (one object per line carrying the request id, trace id and span id)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Log every finished span (on by default with LOG_FORMAT=json)
+TRACE_LOG_SPANS = os.getenv("TRACE_LOG_SPANS", str(LOG_FORMAT == "json")).lower() in ("1", "true", "yes")
+
+# Span exporter: 'none', 'file' (OTLP/JSON, one export request per line) or 'otlp' (OTLP/HTTP JSON to a collector)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_EXPORT_FILE = os.getenv(
+    "TRACE_EXPORT_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "traces.jsonl"),
+)
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+
+# Spans per export, seconds between exports, and spans held while the exporter catches up (more are dropped)
+TRACE_EXPORT_BATCH_SIZE = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", "256"))
+TRACE_EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "2"))
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "10000"))
+
+# service.name resource attribute of exported spans
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "resumeforge-api")
+
+# Spans are only built when something consumes them; request ids are always tracked
+TRACING_ENABLED = TRACE_LOG_SPANS or TRACE_EXPORTER != "none"
+
+REQUEST_ID_HEADER = b"x-request-id"
+TRACEPARENT_HEADER = b"traceparent"
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# OTLP span kinds
+_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span (or just a request id) carried to another task, job or process"""
+    trace_id: Optional[str]
+    span_id: Optional[str]
+    request_id: Optional[str]
+
+
+class Span:
+    """
+    One timed operation of a trace, with attributes such as sizes and counts.
+
+    Spans are created through span(), traced() or start_span() and emitted when
+    they end: logged as JSON when TRACE_LOG_SPANS is set, and queued for the
+    exporter when TRACE_EXPORTER is set.
+    """
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "request_id",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional[Union["Span", SpanContext]] = None, kind: str = "internal",
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = (parent.trace_id if parent is not None else None) or os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.request_id = _request_id.get()
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Set one attribute"""
+        self.attributes[key] = value
+
+    def set_many(self, attributes: Dict[str, Any]) -> None:
+        """Set several attributes"""
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        """Mark the span as failed"""
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        """End the span and emit it (ending twice has no effect)"""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            _emit(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end_ns or time.time_ns()) - self.start_ns) / 1e6, 3)
+
+    def to_log(self) -> Dict[str, Any]:
+        """The span as a JSON log entry"""
+        entry = {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span in the OTLP/JSON encoding"""
+        attributes = dict(self.attributes)
+        if self.request_id:
+            attributes["request.id"] = self.request_id
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled"""
+
+    trace_id = span_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def set_many(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Union[Span, SpanContext]]] = ContextVar("current_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Set in worker processes: finished spans are collected here and shipped back instead of emitted
+_collected_spans: ContextVar[Optional[List[Span]]] = ContextVar("collected_spans", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Encode an attribute value as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def current_request_id() -> Optional[str]:
+    """Return the id of the request (or job) being handled, if any"""
+    return _request_id.get()
+
+
+def current_context() -> Optional[SpanContext]:
+    """
+    Capture the current span and request id to continue the trace elsewhere.
+
+    Returns:
+        Optional[SpanContext]: The context to pass to resumed() or collecting_spans(), or None
+    """
+    current = _current_span.get()
+    request_id = _request_id.get()
+    if current is None or current.trace_id is None:
+        return SpanContext(None, None, request_id) if request_id else None
+    return SpanContext(current.trace_id, current.span_id, request_id)
+
+
+def start_span(name: str, kind: str = "internal", **attributes: Any) -> Union[Span, _NoopSpan]:
+    """
+    Start a child of the current span without making it current; call end() on it.
+
+    Meant for code where a context manager cannot wrap the work, such as an async
+    generator that may be finished from another task.
+    """
+    if not TRACING_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, _current_span.get(), kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+    """
+    Run the enclosed block as a child span of the current one.
+
+    Args:
+        name (str): Span name, e.g. 'pipeline.extract_text'
+        kind (str): 'internal', 'server' or 'client'
+        **attributes: Initial attributes
+    """
+    if not TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+    current = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None,
+           result: Optional[Callable[[Any], Dict[str, Any]]] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator running every call of a function or coroutine function in a span.
+
+    Args:
+        name (str): Span name
+        attributes (Optional[Callable[..., Dict[str, Any]]]): Builds attributes from the call's arguments
+        result (Optional[Callable[[Any], Dict[str, Any]]]): Builds attributes from the return value
+    """
+    def decorate(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not TRACING_ENABLED:
+                    return await func(*args, **kwargs)
+                with span(name, **(attributes(*args, **kwargs) if attributes else {})) as current:
+                    value = await func(*args, **kwargs)
+                    if result:
+                        current.set_many(result(value))
+                    return value
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return func(*args, **kwargs)
+            with span(name, **(attributes(*args, **kwargs) if attributes else {})) as current:
+                value = func(*args, **kwargs)
+                if result:
+                    current.set_many(result(value))
+                return value
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def resumed(context: Optional[SpanContext]) -> Iterator[None]:
+    """
+    Continue a trace captured with current_context, e.g. in a background job.
+
+    Spans started inside become children of the captured span, and logs carry
+    the captured request id.
+    """
+    if context is None:
+        yield
+        return
+    request_token = _request_id.set(context.request_id)
+    span_token = _current_span.set(context if context.trace_id else None)
+    try:
+        yield
+    finally:
+        _current_span.reset(span_token)
+        _request_id.reset(request_token)
+
+
+@contextmanager
+def collecting_spans(context: Optional[SpanContext]) -> Iterator[List[Span]]:
+    """
+    In a worker process: continue the caller's trace and collect finished spans instead of emitting them.
+
+    Send the collected spans back with the task's result and pass them to
+    record_spans in the calling process.
+    """
+    collected: List[Span] = []
+    token = _collected_spans.set(collected)
+    try:
+        with resumed(context):
+            yield collected
+    finally:
+        _collected_spans.reset(token)
+
+
+def record_spans(spans: List[Span]) -> None:
+    """Emit spans collected in a worker process"""
+    for finished in spans:
+        _emit(finished)
+
+
+def _emit(finished: Span) -> None:
+    """Log and export a finished span"""
+    collected = _collected_spans.get()
+    if collected is not None:
+        collected.append(finished)
+        return
+    if TRACE_LOG_SPANS:
+        span_logger.info(f"{finished.name} finished in {finished.duration_ms} ms", extra={"span": finished.to_log()})
+    if _exporter is not None:
+        _exporter.submit(finished)
+
+
+class SpanExporter:
+    """
+    Exports finished spans as OTLP/JSON from a background thread, in batches.
+
+    The 'file' exporter appends one ExportTraceServiceRequest per line to
+    TRACE_EXPORT_FILE; the 'otlp' exporter posts it to an OTLP/HTTP collector
+    (TRACE_OTLP_ENDPOINT). Spans are dropped, and counted, when the queue is full.
+    """
+
+    def __init__(self, target: str, batch_size: int = TRACE_EXPORT_BATCH_SIZE,
+                 interval: float = TRACE_EXPORT_INTERVAL, queue_size: int = TRACE_EXPORT_QUEUE_SIZE):
+        self.target = target
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue_size = queue_size
+        self._pid: Optional[int] = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, finished: Span) -> None:
+        """Queue a span for export"""
+        if self._pid != os.getpid():
+            # First span in this process (or in a forked worker): start the export thread here
+            self._start()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            metrics.increment("trace_spans_dropped_total", exporter=self.target)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Export what is queued and stop the export thread"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+            self._pid = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._export(batch)
+            elif self._stopping.is_set():
+                return
+
+    def _take_batch(self) -> List[Span]:
+        """Wait up to the export interval for spans, then take up to a batch of them"""
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(timeout, 0.25)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _export(self, batch: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}},
+                                            {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+                "scopeSpans": [{"scope": {"name": "resumeforge"}, "spans": [s.to_otlp() for s in batch]}],
+            }]
+        }
+        try:
+            if self.target == "file":
+                os.makedirs(os.path.dirname(TRACE_EXPORT_FILE) or ".", exist_ok=True)
+                with open(TRACE_EXPORT_FILE, "a") as f:
+                    f.write(json.dumps(payload) + "\n")
+            else:
+                response = import_module("httpx").post(TRACE_OTLP_ENDPOINT, json=payload, timeout=5.0)
+                response.raise_for_status()
+            metrics.increment("trace_spans_exported_total", len(batch), exporter=self.target, result="ok")
+        except Exception as e:
+            metrics.increment("trace_spans_exported_total", len(batch), exporter=self.target, result="error")
+            logger.warning(f"Exporting {len(batch)} spans to {self.target} failed: {e}")
+
+
+_exporter: Optional[SpanExporter] = SpanExporter(TRACE_EXPORTER) if TRACE_EXPORTER in ("file", "otlp") else None
+if TRACE_EXPORTER not in ("none", "file", "otlp"):
+    logger.warning(f"Unknown TRACE_EXPORTER {TRACE_EXPORTER!r}, spans are not exported")
+
+
+def shutdown_tracing() -> None:
+    """Flush and stop the span exporter"""
+    if _exporter is not None:
+        _exporter.shutdown()
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats log records as one JSON object per line, with the request id and current trace ids"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = _request_id.get()
+        if request_id:
+            entry["request_id"] = request_id
+        finished = getattr(record, "span", None)
+        if finished is not None:
+            entry["span"] = finished
+        else:
+            current = _current_span.get()
+            if current is not None and current.trace_id is not None:
+                entry["trace_id"] = current.trace_id
+                entry["span_id"] = current.span_id
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging() -> None:
+    """Switch the root and uvicorn log handlers to JSON lines when LOG_FORMAT=json"""
+    if LOG_FORMAT != "json":
+        return
+    formatter = JsonLogFormatter()
+    root = logging.getLogger()
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler())
+    for name in (None, "uvicorn", "uvicorn.error", "uvicorn.access"):
+        for handler in logging.getLogger(name).handlers:
+            handler.setFormatter(formatter)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware giving every request an id and a root server span.
+
+    The request id comes from a well-formed X-Request-ID header or is generated,
+    and is returned in X-Request-ID. A W3C traceparent header makes the request's
+    span a child of the caller's span.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if not _SAFE_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request_token = _request_id.set(request_id)
+
+        parent = None
+        match = _TRACEPARENT.match(headers.get(TRACEPARENT_HEADER, b"").decode("latin-1"))
+        if match:
+            parent = SpanContext(match.group(1), match.group(2), request_id)
+        span_token = _current_span.set(parent)
+
+        method = scope["method"]
+        server_span = start_span(f"{method} {scope['path']}", kind="server", **{
+            "http.method": method,
+            "http.target": scope["path"],
+        })
+        if isinstance(server_span, Span):
+            _current_span.set(server_span)
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit():
+            server_span.set("http.request_content_length", int(content_length))
+
+        status = 500
+        response_bytes = 0
+
+        async def send_with_request_id(message: Dict[str, Any]) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode())]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except BaseException as e:
+            server_span.record_error(e)
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if isinstance(server_span, Span):
+                if route:
+                    server_span.name = f"{method} {route}"
+                    server_span.set("http.route", route)
+                server_span.set("http.status_code", status)
+                server_span.set("http.response_body_bytes", response_bytes)
+            server_span.end()
+            _current_span.reset(span_token)
+            _request_id.reset(request_token)
@@ -0,0 +1,112 @@
+"""
+Middleware rejecting oversized upload requests before their body is read
+"""
+import logging
+import re
+from typing import Dict, Any, Callable, List, Optional, Pattern, Tuple
+
+from starlette.exceptions import HTTPException
+
+from .fast_json import FastJSONResponse
+from .metrics import metrics
+from .upload_spool import MAX_BATCH_UPLOAD_BYTES, MAX_UPLOAD_BYTES, too_large_message
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Allowance for multipart boundaries and headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# (method, path pattern, largest accepted request body in bytes, 413 message); other requests are not limited
+BODY_LIMITS: List[Tuple[str, Pattern, int, str]] = [
+    ("POST", re.compile(r"^/api/upload-resume$"), MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+     too_large_message(MAX_UPLOAD_BYTES)),
+    # Batches (including zip archives) are limited as a whole; each file is still held to MAX_UPLOAD_BYTES
+    ("POST", re.compile(r"^/api/upload-resumes$"), MAX_BATCH_UPLOAD_BYTES,
+     too_large_message(MAX_BATCH_UPLOAD_BYTES, "Batch")),
+]
+
+
+def _too_large(detail: str) -> HTTPException:
+    """Build the 413 error for an oversized upload"""
+    return HTTPException(
+        status_code=413,
+        detail=detail
+    )
+
+
+def body_limit(method: str, path: str) -> Optional[Tuple[int, str]]:
+    """Return the largest body accepted for a request and the message for a larger one, or None if it is not limited"""
+    for limit_method, pattern, limit, detail in BODY_LIMITS:
+        if method == limit_method and pattern.match(path):
+            return limit, detail
+    return None
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing BODY_LIMITS while the request body arrives.
+
+    A declared Content-Length over the limit is answered with 413 straight away,
+    without reading any of the body. Otherwise every chunk passed to the app is
+    counted, and receiving stops with a 413 as soon as the total passes the limit,
+    so a chunked or mis-declared body is never spooled in full by the form parser.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        matched = body_limit(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        limit, detail = matched
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, "content_length", _too_large(detail))
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised into the body parser; the route turns it into the 413 response
+                    raise _too_large(detail)
+            return message
+
+        async def track_send(message: Dict[str, Any]) -> None:
+            nonlocal response_started
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, track_send)
+        except HTTPException as e:
+            # Only reached if the error escaped the app before anything was sent
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(scope, receive, send, "body", e)
+            return
+        if received > limit:
+            metrics.increment("upload_size_rejected_total", check="body")
+            logger.info(f"Rejected {scope['method']} {scope['path']}: body passed {limit} bytes")
+
+    @staticmethod
+    async def _reject(scope: Dict[str, Any], receive: Callable, send: Callable, check: str,
+                      error: HTTPException) -> None:
+        """Send the 413 response for a request over its limit"""
+        metrics.increment("upload_size_rejected_total", check=check)
+        logger.info(f"Rejected {scope['method']} {scope['path']}: {error.detail}")
+        response = FastJSONResponse(
+            status_code=error.status_code,
+            content={"detail": error.detail},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
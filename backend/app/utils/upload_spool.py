@@ -0,0 +1,254 @@
+"""
+Utility for streaming uploaded files to disk with type and size validation
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import zipfile
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Maximum accepted upload size (configurable via MAX_UPLOAD_SIZE_MB)
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_SIZE_MB", "10")) * 1024 * 1024)
+
+# Maximum size of a whole batch upload request, all files and zip archives together
+# (configurable via MAX_BATCH_UPLOAD_SIZE_MB)
+MAX_BATCH_UPLOAD_BYTES = int(float(os.getenv("MAX_BATCH_UPLOAD_SIZE_MB", "200")) * 1024 * 1024)
+
+# Size of each chunk read from the request body
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE_KB", "64")) * 1024
+
+# Directory for spooled uploads (defaults to the system temp directory)
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+# Magic bytes identifying each supported file type (DOCX files are zip archives)
+FILE_SIGNATURES = {
+    "pdf": b"%PDF-",
+    "docx": b"PK\x03\x04",
+    "zip": b"PK\x03\x04",
+}
+
+# Maximum number of resumes accepted from a single zip archive
+MAX_ZIP_MEMBERS = int(os.getenv("MAX_ZIP_MEMBERS", "500"))
+
+
+def too_large_message(max_bytes: int = MAX_UPLOAD_BYTES, subject: str = "File") -> str:
+    """Message for an upload over max_bytes, with the limit in MB (e.g. 10 MB, 0.5 MB)"""
+    return f"{subject} exceeds the maximum upload size of {max_bytes / 1048576:g} MB"
+
+
+class UploadRejectedError(Exception):
+    """Raised when an upload fails validation; carries the HTTP status to return"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def detect_file_type(head: bytes, declared_type: Optional[str] = None) -> Optional[str]:
+    """
+    Detect the file type from the first bytes of a file.
+
+    Args:
+        head (bytes): Leading bytes of the file
+        declared_type (Optional[str]): Type implied by the file extension, preferred when
+            several types share a signature (DOCX and zip)
+
+    Returns:
+        Optional[str]: The matching type ("pdf", "docx" or "zip"), or None if unrecognized
+    """
+    if declared_type in FILE_SIGNATURES and head.startswith(FILE_SIGNATURES[declared_type]):
+        return declared_type
+    for file_type, signature in FILE_SIGNATURES.items():
+        if head.startswith(signature):
+            return file_type
+    return None
+
+
+class SpooledUpload:
+    """
+    An upload that has been streamed to a temporary file.
+    Use as a context manager (or call cleanup()) to remove the file.
+    """
+
+    def __init__(self, path: str, filename: str, file_type: str, size: int, sha256: str):
+        self.path = path
+        self.filename = filename
+        self.file_type = file_type
+        self.size = size
+        self.sha256 = sha256
+
+    def cleanup(self) -> None:
+        """Delete the spooled file"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cleanup()
+
+
+async def spool_upload(
+    file: UploadFile,
+    allowed_types: Iterable[str] = ("pdf", "docx"),
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Stream an upload to a temporary file in chunks.
+
+    The file type is checked against its magic bytes on the first chunk, the
+    SHA-256 is computed incrementally, and the upload is rejected as soon as
+    it grows past max_bytes.
+
+    Args:
+        file (UploadFile): The uploaded file
+        allowed_types (Iterable[str]): File types to accept
+        max_bytes (int): Maximum accepted size in bytes
+        chunk_size (int): Number of bytes to read per chunk
+
+    Returns:
+        SpooledUpload: The spooled file with its size, hash and detected type
+
+    Raises:
+        UploadRejectedError: If the file is empty, too large or of the wrong type
+    """
+    filename = file.filename or ""
+    declared_type = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    allowed_types = set(allowed_types)
+
+    hasher = hashlib.sha256()
+    size = 0
+    file_type = None
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=f".{declared_type or 'bin'}", dir=UPLOAD_TMP_DIR)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                if file_type is None:
+                    file_type = detect_file_type(chunk, declared_type)
+                    if file_type not in allowed_types:
+                        raise UploadRejectedError(
+                            415, f"File content is not a valid {' or '.join(sorted(t.upper() for t in allowed_types))} document"
+                        )
+                    if declared_type and declared_type != file_type:
+                        raise UploadRejectedError(
+                            415, f"File extension .{declared_type} does not match its {file_type.upper()} content"
+                        )
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejectedError(
+                        413, too_large_message(max_bytes)
+                    )
+
+                hasher.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise UploadRejectedError(400, "Uploaded file is empty")
+    except BaseException:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    logger.info(f"Spooled upload {filename} to {path} ({size} bytes, sha256={hasher.hexdigest()[:12]})")
+    return SpooledUpload(path, filename, file_type, size, hasher.hexdigest())
+
+
+def expand_zip_upload(
+    archive: SpooledUpload,
+    allowed_types: Iterable[str] = ("pdf", "docx"),
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    max_members: int = MAX_ZIP_MEMBERS,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[List[SpooledUpload], List[Tuple[str, str]]]:
+    """
+    Spool each resume inside a zip archive to its own temporary file.
+
+    Members are streamed out of the archive with the same magic-byte, hash
+    and size checks as direct uploads. Directories and other file types are
+    ignored.
+
+    Args:
+        archive (SpooledUpload): The spooled zip archive
+        allowed_types (Iterable[str]): Member file types to accept
+        max_bytes (int): Maximum accepted (uncompressed) size per member
+        max_members (int): Maximum number of resumes to take from the archive
+        chunk_size (int): Number of bytes to read per chunk
+
+    Returns:
+        Tuple[List[SpooledUpload], List[Tuple[str, str]]]: Spooled members, and
+        (member name, reason) pairs for members that were rejected
+    """
+    allowed_types = set(allowed_types)
+    accepted: List[SpooledUpload] = []
+    rejected: List[Tuple[str, str]] = []
+
+    try:
+        with zipfile.ZipFile(archive.path) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                member_type = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+                if info.is_dir() or member_type not in allowed_types or os.path.basename(name).startswith("."):
+                    continue
+                if len(accepted) >= max_members:
+                    rejected.append((name, f"Archive exceeds the limit of {max_members} resumes"))
+                    continue
+                # The declared size can lie, so it is enforced again while streaming
+                if info.file_size > max_bytes:
+                    rejected.append((name, too_large_message(max_bytes)))
+                    continue
+
+                hasher = hashlib.sha256()
+                size = 0
+                fd, path = tempfile.mkstemp(prefix="upload_", suffix=f".{member_type}", dir=UPLOAD_TMP_DIR)
+                try:
+                    with os.fdopen(fd, "wb") as out, zf.open(info) as member:
+                        while True:
+                            chunk = member.read(chunk_size)
+                            if not chunk:
+                                break
+                            if size == 0 and detect_file_type(chunk, member_type) != member_type:
+                                raise UploadRejectedError(415, f"File content is not a valid {member_type.upper()} document")
+                            size += len(chunk)
+                            if size > max_bytes:
+                                raise UploadRejectedError(
+                                    413, too_large_message(max_bytes)
+                                )
+                            hasher.update(chunk)
+                            out.write(chunk)
+                    if size == 0:
+                        raise UploadRejectedError(400, "Uploaded file is empty")
+                except UploadRejectedError as e:
+                    os.remove(path)
+                    rejected.append((name, e.detail))
+                    continue
+                except BaseException:
+                    os.remove(path)
+                    raise
+
+                accepted.append(SpooledUpload(path, name, member_type, size, hasher.hexdigest()))
+    except zipfile.BadZipFile:
+        for spooled in accepted:
+            spooled.cleanup()
+        raise UploadRejectedError(415, "File content is not a valid zip archive")
+
+    logger.info(f"Expanded {archive.filename}: {len(accepted)} resumes, {len(rejected)} rejected")
+    return accepted, rejected
@@ -0,0 +1,95 @@
+"""
+Benchmark the cold import time and memory of the app using python -X importtime
+
+Each run imports the target in a fresh interpreter, so nothing is cached in
+sys.modules. Reports the median cumulative import time of the target, the
+heaviest modules below it, peak RSS after the import, and which of the heavy
+optional libraries were imported (they should only be imported on first use).
+
+Usage (from the backend directory):
+    python benchmarks/bench_import_time.py [--target app.main] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that should stay out of a cold import of the app
+HEAVY_LIBRARIES = ["google.generativeai", "reportlab", "pdfplumber", "PyPDF2", "docx"]
+
+# One line of -X importtime output: "import time: self [us] | cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Printed by the child after the import: peak RSS and the heavy libraries it loaded
+_CHILD_SCRIPT = """
+import resource, sys
+import {target}
+print("peak_rss_kib", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print("loaded", ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def run_once(target: str) -> Tuple[Dict[str, int], int, List[str]]:
+    """
+    Import the target in a fresh interpreter.
+
+    Returns:
+        Tuple[Dict[str, int], int, List[str]]: Cumulative import time per top-level entry of
+        the import tree (microseconds), peak RSS in KiB, and the heavy libraries imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT.format(target=target, heavy=HEAVY_LIBRARIES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            # A module can show up more than once in the tree; keep its largest entry
+            name = match.group(4)
+            cumulative[name] = max(cumulative.get(name, 0), int(match.group(2)))
+
+    peak_rss, loaded = 0, []
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(" ")
+        if key == "peak_rss_kib":
+            peak_rss = int(value)
+        elif key == "loaded":
+            loaded = [name for name in value.split(",") if name]
+    return cumulative, peak_rss, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Heaviest modules to list")
+    args = parser.parse_args()
+
+    runs = [run_once(args.target) for _ in range(args.runs)]
+    totals = [cumulative.get(args.target, 0) for cumulative, _, _ in runs]
+    rss = [peak for _, peak, _ in runs]
+
+    print(f"{args.target}: median {statistics.median(totals) / 1000:.1f} ms "
+          f"(min {min(totals) / 1000:.1f}, max {max(totals) / 1000:.1f}) over {args.runs} cold imports")
+    print(f"Peak RSS after import: median {statistics.median(rss) / 1024:.1f} MiB")
+    loaded = sorted(set(name for _, _, names in runs for name in names))
+    print(f"Heavy libraries imported: {', '.join(loaded) if loaded else 'none'}")
+
+    medians = {
+        name: statistics.median(cumulative.get(name, 0) for cumulative, _, _ in runs)
+        for name in runs[0][0]
+        if name != args.target
+    }
+    print(f"\n{'module':<50} {'median ms':>10}")
+    for name, micros in sorted(medians.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<50} {micros / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmark response serialization and size per endpoint: stdlib JSON before, orjson, compression and fields= after
+
+Usage (from the backend directory):
+    python benchmarks/bench_json_responses.py [--experiences 8] [--bullets 6] [--list-size 200] [--runs 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app.utils.compression import BROTLI_AVAILABLE, compress  # noqa: E402
+from app.utils.fast_json import FastJSONResponse, _orjson  # noqa: E402
+from app.utils.field_selection import select_fields  # noqa: E402
+
+WORDS = ("led", "built", "migrated", "reduced", "platform", "pipeline", "latency", "teams", "customers",
+         "revenue", "services", "Python", "Kubernetes", "dashboards", "billing", "throughput", "cost")
+
+# What a client rendering a resume card asks for
+UPLOAD_FIELDS = "resume_id,ai_enhanced,parsed_resume.personal_info,parsed_resume.experience.position,parsed_resume.skills.name"
+SAVED_FIELDS = "resume_id,resume_data.personal_info,resume_data.experience,resume_data.skills.name"
+
+
+def sentence(rng: random.Random, words: int = 14) -> str:
+    """Build a bullet-like sentence with a figure in it"""
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + f", improving throughput by {rng.randint(5, 80)}%."
+
+
+def build_resume(rng: random.Random, experiences: int, bullets: int) -> Dict[str, Any]:
+    """Build an enhanced, saved resume shaped like the ones the pipeline produces"""
+    experience = [{
+        "position": f"Senior Engineer {i}",
+        "company": f"Company {rng.randint(1, 500)}",
+        "start_date": f"{2010 + i}-01",
+        "end_date": f"{2011 + i}-06",
+        "description": "\n".join(f"- {sentence(rng)}" for _ in range(bullets)),
+    } for i in range(experiences)]
+    provenance = {f"experience[{i}].description": {"source": "enhanced", "at": "2024-05-01 10:00:00"}
+                  for i in range(experiences)}
+    raw_text = "\n".join(item["description"] for item in experience)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "personal_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "(555) 010-0000",
+                          "summary": sentence(rng, 40)},
+        "education": [{"institution": f"University {i}", "degree": "B.S. Computer Science",
+                       "start_date": "2006", "end_date": "2010"} for i in range(2)],
+        "experience": experience,
+        "skills": [{"name": word, "level": "Advanced", "category": "Technical"} for word in WORDS[:12]],
+        "certifications": [f"Certification {i}" for i in range(3)],
+        "languages": ["English", "Spanish"],
+        "raw_text": raw_text,
+        "ai_enhanced": True,
+        "enhancement_timestamp": "2024-05-01 10:00:00.000000",
+        "enhancement_gate": {"enhanced": experiences, "kept": 0, "reused": 0, "unchanged": 0},
+        "enhancement_provenance": provenance,
+        "original_filename": "resume.pdf",
+        "file_size": 184320,
+        "file_type": "pdf",
+        "file_sha256": "ab" * 32,
+        "last_updated": "2024-05-01T10:00:00.000000",
+    }
+
+
+def build_payloads(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Response bodies of the benchmarked endpoints, with how they were serialized before"""
+    rng = random.Random(args.seed)
+    resume = build_resume(rng, args.experiences, args.bullets)
+    upload = {
+        "message": "Resume resume.pdf uploaded, enhanced, and saved successfully",
+        "resume_id": resume["id"],
+        "original_filename": "resume.pdf",
+        "file_size": resume["file_size"],
+        "file_sha256": resume["file_sha256"],
+        "ai_enhanced": True,
+        "saved_location": f"data/resume_{resume['id']}.json",
+        "parsed_resume": resume,
+        "processing_info": {"parser_available": True, "ai_configured": True,
+                            "enhancement_timestamp": resume["enhancement_timestamp"],
+                            "storage_timestamp": resume["last_updated"]},
+    }
+    saved = {"message": "Resume retrieved successfully", "resume_id": resume["id"],
+             "file_location": f"data/resume_{resume['id']}.json", "resume_data": resume}
+    listing = [{"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Candidate {i}",
+                "last_updated": "2024-05-01T10:00:00.000000"} for i in range(args.list_size)]
+    # response_model endpoints ran jsonable_encoder over the body before json.dumps
+    return {
+        "POST /api/upload-resume": {"body": upload, "encoded": False, "fields": UPLOAD_FIELDS},
+        "GET /api/resumes/{id}": {"body": saved, "encoded": False, "fields": SAVED_FIELDS},
+        "GET /api/resume/{id}": {"body": resume, "encoded": True, "fields": None},
+        "GET /api/resumes": {"body": listing, "encoded": True, "fields": None},
+    }
+
+
+def median_us(fn: Callable[[], Any], runs: int) -> float:
+    """Median wall time of fn in microseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def measure(name: str, case: Dict[str, Any], runs: int) -> List[Dict[str, Any]]:
+    """Measure serialization time and body sizes of one endpoint, before and after"""
+    body = case["body"]
+
+    def before():
+        content = jsonable_encoder(body) if case["encoded"] else body
+        return JSONResponse(content).body
+
+    def after():
+        return FastJSONResponse(body).body
+
+    rows = []
+    before_bytes = before()
+    rows.append({"endpoint": name, "variant": "before (json)", "us": median_us(before, runs),
+                 "identity": len(before_bytes), "gzip": None, "br": None})
+    after_bytes = after()
+    rows.append({"endpoint": name, "variant": "after (orjson)" if _orjson else "after (json)",
+                 "us": median_us(after, runs), "identity": len(after_bytes),
+                 "gzip": len(compress(after_bytes, "gzip")),
+                 "br": len(compress(after_bytes, "br")) if BROTLI_AVAILABLE else None,
+                 "gzip_us": median_us(lambda: compress(after_bytes, "gzip"), max(1, runs // 4))})
+    if case["fields"]:
+        def selected():
+            return FastJSONResponse(select_fields(body, case["fields"])).body
+        selected_bytes = selected()
+        rows.append({"endpoint": name, "variant": "after + fields=", "us": median_us(selected, runs),
+                     "identity": len(selected_bytes), "gzip": len(compress(selected_bytes, "gzip")),
+                     "br": len(compress(selected_bytes, "br")) if BROTLI_AVAILABLE else None})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--experiences", type=int, default=8, help="Experience entries per resume")
+    parser.add_argument("--bullets", type=int, default=6, help="Bullets per experience entry")
+    parser.add_argument("--list-size", type=int, default=200, help="Resumes in the GET /api/resumes listing")
+    parser.add_argument("--runs", type=int, default=200, help="Timed runs per measurement")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if _orjson is None:
+        print("orjson is not installed (or FAST_JSON=false): 'after' uses the json module\n")
+    if not BROTLI_AVAILABLE:
+        print("brotli is not installed: only gzip sizes are reported\n")
+
+    header = f"{'endpoint':<26} {'variant':<16} {'serialize':>10} {'bytes':>8} {'gzip':>8} {'br':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, case in build_payloads(args).items():
+        rows = measure(name, case, args.runs)
+        for row in rows:
+            gzip_size = f"{row['gzip']:>8}" if row["gzip"] is not None else f"{'-':>8}"
+            br_size = f"{row['br']:>8}" if row["br"] is not None else f"{'-':>8}"
+            print(f"{row['endpoint']:<26} {row['variant']:<16} {row['us']:>8.1f}us {row['identity']:>8} "
+                  f"{gzip_size} {br_size}")
+        before, after = rows[0], rows[1]
+        print(f"{'':<26} {'speedup':<16} {before['us'] / after['us']:>9.1f}x "
+              f"(gzip adds {after['gzip_us']:.0f}us, wire bytes {before['identity']} -> "
+              f"{min(row['gzip'] for row in rows[1:])})\n")
+
+
+if __name__ == "__main__":
+    main()
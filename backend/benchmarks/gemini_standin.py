@@ -0,0 +1,270 @@
+"""
+Local stand-in for the Gemini REST API, used to load-test the AI paths without real quota
+
+Serves generateContent and streamGenerateContent in the same wire format as the
+real API, with configurable latency distributions and injected failures. Point
+the backend at it with:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_API_KEY=standin python server.py
+
+Usage (from the backend directory):
+    python benchmarks/gemini_standin.py [--port 8090] [--latency lognormal:0.8:0.4]
+        [--chunk-latency fixed:0.05] [--stream-chunks 6] [--rate-limit-rate 0.02]
+        [--error-rate 0.01] [--unavailable-rate 0] [--rpm 0]
+
+Latency specs (seconds):
+    fixed:S | uniform:LOW:HIGH | normal:MEAN:STDDEV | lognormal:MEDIAN:SIGMA | exp:MEAN
+
+Call and status counts are served at GET /stats (reset with POST /stats/reset).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+
+from app.utils.resilience import RateLimitExceededError, TokenBucket  # noqa: E402
+
+# Finish reason STOP, encoded as an int like the SDK requests (enum-encoding=int)
+FINISH_REASON_STOP = 1
+
+# Error bodies in the format returned by Google APIs
+ERRORS = {
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Build a sampler for a latency distribution spec such as "lognormal:0.8:0.4".
+
+    Args:
+        spec (str): Distribution name followed by its parameters, colon-separated
+
+    Returns:
+        Callable[[], float]: Returns one non-negative latency sample in seconds
+    """
+    name, *params = spec.split(":")
+    values = [float(p) for p in params]
+    samplers = {
+        "fixed": (1, lambda v: v[0]),
+        "uniform": (2, lambda v: random.uniform(v[0], v[1])),
+        "normal": (2, lambda v: random.gauss(v[0], v[1])),
+        "lognormal": (2, lambda v: random.lognormvariate(math.log(v[0]), v[1]) if v[0] > 0 else 0.0),
+        "exp": (1, lambda v: random.expovariate(1 / v[0]) if v[0] > 0 else 0.0),
+    }
+    if name not in samplers or len(values) != samplers[name][0]:
+        raise argparse.ArgumentTypeError(f"Invalid latency spec: {spec}")
+    sample = samplers[name][1]
+    return lambda: max(0.0, sample(values))
+
+
+def build_reply(prompt: str) -> str:
+    """
+    Produce a plausible response for one of the backend's prompts.
+
+    Batch prompts get a JSON object with every requested field key (and a summary
+    if one was asked for); other prompts get a short rewritten text.
+
+    Args:
+        prompt (str): The prompt text
+
+    Returns:
+        str: Response text
+    """
+    if "Input:" in prompt and '"fields"' in prompt:
+        try:
+            payload = json.loads(prompt.rsplit("Input:", 1)[1].strip())
+            reply = {"fields": {key: f"{field['content']} (stand-in enhanced)"
+                                for key, field in payload.get("fields", {}).items()}}
+            if "summary_context" in payload:
+                reply["summary"] = "Results-driven professional (stand-in summary)."
+            return json.dumps(reply)
+        except (ValueError, KeyError, AttributeError):
+            pass
+    if "Professional Summary:" in prompt:
+        return "Results-driven professional with a record of measurable impact (stand-in summary)."
+
+    original = re.search(r'Original[^:\n]*:\s*"(.*?)"\s*\n', prompt, flags=re.S)
+    text = original.group(1) if original else prompt.strip()[-200:]
+    return f"{text.strip()} Delivered measurable results (stand-in enhanced)."
+
+
+def _candidate(text: str, final: bool) -> Dict[str, Any]:
+    """Build a GenerateContentResponse body carrying one piece of text"""
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if final:
+        candidate["finishReason"] = FINISH_REASON_STOP
+    return {"candidates": [candidate]}
+
+
+class StandInStats:
+    """Thread-safe counters of calls received and responses sent"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all counters"""
+        with self._lock:
+            self.calls: Dict[str, int] = {}
+            self.statuses: Dict[str, int] = {}
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+    def start(self, method: str) -> None:
+        """Count a received call"""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, status: int) -> None:
+        """Count a response"""
+        with self._lock:
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters"""
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "statuses": dict(self.statuses),
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    """
+    Build the stand-in application.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line options
+
+    Returns:
+        FastAPI: The application
+    """
+    app = FastAPI(title="Gemini stand-in")
+    stats = StandInStats()
+    latency = parse_latency(args.latency)
+    chunk_latency = parse_latency(args.chunk_latency)
+    quota = TokenBucket("standin_quota", args.rpm, args.burst or max(1, int(args.rpm / 60)), 0) if args.rpm > 0 else None
+
+    def injected_error() -> int:
+        """Return the status of an injected failure for this call, or 0"""
+        if quota is not None:
+            try:
+                quota.acquire()
+            except RateLimitExceededError:
+                return 429
+        roll = random.random()
+        for status, rate in ((429, args.rate_limit_rate), (500, args.error_rate), (503, args.unavailable_rate)):
+            if roll < rate:
+                return status
+            roll -= rate
+        return 0
+
+    def error_response(status: int) -> JSONResponse:
+        stats.finish(status)
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"code": status, "message": "Injected by the Gemini stand-in", "status": ERRORS[status]}},
+        )
+
+    async def read_prompt(request: Request) -> str:
+        body = await request.json()
+        return "\n".join(part.get("text", "") for content in body.get("contents", [])
+                         for part in content.get("parts", []))
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        stats.start("generateContent")
+        prompt = await read_prompt(request)
+        await asyncio.sleep(latency())
+        status = injected_error()
+        if status:
+            return error_response(status)
+        stats.finish(200)
+        return _candidate(build_reply(prompt), final=True)
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def stream_generate_content(model: str, request: Request):
+        stats.start("streamGenerateContent")
+        prompt = await read_prompt(request)
+        # Time to first token
+        await asyncio.sleep(latency())
+        status = injected_error()
+        if status:
+            return error_response(status)
+
+        words = build_reply(prompt).split(" ")
+        size = max(1, math.ceil(len(words) / max(1, args.stream_chunks)))
+        pieces = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        pieces[-1] = pieces[-1].rstrip()
+
+        async def body():
+            # The REST transport reads a streamed JSON array of responses
+            try:
+                yield "["
+                for index, piece in enumerate(pieces):
+                    if index:
+                        await asyncio.sleep(chunk_latency())
+                        yield ",\r\n"
+                    yield json.dumps(_candidate(piece, final=index == len(pieces) - 1))
+                yield "]"
+            finally:
+                stats.finish(200)
+
+        return StreamingResponse(body(), media_type="application/json")
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.snapshot()
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.reset()
+        return stats.snapshot()
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:0.8:0.4",
+                        help="Latency of a whole call, or time to first chunk when streaming")
+    parser.add_argument("--chunk-latency", default="fixed:0.05", help="Gap between streamed chunks")
+    parser.add_argument("--stream-chunks", type=int, default=6, help="Chunks per streamed response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of calls answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with 500")
+    parser.add_argument("--unavailable-rate", type=float, default=0.0,
+                        help="Share of calls answered with 503 (the SDK retries these internally)")
+    parser.add_argument("--rpm", type=float, default=0.0, help="Emulated quota; calls over it get 429 (0 = none)")
+    parser.add_argument("--burst", type=int, default=0, help="Burst allowed by the emulated quota")
+    args = parser.parse_args()
+    for spec in (args.latency, args.chunk_latency):
+        parse_latency(spec)
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
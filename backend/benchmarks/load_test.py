@@ -0,0 +1,266 @@
+"""
+Drive /api/ai-enhance and /api/upload-resume at a target request rate and report latency percentiles
+
+Requests are sent open-loop (on a fixed schedule, whether or not earlier ones have
+finished), so a slow server shows up as latency rather than as a lower request
+rate. Upstream model calls are counted from the Gemini stand-in's /stats.
+
+Typical run (from the backend directory, three terminals):
+    python benchmarks/gemini_standin.py --latency lognormal:0.8:0.4 --rate-limit-rate 0.02
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_API_KEY=standin python server.py
+    python benchmarks/load_test.py --scenario mixed --rps 10 --duration 60
+
+Usage:
+    python benchmarks/load_test.py [--base-url http://127.0.0.1:8000] [--standin-url http://127.0.0.1:8090]
+        [--scenario enhance|upload|mixed] [--rps 5] [--duration 30] [--duplicate-ratio 0.2]
+        [--upload-share 0.2] [--max-in-flight 500] [--timeout 120] [--json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+SECTIONS = ["summary", "experience", "education", "skills", "projects", "certifications"]
+
+VERBS = ["Led", "Built", "Designed", "Migrated", "Automated", "Scaled", "Reduced", "Launched"]
+OBJECTS = ["a billing platform", "the data pipeline", "CI/CD workflows", "an onboarding flow",
+           "search ranking", "the mobile app", "cloud infrastructure", "reporting dashboards"]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Return the nearest-rank percentile of a list of values (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def random_sentence(rng: random.Random) -> str:
+    """Build a random resume-style sentence"""
+    return (f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} for {rng.randint(2, 40)} teams, "
+            f"improving throughput by {rng.randint(5, 80)}%.")
+
+
+def build_resume_pdf(rng: random.Random, index: int) -> bytes:
+    """Render a small, unique resume PDF"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    lines = [
+        f"Candidate {index} Example", f"candidate{index}@example.com", "(555) 010-{:04d}".format(index % 10000),
+        "Summary", random_sentence(rng),
+        "Experience", f"Senior Engineer at Company {rng.randint(1, 500)}  2019 - Present",
+        *(f"- {random_sentence(rng)}" for _ in range(4)),
+        "Education", f"B.S. Computer Science, University {rng.randint(1, 50)}  2015 - 2019",
+        "Skills", ", ".join(rng.sample(["Python", "Go", "SQL", "Kubernetes", "React", "AWS", "Kafka"], 4)),
+    ]
+    y = 740
+    for line in lines:
+        pdf.drawString(72, y, line)
+        y -= 18
+    pdf.save()
+    return buffer.getvalue()
+
+
+class LoadTest:
+    """Open-loop load generator collecting per-scenario latencies and statuses"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.results: Dict[str, List[Dict[str, Any]]] = {"enhance": [], "upload": []}
+        self.enhance_history: List[Dict[str, str]] = []
+        self.upload_count = 0
+
+    def next_scenario(self) -> str:
+        """Pick the scenario of the next request"""
+        if self.args.scenario != "mixed":
+            return self.args.scenario
+        return "upload" if self.rng.random() < self.args.upload_share else "enhance"
+
+    def enhance_payload(self) -> Dict[str, str]:
+        """Build an enhancement request, repeating an earlier one at the duplicate ratio"""
+        if self.enhance_history and self.rng.random() < self.args.duplicate_ratio:
+            return self.rng.choice(self.enhance_history)
+        payload = {"section": self.rng.choice(SECTIONS),
+                   "content": " ".join(random_sentence(self.rng) for _ in range(self.rng.randint(1, 3)))}
+        self.enhance_history.append(payload)
+        return payload
+
+    async def send(self, client: httpx.AsyncClient, scenario: str) -> None:
+        """Send one request and record its outcome"""
+        start = time.perf_counter()
+        try:
+            if scenario == "enhance":
+                response = await client.post("/api/ai-enhance", json=self.enhance_payload())
+            else:
+                self.upload_count += 1
+                pdf = build_resume_pdf(self.rng, self.upload_count)
+                response = await client.post(
+                    "/api/upload-resume", files={"file": (f"resume_{self.upload_count}.pdf", pdf, "application/pdf")}
+                )
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.results[scenario].append({"status": status, "latency": time.perf_counter() - start})
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the test and return the report"""
+        args = self.args
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            upstream_before = await self.upstream_stats(client)
+            status_before = await self.ai_status(client)
+
+            total = int(args.rps * args.duration)
+            in_flight = asyncio.Semaphore(args.max_in_flight)
+            tasks = []
+            dropped = 0
+            started = time.perf_counter()
+
+            async def guarded(scenario: str) -> None:
+                try:
+                    await self.send(client, scenario)
+                finally:
+                    in_flight.release()
+
+            for i in range(total):
+                delay = started + i / args.rps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if in_flight.locked():
+                    # Too many outstanding requests; count it instead of distorting the schedule
+                    dropped += 1
+                    continue
+                await in_flight.acquire()
+                tasks.append(asyncio.create_task(guarded(self.next_scenario())))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+            upstream_after = await self.upstream_stats(client)
+            status_after = await self.ai_status(client)
+
+        report = {
+            "target_rps": args.rps,
+            "duration": round(elapsed, 2),
+            "sent": len(tasks),
+            "dropped_over_max_in_flight": dropped,
+            "achieved_rps": round(len(tasks) / elapsed, 2) if elapsed else None,
+            "scenarios": {name: self.summarize(rows, elapsed) for name, rows in self.results.items() if rows},
+        }
+        if upstream_before is not None and upstream_after is not None:
+            report["upstream"] = {
+                "calls": {method: count - upstream_before["calls"].get(method, 0)
+                          for method, count in upstream_after["calls"].items()},
+                "total_calls": upstream_after["total_calls"] - upstream_before["total_calls"],
+                "statuses": {status: count - upstream_before["statuses"].get(status, 0)
+                             for status, count in upstream_after["statuses"].items()},
+                "max_in_flight": upstream_after["max_in_flight"],
+            }
+        if status_before and status_after:
+            coalesced_before = (status_before.get("coalescing") or {}).get("coalesced", 0)
+            coalesced_after = (status_after.get("coalescing") or {}).get("coalesced", 0)
+            report["backend"] = {
+                "coalesced_calls": coalesced_after - coalesced_before,
+                "cache": status_after.get("cache"),
+                "circuit_breaker": (status_after.get("circuit_breaker") or {}).get("state"),
+                "rate_limiter": status_after.get("rate_limiter"),
+            }
+        return report
+
+    @staticmethod
+    def summarize(rows: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        """Summarize the results of one scenario"""
+        latencies = [row["latency"] for row in rows if row["status"] == "200"]
+        statuses: Dict[str, int] = {}
+        for row in rows:
+            statuses[row["status"]] = statuses.get(row["status"], 0) + 1
+
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 2) if elapsed else None,
+            "statuses": statuses,
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "max_ms": ms(max(latencies) if latencies else None),
+        }
+
+    async def upstream_stats(self, client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+        """Fetch the stand-in's call counters (None if it is not reachable)"""
+        if not self.args.standin_url:
+            return None
+        try:
+            response = await client.get(f"{self.args.standin_url}/stats")
+            return response.json()
+        except httpx.HTTPError:
+            return None
+
+    @staticmethod
+    async def ai_status(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+        """Fetch the backend's AI status (None if unavailable)"""
+        try:
+            return (await client.get("/api/ai-status")).json()
+        except (httpx.HTTPError, ValueError):
+            return None
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a human-readable report"""
+    print(f"Target {report['target_rps']} rps for {report['duration']}s: sent {report['sent']} "
+          f"({report['achieved_rps']} rps), dropped {report['dropped_over_max_in_flight']}")
+    print(f"{'scenario':<10} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for name, summary in report["scenarios"].items():
+        print(f"{name:<10} {summary['requests']:>8} {summary['p50_ms'] or '-':>9} {summary['p95_ms'] or '-':>9} "
+              f"{summary['p99_ms'] or '-':>9} {summary['max_ms'] or '-':>9}  {summary['statuses']}")
+    if "upstream" in report:
+        upstream = report["upstream"]
+        print(f"Upstream calls: {upstream['total_calls']} {upstream['calls']}, statuses {upstream['statuses']}, "
+              f"max in flight {upstream['max_in_flight']}")
+    else:
+        print("Upstream calls: stand-in not reachable")
+    if "backend" in report:
+        backend = report["backend"]
+        print(f"Backend: {backend['coalesced_calls']} coalesced calls, circuit {backend['circuit_breaker']}, "
+              f"cache hit rate {(backend['cache'] or {}).get('hit_rate')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--standin-url", default="http://127.0.0.1:8090", help="Empty to skip upstream counts")
+    parser.add_argument("--scenario", choices=["enhance", "upload", "mixed"], default="enhance")
+    parser.add_argument("--rps", type=float, default=5.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send requests for")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2,
+                        help="Share of enhance requests repeating earlier content (exercises cache and coalescing)")
+    parser.add_argument("--upload-share", type=float, default=0.2, help="Share of uploads in the mixed scenario")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Outstanding requests before sends are dropped")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.rps <= 0 or args.duration <= 0:
+        parser.error("--rps and --duration must be positive")
+
+    report = asyncio.run(LoadTest(args).run())
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
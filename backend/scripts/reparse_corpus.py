@@ -0,0 +1,37 @@
+"""
+Re-run the resume parser over every stored resume from its saved full text
+
+Usage (from the backend directory):
+    python scripts/reparse_corpus.py [--workers 4] [--checkpoint PATH] [--apply]
+
+Without --apply the job only writes a diff report of the fields that would change.
+The checkpoint defaults to data/reparse_<parser version>.jsonl, so re-running with the same
+parser skips resumes that were already processed, and a changed parser starts a fresh run.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.reparse_service import ResumeReparseService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="JSON Lines checkpoint / diff report (default: data/reparse_<parser version>.jsonl)")
+    parser.add_argument("--apply", action="store_true", help="Write changed fields back to storage")
+    parser.add_argument("ids", nargs="*", help="Only re-parse these resume IDs")
+    args = parser.parse_args()
+
+    service = ResumeReparseService(args.checkpoint, workers=args.workers)
+    summary = service.run(apply=args.apply, resume_ids=args.ids or None)
+    print(json.dumps(summary, indent=2))
+    print(f"Diff report: {service.checkpoint_path}")
+
+
+if __name__ == "__main__":
+    main()
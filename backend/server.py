@@ -1,21 +1,161 @@
 """
 Server startup script for ResumeForge API
 """
-import uvicorn
+import logging
 import os
+from typing import Any, Dict
+
+import uvicorn
+
+# Importing the app package loads .env, so the settings below can live there too
+from app.utils.lazy_import import import_module, module_available
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+
+# 'development' runs one auto-reloading process; 'production' runs several worker processes
+SERVER_MODE = os.getenv("SERVER_MODE", "development").lower()
+
+# Interface and port to listen on
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+
+# Worker processes in production mode; defaults to one per CPU
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+# Event loop ('auto', 'uvloop' or 'asyncio') and HTTP parser ('auto', 'httptools' or 'h11');
+# 'auto' picks uvloop and httptools when they are installed
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto").lower()
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto").lower()
+
+# Seconds an idle keep-alive connection is held open
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+# Connections the listening socket queues before the workers accept them
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+
+# Restart a worker after this many requests, plus a random 0-jitter, to contain memory growth (0 disables)
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+
+# Seconds in-flight requests get to finish when a worker is restarted or the server stops
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+# Seconds a worker may stay unresponsive before it is killed and replaced
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))
+
+# Import the app and its parsing/PDF libraries once before forking, so workers share those pages
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def resolve_implementation(choice: str, preferred: str, fallback: str) -> str:
+    """
+    Resolve an event loop or HTTP parser setting to an implementation that is installed.
+
+    Args:
+        choice (str): The configured value ('auto', the preferred or the fallback implementation)
+        preferred (str): The faster optional implementation, e.g. 'uvloop'
+        fallback (str): The implementation that is always available, e.g. 'asyncio'
+
+    Returns:
+        str: The implementation to use
+    """
+    if choice not in ("auto", preferred, fallback):
+        raise ValueError(f"Unsupported setting {choice!r}, expected 'auto', {preferred!r} or {fallback!r}")
+    if choice == fallback:
+        return fallback
+    if module_available(preferred):
+        return preferred
+    if choice == preferred:
+        logger.warning(f"{preferred} is not installed, using {fallback}")
+    return fallback
+
+
+def preload_shared_state() -> None:
+    """
+    Import the app and the heavy libraries it uses before worker processes are forked.
+
+    Everything imported here is shared copy-on-write by the workers instead of being
+    imported again in each of them. The services themselves are still built per worker
+    by the app's lifespan, and the Gemini SDK is left to the workers because its gRPC
+    runtime must not be started before a fork.
+    """
+    import_module("app.main")
+    from app.services.pdf_service import PDF_LIBRARY
+    from app.services.resume_parser_service import PDF_LIBS
+
+    PDF_LIBS.load_all()
+    if PDF_LIBRARY:
+        import_module(PDF_LIBRARY)
+
+
+def run_gunicorn(options: Dict[str, Any], loop: str, http: str) -> None:
+    """Run the app under gunicorn's process manager with uvicorn workers"""
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": loop, "http": http}
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+            self.cfg.set("worker_class", Worker)
+
+        def load(self):
+            # Runs in the master when preload_app is set, otherwise in every worker
+            if SERVER_PRELOAD:
+                preload_shared_state()
+            return import_module("app.main").app
+
+    Server().run()
+
 
 def start():
     """Start the FastAPI server"""
-    # Get the port from environment variables or use default
-    port = int(os.environ.get("PORT", 8000))
-    
-    # Start the server
+    if SERVER_MODE != "production":
+        # Single process that restarts when the code changes
+        uvicorn.run(APP, host=HOST, port=PORT, reload=True)
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    loop = resolve_implementation(SERVER_LOOP, "uvloop", "asyncio")
+    http = resolve_implementation(SERVER_HTTP, "httptools", "h11")
+    logger.info(f"Starting {WEB_CONCURRENCY} workers on {HOST}:{PORT} (loop: {loop}, http: {http})")
+
+    if module_available("gunicorn"):
+        run_gunicorn({
+            "bind": f"{HOST}:{PORT}",
+            "workers": WEB_CONCURRENCY,
+            "keepalive": SERVER_KEEPALIVE,
+            "backlog": SERVER_BACKLOG,
+            "max_requests": SERVER_MAX_REQUESTS,
+            "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+            "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+            "timeout": SERVER_TIMEOUT,
+            "preload_app": SERVER_PRELOAD,
+        }, loop, http)
+        return
+
+    # Without gunicorn, uvicorn's own supervisor starts fresh interpreters and does not
+    # replace workers that exit, so there is no preloading and no max-requests recycling
+    if SERVER_MAX_REQUESTS:
+        logger.warning("SERVER_MAX_REQUESTS needs gunicorn installed; workers will not be recycled")
     uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,  # Enable auto-reload during development
+        APP,
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        loop=loop,
+        http=http,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
     )
 
+
 if __name__ == "__main__":
     start()
@@ -0,0 +1,19 @@
+"""
+Shared pytest setup for the backend tests
+"""
+import os
+import sys
+
+import pytest
+
+# Make the app package importable when pytest is run from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import storage_service  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point resume storage at an empty temporary directory"""
+    monkeypatch.setattr(storage_service, "DATA_DIR", str(tmp_path))
+    return tmp_path
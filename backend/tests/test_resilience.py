@@ -0,0 +1,46 @@
+"""
+Tests for the rate limiter and circuit breaker guarding Gemini calls
+"""
+import pytest
+
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    return breaker
+
+
+def test_open_circuit_rejects_before_a_token_is_taken():
+    limiter = TokenBucket("test", rate_per_minute=60, burst=2, max_wait=0)
+    breaker = open_breaker()
+
+    for _ in range(5):
+        with pytest.raises(CircuitOpenError):
+            breaker.raise_if_open()
+            limiter.acquire()
+
+    assert limiter.stats()["available_tokens"] == pytest.approx(2, abs=0.1)
+
+
+def call(breaker: CircuitBreaker, limiter: TokenBucket):
+    """Admit a call the way AiEnhancementService does, returning the entered attempt"""
+    breaker.raise_if_open()
+    limiter.acquire()
+    attempt = breaker.attempt(on_reject=limiter.refund)
+    attempt.__enter__()
+    return attempt
+
+
+def test_call_turned_away_while_probing_refunds_its_token():
+    limiter = TokenBucket("test", rate_per_minute=60, burst=2, max_wait=0)
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    probe = call(breaker, limiter)
+    with pytest.raises(CircuitOpenError):
+        call(breaker, limiter)
+    probe.__exit__(None, None, None)
+
+    assert limiter.stats()["available_tokens"] == pytest.approx(1, abs=0.1)
@@ -0,0 +1,80 @@
+"""
+Tests for re-enhancing a stored resume after edits
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import resume_router
+from app.services.service_container import get_ai_service, get_storage_service
+from app.services.storage_service import ResumeStorageService
+
+
+class EchoAiService:
+    """Stand-in for the AI service that returns the resume it is given"""
+
+    def __init__(self):
+        self.received: Optional[Dict[str, Any]] = None
+
+    async def enhance_entire_resume_async(self, resume: Dict[str, Any],
+                                          previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self.received = resume
+        return dict(resume)
+
+
+def make_client(ai_service: EchoAiService) -> TestClient:
+    app = FastAPI()
+    app.include_router(resume_router.router, prefix="/api")
+    app.dependency_overrides[get_ai_service] = lambda: ai_service
+    app.dependency_overrides[get_storage_service] = lambda: ResumeStorageService()
+    return TestClient(app)
+
+
+STORED = {
+    "original_filename": "jane.pdf",
+    "sha256": "ab" * 32,
+    "personal_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "summary": "Backend engineer",
+    "education": [{"institution": "State University", "degree": "BSc"}],
+    "experience": [{"company": "Acme", "title": "Engineer", "achievements": ["Cut costs by 20%"]}],
+    "skills": ["Python", "SQL"],
+}
+
+
+def test_partial_body_keeps_other_sections(data_dir):
+    saved = ResumeStorageService.save_resume(dict(STORED))
+    ai_service = EchoAiService()
+
+    response = make_client(ai_service).post(
+        f"/api/resume/{saved['id']}/enhance",
+        json={"summary": "Senior backend engineer", "personal_info": {"email": "jane@new.example.com"}},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["summary"] == "Senior backend engineer"
+    assert body["personal_info"] == {"name": "Jane Doe", "email": "jane@new.example.com"}
+    for key in ("original_filename", "sha256", "education", "experience", "skills"):
+        assert body[key] == STORED[key]
+    assert ai_service.received["experience"] == STORED["experience"]
+    assert body["field_changes"] == {"summary": "modified", "personal_info.email": "modified"}
+
+    stored = ResumeStorageService.get_resume(saved["id"])
+    assert stored["education"] == STORED["education"]
+    assert stored["sha256"] == STORED["sha256"]
+
+
+def test_list_in_body_replaces_stored_list(data_dir):
+    saved = ResumeStorageService.save_resume(dict(STORED))
+
+    response = make_client(EchoAiService()).post(
+        f"/api/resume/{saved['id']}/enhance",
+        json={"skills": ["Python"]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["skills"] == ["Python"]
+    assert body["experience"] == STORED["experience"]
+    assert body["field_changes"] == {"skills[1]": "removed"}
@@ -0,0 +1,86 @@
+"""
+Tests for upload job state shared between worker processes
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from app.services import upload_job_service
+from app.services.upload_job_service import JobStateStore, UploadJobQueue
+
+
+def running_state(updated_at: datetime) -> dict:
+    at = updated_at.isoformat()
+    return {
+        "job_id": uuid.uuid4().hex,
+        "filename": "resume.pdf",
+        "status": "running",
+        "stage": "parsed",
+        "resume_id": None,
+        "ai_enhanced": None,
+        "error": None,
+        "created_at": at,
+        "events": [
+            {"stage": "queued", "status": "queued", "at": at, "elapsed": 0.0},
+            {"stage": "parsed", "status": "running", "at": at, "elapsed": 0.1},
+        ],
+    }
+
+
+def write_state(store: JobStateStore, state: dict) -> None:
+    """Write a state file as is, as a process that has since died would have left it"""
+    os.makedirs(store.directory, exist_ok=True)
+    with open(store._path(state["job_id"]), "w") as f:
+        json.dump(state, f)
+
+
+def test_save_records_updated_at(tmp_path):
+    store = JobStateStore(str(tmp_path))
+    state = running_state(datetime.now())
+
+    store.save(state)
+
+    loaded = store.load(state["job_id"])
+    assert loaded["status"] == "running"
+    assert datetime.fromisoformat(loaded["updated_at"]) >= datetime.fromisoformat(state["created_at"])
+
+
+def test_load_fails_stale_job(tmp_path):
+    store = JobStateStore(str(tmp_path), stale_seconds=60)
+    state = running_state(datetime.now() - timedelta(seconds=120))
+    state["updated_at"] = state["created_at"]
+    write_state(store, state)
+
+    loaded = store.load(state["job_id"])
+
+    assert loaded["status"] == "failed"
+    assert loaded["events"][-1]["stage"] == "failed"
+    assert loaded["events"][-1]["failed_stage"] == "parsed"
+    # The failure is saved, so the job is pruned like any other finished job
+    with open(store._path(state["job_id"])) as f:
+        assert json.load(f)["status"] == "failed"
+
+
+def test_load_keeps_fresh_job_running(tmp_path):
+    store = JobStateStore(str(tmp_path), stale_seconds=60)
+    state = running_state(datetime.now() - timedelta(seconds=120))
+    store.save(state)
+
+    assert store.load(state["job_id"])["status"] == "running"
+
+
+def test_follow_ends_when_owner_stops_updating(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_job_service, "UPLOAD_JOB_POLL_SECONDS", 0.05)
+    store = JobStateStore(str(tmp_path), stale_seconds=0.3)
+    queue = UploadJobQueue(ai_service=None, storage_service=None, extraction_pool=object(), store=store)
+    state = running_state(datetime.now())
+    store.save(state)
+
+    async def follow():
+        return [event async for event in queue.follow(state["job_id"])]
+
+    events = asyncio.run(asyncio.wait_for(follow(), timeout=5))
+
+    assert [event["stage"] for event in events] == ["queued", "parsed", "failed"]
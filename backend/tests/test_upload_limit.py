@@ -0,0 +1,57 @@
+"""
+Tests for the upload size limits
+"""
+import re
+from typing import List
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.utils import upload_limit
+from app.utils.upload_limit import UploadSizeLimitMiddleware
+from app.utils.upload_spool import too_large_message
+
+
+def test_too_large_message_shows_limits_under_1_mb():
+    assert too_large_message(512 * 1024) == "File exceeds the maximum upload size of 0.5 MB"
+    assert too_large_message(10 * 1024 * 1024) == "File exceeds the maximum upload size of 10 MB"
+
+
+def make_client(monkeypatch, batch_limit: int) -> TestClient:
+    monkeypatch.setattr(upload_limit, "BODY_LIMITS", [
+        ("POST", re.compile(r"^/api/upload-resumes$"), batch_limit, too_large_message(batch_limit, "Batch")),
+    ])
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware)
+
+    @app.post("/api/upload-resumes")
+    async def upload_resumes(files: List[UploadFile] = File(...)):
+        return {"files": len(files)}
+
+    return TestClient(app)
+
+
+def test_batch_over_limit_is_rejected(monkeypatch):
+    client = make_client(monkeypatch, batch_limit=64 * 1024)
+    files = [("files", (f"resume{i}.pdf", b"%PDF-" + b"x" * 20000, "application/pdf")) for i in range(4)]
+
+    response = client.post("/api/upload-resumes", files=files)
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Batch exceeds the maximum upload size of 0.0625 MB"
+
+
+def test_batch_within_limit_is_accepted(monkeypatch):
+    client = make_client(monkeypatch, batch_limit=64 * 1024)
+    files = [("files", (f"resume{i}.pdf", b"%PDF-" + b"x" * 10000, "application/pdf")) for i in range(2)]
+
+    response = client.post("/api/upload-resumes", files=files)
+
+    assert response.status_code == 200
+    assert response.json() == {"files": 2}
+
+
+def test_single_and_batch_uploads_are_limited():
+    assert upload_limit.body_limit("POST", "/api/upload-resume") is not None
+    assert upload_limit.body_limit("POST", "/api/upload-resumes") is not None
+    assert upload_limit.body_limit("GET", "/api/resumes") is None